@@ -1,32 +1,102 @@
 # Ficheiro: FileSorter.py
 
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, scrolledtext
+from tkinter import filedialog, messagebox, ttk
+import tkinter.font as tkfont
 import os
 import threading
-import queue
 import logging
 import json
+import tempfile
 import webbrowser
 from pathlib import Path
 from tkinterdnd2 import DND_FILES, TkinterDnD
-from platformdirs import user_config_dir, user_log_dir
 
+from ai_cache import SuggestionCache
+from app_paths import get_cache_dir, get_config_path, get_journal_dir, get_state_index_path, setup_logging
+from events import EventChannel, LogBuffer
+from file_index import FileStateIndex
+from journal import MoveJournal, find_journals
 from logic import FileSorterLogic, GeminiRuleSuggester
+from mover import ParallelMoveExecutor
+from watcher import FolderWatcher
 
-def get_config_path() -> Path:
-    app_config_dir = Path(user_config_dir("FileSorter", "CurmudgeonApps"))
-    return app_config_dir / "config.json"
+# Número de movimentos planeados mostrados no log; o plano completo vai para o relatório.
+PREVIEW_LOG_LIMIT = 500
+# Linhas guardadas no buffer do log; as mais antigas são descartadas (o relatório tem tudo).
+LOG_BUFFER_LINES = 100_000
+# Mensagens do canal tratadas por cada ciclo de 100 ms da interface.
+MAX_MESSAGES_PER_TICK = 20
+# Intervalo entre atualizações das estatísticas na barra de estado durante a vigilância.
+WATCH_STATS_INTERVAL = 1.0
+
+class LogView(tk.Frame):
+    """Vista virtualizada do log: o widget de texto só contém as linhas visíveis do LogBuffer.
+
+    A barra de deslocamento é gerida à mão sobre os índices do buffer. Enquanto a vista
+    estiver no fim, acompanha as linhas novas; se o utilizador subir, fica parada onde está.
+    """
+
+    def __init__(self, master, maxlen: int = LOG_BUFFER_LINES, **kwargs):
+        super().__init__(master)
+        self.buffer = LogBuffer(maxlen)
+        self.first = 0
+        self.follow = True
+        self.text = tk.Text(self, wrap=tk.NONE, state='disabled', **kwargs)
+        self.line_height = max(1, tkfont.Font(font=self.text.cget('font')).metrics('linespace'))
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.bind('<Configure>', lambda event: self._redraw())
+        self.text.bind('<MouseWheel>', lambda event: self._scroll_by(-1 if event.delta > 0 else 1, 'units'))
+        self.text.bind('<Button-4>', lambda event: self._scroll_by(-1, 'units'))
+        self.text.bind('<Button-5>', lambda event: self._scroll_by(1, 'units'))
+
+    def _rows(self) -> int:
+        return max(1, self.text.winfo_height() // self.line_height)
+
+    def append(self, lines):
+        dropped = self.buffer.extend(lines)
+        if not self.follow:
+            # As linhas descartadas deslocam os índices: a janela mantém-se nas mesmas linhas.
+            self.first = max(0, self.first - dropped)
+        self._redraw()
+
+    def clear(self):
+        self.buffer.clear()
+        self.first, self.follow = 0, True
+        self._redraw()
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.first = int(float(amount) * len(self.buffer))
+            self.follow = self.first >= len(self.buffer) - self._rows()
+            self._redraw()
+        else:
+            self._scroll_by(int(amount), unit)
+        return 'break'
+
+    def _scroll_by(self, amount: int, unit: str):
+        rows = self._rows()
+        self.first += amount * (rows if unit == 'pages' else 1)
+        self.follow = self.first >= len(self.buffer) - rows
+        self._redraw()
+        return 'break'
+
+    def _redraw(self):
+        rows, total = self._rows(), len(self.buffer)
+        if self.follow:
+            self.first = total - rows
+        self.first, lines = self.buffer.window(self.first, rows)
+        self.text.config(state='normal')
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', '\n'.join(lines))
+        self.text.config(state='disabled')
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + len(lines)) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
 
-def setup_logging():
-    log_dir = Path(user_log_dir("FileSorter", "CurmudgeonApps"))
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_file = log_dir / "file_sorter.log"
-    logging.basicConfig(
-        level=logging.ERROR,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[logging.FileHandler(log_file)]
-    )
 
 class FileSorterGUI:
     def __init__(self, master):
@@ -38,7 +108,7 @@ class FileSorterGUI:
         self.gemini_suggester = None
         self.ai_available = False
         try:
-            self.gemini_suggester = GeminiRuleSuggester()
+            self.gemini_suggester = GeminiRuleSuggester(cache=SuggestionCache(get_cache_dir() / "suggestions"))
             self.ai_available = True
         except ValueError as e:
             # Não podemos usar messagebox aqui porque a janela pode não estar pronta
@@ -49,7 +119,9 @@ class FileSorterGUI:
             self.ai_error_message = None
 
         self.selected_folder = tk.StringVar(value="Arraste e largue uma pasta aqui ou selecione")
-        self.queue = queue.Queue()
+        self.recursive = tk.BooleanVar(value=False)
+        self.bypass_ai_cache = tk.BooleanVar(value=False)
+        self.channel = EventChannel()
         self.cancel_event = threading.Event()
         self.thread = None
 
@@ -79,16 +151,27 @@ class FileSorterGUI:
         self.ai_prompt_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
         self.ask_ai_button = tk.Button(ai_frame, text="Sugerir Novas Regras", command=self.start_ai_suggestion_thread)
         self.ask_ai_button.pack(side=tk.LEFT)
+        self.bypass_cache_check = tk.Checkbutton(ai_frame, text="Ignorar cache", variable=self.bypass_ai_cache)
+        self.bypass_cache_check.pack(side=tk.LEFT, padx=(10, 0))
         if not self.ai_available:
             self.ask_ai_button.config(state='disabled')
             self.ai_prompt_entry.config(state='disabled')
+            self.bypass_cache_check.config(state='disabled')
             
         action_frame = tk.Frame(main_frame)
         action_frame.pack(fill=tk.X, pady=5)
         self.organize_button = tk.Button(action_frame, text="Organizar Usando Regras Atuais", command=self.start_organization_thread, height=2)
         self.organize_button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        self.preview_button = tk.Button(action_frame, text="Pré-visualizar", command=self.start_preview_thread, height=2)
+        self.preview_button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.undo_button = tk.Button(action_frame, text="Desfazer Última", command=self.start_undo_thread, height=2)
+        self.undo_button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.watch_button = tk.Button(action_frame, text="Vigiar Pasta", command=self.start_watch_thread, height=2)
+        self.watch_button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.cancel_button = tk.Button(action_frame, text="Cancelar", command=self.cancel_organization, height=2, state='disabled')
         self.cancel_button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        self.recursive_check = tk.Checkbutton(main_frame, text="Incluir subpastas", variable=self.recursive)
+        self.recursive_check.pack(anchor=tk.W)
         
         progress_frame = tk.Frame(main_frame)
         progress_frame.pack(fill=tk.X, pady=5)
@@ -96,8 +179,8 @@ class FileSorterGUI:
         self.progress_bar.pack(fill=tk.X, expand=True)
         log_frame = tk.LabelFrame(main_frame, text="Log de Atividades")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, state='disabled', bg='#f0f0f0')
-        self.log_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.log_view = LogView(log_frame, bg='#f0f0f0')
+        self.log_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         self.status_label = tk.Label(self.master, text="Pronto", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
@@ -127,33 +210,105 @@ class FileSorterGUI:
             return
         self.cancel_event.clear()
         self.toggle_ui_state(is_running=True)
-        self.log_text.config(state='normal')
-        self.log_text.delete('1.0', tk.END)
-        self.log_text.config(state='disabled')
-        self.thread = threading.Thread(target=self.run_organization, args=(folder, self.cancel_event))
+        self.log_view.clear()
+        self.thread = threading.Thread(target=self.run_organization, args=(folder, self.cancel_event, self.recursive.get()))
         self.thread.start()
         self.master.after(100, self.process_queue)
 
-    def run_organization(self, folder, cancel_event):
-        report_data = {}
+    def run_organization(self, folder, cancel_event, recursive=False):
+        state_index = None
         try:
-            generator = self.logic.organize_files(folder, cancel_event)
-            while True:
-                try:
-                    msg_type, msg_data = next(generator)
-                    self.queue.put((msg_type, msg_data))
-                except StopIteration as e:
-                    report_data = e.value
-                    break
-            
+            # O SQLite só pode ser usado na thread que abriu a ligação.
+            state_index = FileStateIndex(get_state_index_path())
+            journal = MoveJournal.create(get_journal_dir(), folder, options={"recursive": recursive, "max_depth": None, "exclude": []})
+            generator = self.logic.organize_files(folder, cancel_event, recursive=recursive, journal=journal, state_index=state_index)
+            report_data = self.channel.pump(generator, cancel_event)
             if report_data:
+                if report_data.get("skipped_unchanged"):
+                    self.channel.put(("log", f"{report_data['skipped_unchanged']} ficheiros sem alterações foram ignorados."))
                 report_path = self.logic.generate_html_report(report_data)
                 if report_path:
-                    self.queue.put(("report_generated", report_path))
+                    self.channel.put(("report_generated", report_path))
 
         except Exception as e:
             logging.error(f"Erro inesperado na thread de organização: {e}")
-            self.queue.put(("error", f"Ocorreu um erro fatal: {e}"))
+            self.channel.put(("error", f"Ocorreu um erro fatal: {e}"))
+        finally:
+            if state_index is not None:
+                state_index.close()
+
+    def start_undo_thread(self):
+        folder = self.selected_folder.get()
+        if not os.path.isdir(folder):
+            messagebox.showerror("Erro", "Por favor, selecione ou arraste uma pasta válida primeiro.")
+            return
+        journals = find_journals(get_journal_dir(), folder)
+        if not journals:
+            messagebox.showinfo("Desfazer", "Não há nenhuma organização registada para esta pasta.")
+            return
+        if not messagebox.askyesno("Desfazer", "Repor os ficheiros da última organização desta pasta nos locais e nomes originais?"):
+            return
+        self.cancel_event.clear()
+        self.toggle_ui_state(is_running=True)
+        self.log_view.clear()
+        self.thread = threading.Thread(target=self.run_undo, args=(journals[0], self.cancel_event))
+        self.thread.start()
+        self.master.after(100, self.process_queue)
+
+    def run_undo(self, journal_path, cancel_event):
+        try:
+            self.channel.pump(self.logic.undo_journal(journal_path, cancel_event, executor=ParallelMoveExecutor()), cancel_event)
+        except Exception as e:
+            logging.error(f"Erro inesperado ao desfazer a organização: {e}")
+            self.channel.put(("error", f"Ocorreu um erro fatal: {e}"))
+
+    def start_watch_thread(self):
+        folder = self.selected_folder.get()
+        if not os.path.isdir(folder):
+            messagebox.showerror("Erro", "Por favor, selecione ou arraste uma pasta válida primeiro.")
+            return
+        self.cancel_event.clear()
+        self.toggle_ui_state(is_running=True)
+        self.log_view.clear()
+        self.thread = threading.Thread(target=self.run_watch, args=(folder, self.cancel_event))
+        self.thread.start()
+        self.master.after(100, self.process_queue)
+
+    def run_watch(self, folder, cancel_event):
+        try:
+            watcher = FolderWatcher(self.logic, folder)
+            self.channel.pump(watcher.run(cancel_event, stats_interval=WATCH_STATS_INTERVAL), cancel_event)
+        except Exception as e:
+            logging.error(f"Erro inesperado na vigilância da pasta: {e}")
+            self.channel.put(("error", f"Ocorreu um erro fatal: {e}"))
+
+    def start_preview_thread(self):
+        folder = self.selected_folder.get()
+        if not os.path.isdir(folder):
+            messagebox.showerror("Erro", "Por favor, selecione ou arraste uma pasta válida primeiro.")
+            return
+        self.toggle_ui_state(is_running=True)
+        self.cancel_button.config(state='disabled')
+        self.log_view.clear()
+        self.status_label.config(text="A calcular o plano de organização...")
+        self.thread = threading.Thread(target=self.run_preview, args=(folder, self.recursive.get()))
+        self.thread.start()
+        self.master.after(100, self.process_queue)
+
+    def run_preview(self, folder, recursive=False):
+        try:
+            plan = self.logic.plan_organization(folder, recursive=recursive)
+            logs = [f"{relative} -> {folder_name}/{final_name}" for relative, folder_name, final_name in plan.moves[:PREVIEW_LOG_LIMIT]]
+            if len(plan.moves) > PREVIEW_LOG_LIMIT:
+                logs.append(f"... e mais {len(plan.moves) - PREVIEW_LOG_LIMIT} movimentos (ver relatório).")
+            self.channel.put(("batch", {"logs": logs, "dropped_logs": 0, "progress": None, "total_files": None}))
+            self.channel.put(("done", f"Pré-visualização: {len(plan.moves)} ficheiros a mover, {len(plan.created_folders)} pastas novas."))
+            report_path = self.logic.generate_html_report(plan.to_report_data(), output_dir=Path(tempfile.gettempdir()))
+            if report_path:
+                self.channel.put(("report_generated", report_path))
+        except Exception as e:
+            logging.error(f"Erro inesperado na pré-visualização: {e}")
+            self.channel.put(("error", f"Ocorreu um erro fatal: {e}"))
 
     def start_ai_suggestion_thread(self):
         folder = self.selected_folder.get()
@@ -166,13 +321,13 @@ class FileSorterGUI:
             return
         self.status_label.config(text="Consultando a IA, por favor aguarde...")
         self.toggle_ui_state(is_running=True)
-        self.thread = threading.Thread(target=self.run_ai_suggestion, args=(folder, user_request))
+        self.thread = threading.Thread(target=self.run_ai_suggestion, args=(folder, user_request, not self.bypass_ai_cache.get()))
         self.thread.start()
         self.master.after(100, self.process_queue)
 
-    def run_ai_suggestion(self, folder, user_request):
-        rules = self.gemini_suggester.suggest_rules(folder, user_request)
-        self.queue.put(("ai_suggestion_result", rules))
+    def run_ai_suggestion(self, folder, user_request, use_cache=True):
+        rules = self.gemini_suggester.suggest_rules(folder, user_request, use_cache=use_cache)
+        self.channel.put(("ai_suggestion_result", rules))
 
     def cancel_organization(self):
         self.status_label.config(text="Cancelando...")
@@ -180,6 +335,8 @@ class FileSorterGUI:
         self.cancel_button.config(state='disabled')
 
     def handle_ai_result(self, rules):
+        cache_status = self.gemini_suggester.cache.stats_text()
+        self.status_label.config(text=cache_status)
         if rules is None:
             messagebox.showerror("Erro da IA", "A IA não conseguiu gerar regras. Verifique o ficheiro de log para detalhes.")
             return
@@ -191,45 +348,58 @@ class FileSorterGUI:
         if apply:
             self.logic.set_rules(rules)
             self.logic.save_rules()
-            self.status_label.config(text="Regras da IA aplicadas e salvas!")
+            self.status_label.config(text=f"Regras da IA aplicadas e salvas! ({cache_status})")
             self._update_log("Novas regras de IA baseadas em palavras-chave foram salvas.")
 
     def process_queue(self):
-        try:
-            while not self.queue.empty():
-                msg_type, msg_data = self.queue.get_nowait()
-                
-                if msg_type == "ai_suggestion_result": self.handle_ai_result(msg_data); self.toggle_ui_state(is_running=False); return
-                elif msg_type == "total_files": self.progress_bar['maximum'] = int(msg_data); self.status_label.config(text=f"Encontrados {msg_data} ficheiros...")
-                elif msg_type == "progress": self.progress_bar['value'] = int(msg_data)
-                elif msg_type == "log": self._update_log(msg_data)
-                elif msg_type == "error": self.status_label.config(text=f"Erro: {msg_data}"); messagebox.showerror("Erro", msg_data)
-                elif msg_type == "cancelled": self._update_log(msg_data); self.status_label.config(text="Operação cancelada."); self.toggle_ui_state(is_running=False); return
-                elif msg_type == "done": self.status_label.config(text=msg_data)
-                elif msg_type == "report_generated":
-                    self.toggle_ui_state(is_running=False)
-                    if messagebox.askyesno("Relatório Concluído", f"Relatório salvo em:\n{msg_data}\n\nDeseja abri-lo agora no seu browser?"):
-                        try: webbrowser.open(Path(msg_data).as_uri())
-                        except Exception as e: messagebox.showerror("Erro", f"Não foi possível abrir o relatório: {e}")
-                    return
-
-            if self.thread and self.thread.is_alive(): self.master.after(100, self.process_queue)
-            else: self.toggle_ui_state(is_running=False)
-        except queue.Empty:
-            if self.thread and self.thread.is_alive(): self.master.after(100, self.process_queue)
-            else: self.toggle_ui_state(is_running=False)
+        for msg_type, msg_data in self.channel.drain(MAX_MESSAGES_PER_TICK):
+            if msg_type == "batch": self._apply_batch(msg_data)
+            elif msg_type == "ai_suggestion_result": self.handle_ai_result(msg_data); self.toggle_ui_state(is_running=False); return
+            elif msg_type == "total_files": self.progress_bar['maximum'] = int(msg_data); self.status_label.config(text=f"Encontrados {msg_data} ficheiros...")
+            elif msg_type == "progress": self.progress_bar['value'] = int(msg_data)
+            elif msg_type == "log": self._update_log(msg_data)
+            elif msg_type == "error": self.status_label.config(text=f"Erro: {msg_data}"); messagebox.showerror("Erro", msg_data)
+            elif msg_type == "cancelled": self._update_log(msg_data); self.status_label.config(text="Operação cancelada."); self.toggle_ui_state(is_running=False); return
+            elif msg_type == "done": self.status_label.config(text=msg_data)
+            elif msg_type == "stats": self.status_label.config(text=msg_data)
+            elif msg_type == "report_generated":
+                self.toggle_ui_state(is_running=False)
+                if messagebox.askyesno("Relatório Concluído", f"Relatório salvo em:\n{msg_data}\n\nDeseja abri-lo agora no seu browser?"):
+                    try: webbrowser.open(Path(msg_data).as_uri())
+                    except Exception as e: messagebox.showerror("Erro", f"Não foi possível abrir o relatório: {e}")
+                return
+
+        if (self.thread and self.thread.is_alive()) or not self.channel.empty(): self.master.after(100, self.process_queue)
+        else: self.toggle_ui_state(is_running=False)
+
+    def _apply_batch(self, batch):
+        """Aplica de uma só vez um lote agregado de progresso e linhas de log."""
+        if batch["total_files"] is not None:
+            self.progress_bar['maximum'] = int(batch["total_files"])
+            self.status_label.config(text=f"Encontrados {batch['total_files']} ficheiros...")
+        if batch["progress"] is not None:
+            self.progress_bar['value'] = int(batch["progress"])
+        lines = batch["logs"]
+        if batch["dropped_logs"]:
+            lines = [f"... ({batch['dropped_logs']} linhas omitidas)"] + lines
+        if lines:
+            self._append_log(lines)
 
     def _update_log(self, message: str):
-        self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, message + '\n')
-        self.log_text.see(tk.END)
-        self.log_text.config(state='disabled')
+        self._append_log([message])
+
+    def _append_log(self, lines):
+        self.log_view.append(lines)
         
     def toggle_ui_state(self, is_running: bool):
         state = 'disabled' if is_running else 'normal'
         self.organize_button.config(state=state)
+        self.preview_button.config(state=state)
+        self.undo_button.config(state=state)
+        self.watch_button.config(state=state)
         self.select_button.config(state=state)
-        if self.ai_available: self.ask_ai_button.config(state=state)
+        self.recursive_check.config(state=state)
+        if self.ai_available: self.ask_ai_button.config(state=state); self.bypass_cache_check.config(state=state)
         self.cancel_button.config(state='normal' if is_running else 'disabled')
 
 def main():
@@ -0,0 +1,104 @@
+# Ficheiro: ai_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def normalize_request(user_request: str) -> str:
+    return " ".join(user_request.casefold().split())
+
+
+def make_cache_key(filenames: Iterable[str], user_request: str, model_name: str) -> str:
+    """Chave estável para um pedido: independente da ordem da listagem e de espaços/maiúsculas no pedido."""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_request(user_request).encode("utf-8"))
+    for name in sorted(set(filenames)):
+        digest.update(b"\0")
+        digest.update(name.encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+class SuggestionCache:
+    """Cache em disco das regras sugeridas pela IA, com despejo LRU por idade, número e tamanho.
+
+    Cada entrada é um pequeno ficheiro JSON; a data de modificação marca o último uso, pelo
+    que um acerto apenas atualiza essa data. Os contadores `hits` e `misses` são da sessão.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = 256, max_bytes: int = 8 * 1024 * 1024,
+                 max_age_seconds: float = 30 * 24 * 3600):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def _path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path_for(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError(path)
+            with path.open('r', encoding='utf-8') as f:
+                rules = json.load(f)["rules"]
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return rules
+
+    def put(self, key: str, rules: List[Dict[str, Any]]) -> None:
+        path = self._path_for(key)
+        temporary = path.with_suffix(".tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with temporary.open('w', encoding='utf-8') as f:
+                json.dump({"rules": rules, "created": time.time()}, f, ensure_ascii=False)
+            os.replace(temporary, path)
+            self.evict()
+        except OSError as e:
+            logging.error(f"Não foi possível guardar a sugestão em cache '{path}': {e}")
+
+    def evict(self) -> None:
+        """Remove entradas expiradas e, depois, as menos usadas até respeitar os limites."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+
+    def clear(self) -> int:
+        """Apaga todas as entradas e devolve quantas foram removidas."""
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def stats_text(self) -> str:
+        return f"Cache da IA: {self.hits} acertos, {self.misses} falhas"
@@ -0,0 +1,49 @@
+# Ficheiro: app_paths.py
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from platformdirs import user_cache_dir, user_config_dir, user_data_dir, user_log_dir
+
+APP_NAME = "FileSorter"
+APP_AUTHOR = "CurmudgeonApps"
+LOG_LEVEL_VARIABLE = "FILESORTER_LOG_LEVEL"
+
+
+def get_config_path() -> Path:
+    app_config_dir = Path(user_config_dir(APP_NAME, APP_AUTHOR))
+    return app_config_dir / "config.json"
+
+
+def get_cache_dir() -> Path:
+    return Path(user_cache_dir(APP_NAME, APP_AUTHOR))
+
+
+def get_state_index_path() -> Path:
+    return get_cache_dir() / "file_state.sqlite3"
+
+
+def get_content_hash_cache_path() -> Path:
+    return get_cache_dir() / "content_hashes.sqlite3"
+
+
+def get_journal_dir() -> Path:
+    return Path(user_data_dir(APP_NAME, APP_AUTHOR)) / "journals"
+
+
+def setup_logging(level: Optional[int] = None):
+    """Configura o ficheiro de log; sem `level`, usa FILESORTER_LOG_LEVEL (por exemplo, INFO) ou ERROR."""
+    if level is None:
+        level = logging.getLevelName(os.environ.get(LOG_LEVEL_VARIABLE, "ERROR").upper())
+        if not isinstance(level, int):
+            level = logging.ERROR
+    log_dir = Path(user_log_dir(APP_NAME, APP_AUTHOR))
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_file = log_dir / "file_sorter.log"
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler(log_file)]
+    )
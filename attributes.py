@@ -0,0 +1,171 @@
+# Ficheiro: attributes.py
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Bytes lidos do início de um ficheiro para reconhecer o tipo (uma página de disco chega).
+HEADER_SIZE = 512
+DEFAULT_HEADER_WORKERS = 4
+# Tipos guardados em memória; acima disto são esquecidos os mais antigos.
+TYPE_CACHE_LIMIT = 100_000
+
+# (posição, assinatura, tipo), verificadas por esta ordem.
+_SIGNATURES: Tuple[Tuple[int, bytes, str], ...] = (
+    (0, b"\xff\xd8\xff", "jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (0, b"II*\x00", "tiff"),
+    (0, b"MM\x00*", "tiff"),
+    (0, b"%PDF-", "pdf"),
+    (0, b"PK\x03\x04", "zip"),
+    (0, b"PK\x05\x06", "zip"),
+    (0, b"\x1f\x8b", "gzip"),
+    (0, b"BZh", "bzip2"),
+    (0, b"\xfd7zXZ\x00", "xz"),
+    (0, b"7z\xbc\xaf\x27\x1c", "7z"),
+    (0, b"Rar!\x1a\x07", "rar"),
+    (0, b"ID3", "mp3"),
+    (0, b"\xff\xfb", "mp3"),
+    (0, b"\xff\xf3", "mp3"),
+    (0, b"fLaC", "flac"),
+    (0, b"OggS", "ogg"),
+    (0, b"\x1a\x45\xdf\xa3", "mkv"),
+    (0, b"\x7fELF", "elf"),
+    (0, b"MZ", "exe"),
+    (0, b"SQLite format 3\x00", "sqlite"),
+)
+# Subtipos de contentores RIFF (bytes 8-11) e ISO (marca "ftyp" nos bytes 8-11).
+_RIFF_TYPES = {b"WAVE": "wav", b"AVI ": "avi", b"WEBP": "webp"}
+_FTYP_TYPES = {b"heic": "heic", b"heix": "heic", b"mif1": "heic", b"qt  ": "mov", b"M4A ": "m4a"}
+
+# Tipo -> categoria; numa condição pode usar-se qualquer um dos dois.
+TYPE_CATEGORIES: Dict[str, str] = {
+    "jpeg": "image", "png": "image", "gif": "image", "bmp": "image", "tiff": "image", "webp": "image", "heic": "image",
+    "mp4": "video", "mov": "video", "avi": "video", "mkv": "video",
+    "mp3": "audio", "m4a": "audio", "wav": "audio", "flac": "audio", "ogg": "audio",
+    "pdf": "document", "text": "document",
+    "zip": "archive", "gzip": "archive", "bzip2": "archive", "xz": "archive", "7z": "archive", "rar": "archive",
+    "elf": "executable", "exe": "executable",
+    "sqlite": "data",
+}
+FILE_TYPES = tuple(sorted(set(TYPE_CATEGORIES) | set(TYPE_CATEGORIES.values())))
+
+
+def sniff_type(header: bytes) -> Optional[str]:
+    """Tipo de um ficheiro pelos primeiros bytes (ver TYPE_CATEGORIES); None se não for reconhecido."""
+    if header[:4] == b"RIFF":
+        return _RIFF_TYPES.get(header[8:12])
+    if header[4:8] == b"ftyp":
+        return _FTYP_TYPES.get(header[8:12], "mp4")
+    if header[:2] == b"BM" and header[6:10] == b"\x00\x00\x00\x00":
+        # Só "BM" apanharia qualquer texto começado por essas letras; os bytes 6-9 são reservados (zero).
+        return "bmp"
+    for offset, signature, file_type in _SIGNATURES:
+        if header.startswith(signature, offset):
+            return file_type
+    if header and b"\x00" not in header:
+        # Texto UTF-8 (ou ASCII), admitindo um carácter cortado no fim do cabeçalho.
+        for cut in range(4):
+            try:
+                header[:len(header) - cut].decode("utf-8")
+                return "text"
+            except UnicodeDecodeError:
+                continue
+    return None
+
+
+class PathEntry:
+    """Um ficheiro com a interface de `os.DirEntry` usada na classificação (name, path, stat).
+
+    Serve para classificar caminhos que não vieram de um `os.scandir`, reaproveitando um
+    stat() já feito quando existe.
+    """
+
+    __slots__ = ("name", "path", "_stat")
+
+    def __init__(self, path: Path, stat: Optional[os.stat_result] = None):
+        self.name = path.name
+        self.path = str(path)
+        self._stat = stat
+
+    def stat(self, follow_symlinks: bool = False) -> os.stat_result:
+        if self._stat is None:
+            self._stat = os.stat(self.path, follow_symlinks=follow_symlinks)
+        return self._stat
+
+
+class FileAttributes:
+    """Lê, só quando uma regra precisa, os atributos de um ficheiro para além do nome.
+
+    O stat vem do próprio `DirEntry` (no Linux, um único stat() que fica guardado na
+    entrada); o tipo vem dos primeiros HEADER_SIZE bytes, lidos num conjunto limitado de
+    threads e guardados em memória por (dispositivo, inode, mtime), por isso um ficheiro que
+    não mudou não volta a ser aberto na mesma sessão.
+    """
+
+    def __init__(self, workers: int = DEFAULT_HEADER_WORKERS, cache_limit: int = TYPE_CACHE_LIMIT):
+        self.workers = max(1, workers)
+        self.cache_limit = cache_limit
+        self._types: "OrderedDict[Hashable, Optional[str]]" = OrderedDict()
+        # Contadores para as métricas e para medir o custo das condições.
+        self.stats_read = 0
+        self.headers_read = 0
+
+    def stat(self, entry: Any) -> Optional[os.stat_result]:
+        """stat() da entrada sem seguir ligações simbólicas; None se o ficheiro já não existir."""
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            return None
+        self.stats_read += 1
+        return st
+
+    @staticmethod
+    def _cache_key(path: str, st: os.stat_result) -> Hashable:
+        # No Windows o stat de um DirEntry traz o inode a 0; aí a chave é o caminho.
+        if st.st_ino:
+            return st.st_dev, st.st_ino, st.st_mtime_ns
+        return path, st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def _read_type(path: str) -> Optional[str]:
+        try:
+            with open(path, "rb") as f:
+                return sniff_type(f.read(HEADER_SIZE))
+        except OSError:
+            return None
+
+    def types(self, files: Sequence[Tuple[str, Optional[os.stat_result]]]) -> List[Optional[str]]:
+        """Tipos de vários (caminho, stat); os que não estão em cache são lidos em paralelo."""
+        keys = [self._cache_key(path, st) if st is not None else None for path, st in files]
+        results: List[Optional[str]] = [None] * len(files)
+        missing: Dict[Hashable, List[int]] = {}
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            if key in self._types:
+                self._types.move_to_end(key)
+                results[i] = self._types[key]
+            else:
+                missing.setdefault(key, []).append(i)
+        if not missing:
+            return results
+
+        paths = [files[positions[0]][0] for positions in missing.values()]
+        if len(paths) == 1 or self.workers == 1:
+            found = [self._read_type(path) for path in paths]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+                found = list(pool.map(self._read_type, paths))
+        self.headers_read += len(paths)
+        for (key, positions), file_type in zip(missing.items(), found):
+            for i in positions:
+                results[i] = file_type
+            self._types[key] = file_type
+        while len(self._types) > self.cache_limit:
+            self._types.popitem(last=False)
+        return results
@@ -0,0 +1,311 @@
+# Ficheiro: batch.py
+
+import glob
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Event
+from typing import Any, Deque, Dict, Generator, Iterable, List, Optional, Sequence, Tuple, Union
+
+from dedup import ContentHashCache, Deduplicator
+from file_index import FileStateIndex
+from journal import MoveJournal
+from logic import FileSorterLogic
+from matcher import RuleMatcher
+from mover import FileCopier, ParallelMoveExecutor
+
+# Pastas em organização ao mesmo tempo no mesmo dispositivo, por omissão.
+DEFAULT_PER_DEVICE_LIMIT = 2
+# Intervalo mínimo entre atualizações de progresso enviadas por cada processo.
+PROGRESS_INTERVAL = 0.25
+# Espera máxima por mensagens dos processos antes de voltar a verificar o cancelamento.
+POLL_INTERVAL = 0.1
+
+
+def expand_sources(patterns: Iterable[str]) -> List[Path]:
+    """Pastas indicadas por caminhos ou padrões glob ("~/caixas/*", "/srv/**/entrada"), sem repetições.
+
+    Os caminhos devolvidos são absolutos: os relatórios e o resumo ligam-se a eles por URI.
+    """
+    folders: Dict[str, Path] = {}
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for match in sorted(matches):
+            if os.path.isdir(match):
+                folders.setdefault(os.path.realpath(match), Path(os.path.abspath(match)))
+    return list(folders.values())
+
+
+def read_source_list(path: Union[str, Path]) -> List[str]:
+    """Linhas de um ficheiro com uma pasta (ou padrão) por linha; ignora linhas vazias e comentários '#'."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+@dataclass
+class BatchOptions:
+    """Opções aplicadas a cada pasta do lote, como as do `organize` da linha de comandos.
+
+    Os caminhos do diário, do índice de estado e da cache de hashes são explícitos porque
+    cada processo abre os seus; None desliga a funcionalidade correspondente.
+    """
+    recursive: bool = False
+    max_depth: Optional[int] = None
+    exclude: Tuple[str, ...] = ()
+    move_workers: int = 0
+    journal_dir: Optional[Path] = None
+    state_index_path: Optional[Path] = None
+    dedup: Optional[str] = None
+    hash_cache_path: Optional[Path] = None
+    copy_backend: str = "auto"
+    copy_threads: int = 1
+    report: bool = True
+    forward_logs: bool = False
+
+
+@dataclass
+class _FolderProgress:
+    processed: int = 0
+    total: int = 0
+
+
+@dataclass
+class BatchSummary:
+    """Resultado de um lote: o resumo de cada pasta e os totais."""
+    folders: List[Dict[str, Any]] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    duration_seconds: float = 0.0
+    processes: int = 1
+    cancelled: bool = False
+
+    def totals(self) -> Dict[str, Any]:
+        keys = ("total_files_scanned", "moved_count", "skipped_unchanged", "duplicate_count", "errors")
+        totals = {key: sum(folder.get(key, 0) for folder in self.folders) for key in keys}
+        folder_counts: Counter = Counter()
+        for folder in self.folders:
+            folder_counts.update(folder.get("folder_counts", {}))
+        totals["folders"] = len(self.folders)
+        totals["failed_folders"] = sum(1 for folder in self.folders if folder.get("status") == "failed")
+        totals["folder_counts"] = dict(folder_counts)
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"started_at": self.started_at, "duration_seconds": self.duration_seconds, "processes": self.processes,
+                "cancelled": self.cancelled, "totals": self.totals(), "folders": self.folders}
+
+
+# Estado de cada processo do conjunto, preenchido uma vez por `_init_worker`.
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(config_path: Path, rules: List[Dict[str, Any]], matcher: RuleMatcher, messages: Any,
+                 cancel_event: Any, options: BatchOptions) -> None:
+    # O Ctrl+C chega a todo o grupo de processos; só o processo principal o trata e avisa os outros.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Ao terminar, o processo não espera que o principal leia as últimas mensagens de progresso.
+    messages.cancel_join_thread()
+    logic = FileSorterLogic(config_path, copier=FileCopier(options.copy_backend, chunk_workers=options.copy_threads))
+    logic.set_rules(rules, matcher)
+    _worker.update(logic=logic, messages=messages, cancel_event=cancel_event, options=options)
+
+
+def _organize_folder(folder: str) -> Dict[str, Any]:
+    """Organiza uma pasta dentro de um processo do conjunto e devolve o seu resumo."""
+    logic: FileSorterLogic = _worker["logic"]
+    messages, cancel_event, options = _worker["messages"], _worker["cancel_event"], _worker["options"]
+    summary: Dict[str, Any] = {"source_folder": folder, "status": "failed", "errors": 0, "pid": os.getpid()}
+    started = time.perf_counter()
+    state_index = hash_cache = None
+    try:
+        if options.state_index_path is not None:
+            state_index = FileStateIndex(options.state_index_path)
+        dedup = None
+        if options.dedup:
+            hash_cache = ContentHashCache(options.hash_cache_path) if options.hash_cache_path is not None else None
+            dedup = Deduplicator(options.dedup, cache=hash_cache)
+        journal = None
+        if options.journal_dir is not None:
+            journal = MoveJournal.create(options.journal_dir, folder, options={
+                "recursive": options.recursive, "max_depth": options.max_depth, "exclude": list(options.exclude),
+                "dedup": options.dedup})
+            summary["journal"] = str(journal.path)
+        executor = ParallelMoveExecutor(default_concurrency=options.move_workers) if options.move_workers > 0 else None
+        generator = logic.organize_files(folder, cancel_event, executor=executor, recursive=options.recursive,
+                                         max_depth=options.max_depth, exclude=options.exclude, journal=journal,
+                                         state_index=state_index, dedup=dedup)
+        last_progress = 0.0
+        processed = 0
+        while True:
+            try:
+                msg_type, msg_data = next(generator)
+            except StopIteration as e:
+                report_data = e.value
+                break
+            if msg_type == "progress":
+                processed = int(msg_data)
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = now
+                    messages.put((folder, "progress", processed))
+            elif msg_type == "total_files":
+                messages.put((folder, "total_files", int(msg_data)))
+            elif msg_type == "error":
+                summary["errors"] += 1
+                messages.put((folder, "error", msg_data))
+            elif msg_type == "log" and options.forward_logs:
+                messages.put((folder, "log", msg_data))
+        messages.put((folder, "progress", processed))
+
+        if not report_data:
+            summary["status"] = "cancelled" if cancel_event.is_set() else "failed"
+            return summary
+        summary.update({key: report_data[key] for key in ("moved_count", "total_files_scanned", "skipped_unchanged",
+                                                          "created_folders", "folder_counts")})
+        summary["duplicate_count"] = report_data.get("duplicate_count", 0)
+        if options.report:
+            summary["report"] = logic.generate_html_report(report_data)
+        report_data["move_log"].close()
+        summary["status"] = "completed"
+        return summary
+    except Exception as e:
+        logging.error(f"Falha ao organizar '{folder}' no lote: {e}")
+        summary["errors"] += 1
+        messages.put((folder, "error", f"Falha ao organizar a pasta: {e}"))
+        return summary
+    finally:
+        summary["duration_seconds"] = time.perf_counter() - started
+        if state_index is not None:
+            state_index.close()
+        if hash_cache is not None:
+            hash_cache.close()
+
+
+class BatchOrganizer:
+    """Organiza várias pastas de origem num conjunto de processos.
+
+    As regras são compiladas uma vez no processo principal e o `RuleMatcher` já compilado é
+    entregue a cada processo quando este arranca. Cada pasta é tratada inteira por um
+    processo, com o seu diário, relatório e índice, tal como em `organize_files`; no máximo
+    `per_device_limit` pastas do mesmo dispositivo estão em curso ao mesmo tempo, para que
+    um disco lento não receba todo o conjunto de uma vez.
+
+    O progresso de todos os processos é somado num único par de eventos "total_files" /
+    "progress". Ativar o `cancel_event` passado a `run` cancela todas as pastas em curso
+    (que ficam com o diário por terminar, e podem ser retomadas) e as que ainda não começaram.
+    """
+
+    def __init__(self, logic: FileSorterLogic, processes: Optional[int] = None,
+                 per_device_limit: int = DEFAULT_PER_DEVICE_LIMIT, options: Optional[BatchOptions] = None):
+        self.logic = logic
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.per_device_limit = max(1, per_device_limit)
+        self.options = options or BatchOptions()
+
+    @staticmethod
+    def _device_of(folder: Path) -> int:
+        try:
+            return os.stat(folder).st_dev
+        except OSError:
+            return -1
+
+    def run(self, folders: Sequence[Union[str, Path]],
+            cancel_event: Event) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """Organiza `folders` e, no final, devolve o resumo do lote (ver `BatchSummary.to_dict`)."""
+        summary = BatchSummary(processes=self.processes)
+        started = time.perf_counter()
+        # Pastas por dispositivo, por ordem, e quantas estão em curso em cada um.
+        pending: Dict[int, Deque[str]] = {}
+        for folder in folders:
+            pending.setdefault(self._device_of(Path(folder)), deque()).append(str(folder))
+        running_per_device: Counter = Counter()
+        progress: Dict[str, _FolderProgress] = {str(folder): _FolderProgress() for folder in folders}
+
+        context = multiprocessing.get_context()
+        messages = context.Queue()
+        worker_cancel = context.Event()
+        pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=context, initializer=_init_worker,
+                                   initargs=(self.logic.config_path, self.logic.rules, self.logic.matcher, messages,
+                                             worker_cancel, self.options))
+        futures: Dict[Future, Tuple[str, int]] = {}
+        yield ("log", f"A organizar {len(progress)} pastas com {self.processes} processos.")
+        try:
+            while pending or futures:
+                if cancel_event.is_set() and not worker_cancel.is_set():
+                    worker_cancel.set()
+                    pending.clear()
+                    yield ("log", "A cancelar todas as pastas em curso...")
+                # Enche o conjunto, alternando entre dispositivos e respeitando o limite de cada um.
+                while pending and len(futures) < self.processes:
+                    device = next((d for d in pending if running_per_device[d] < self.per_device_limit), None)
+                    if device is None:
+                        break
+                    folder = pending[device].popleft()
+                    if not pending[device]:
+                        del pending[device]
+                    else:
+                        # Passa o dispositivo para o fim, para que o seguinte seja de outro disco.
+                        pending[device] = pending.pop(device)
+                    running_per_device[device] += 1
+                    futures[pool.submit(_organize_folder, folder)] = (folder, device)
+
+                yield from self._drain_messages(messages, progress)
+                done, _ = wait(futures, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder, device = futures.pop(future)
+                    running_per_device[device] -= 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"source_folder": folder, "status": "failed", "errors": 1}
+                        yield ("error", f"[{folder}] O processo falhou: {e}")
+                    summary.folders.append(result)
+                    yield ("log", self._folder_line(result))
+            yield from self._drain_messages(messages, progress)
+        finally:
+            worker_cancel.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            messages.close()
+
+        summary.cancelled = cancel_event.is_set()
+        summary.duration_seconds = time.perf_counter() - started
+        if summary.cancelled:
+            yield ("cancelled", "Lote cancelado pelo utilizador.")
+        else:
+            yield ("done", f"Lote concluído: {len(summary.folders)} pastas em {summary.duration_seconds:.1f} s.")
+        return summary.to_dict()
+
+    @staticmethod
+    def _drain_messages(messages: Any, progress: Dict[str, _FolderProgress]) -> Generator[Tuple[str, str], None, None]:
+        changed = False
+        while True:
+            try:
+                folder, msg_type, msg_data = messages.get_nowait()
+            except queue.Empty:
+                break
+            if msg_type == "progress":
+                progress[folder].processed = msg_data
+                changed = True
+            elif msg_type == "total_files":
+                progress[folder].total = msg_data
+                changed = True
+            else:
+                yield (msg_type, f"[{folder}] {msg_data}")
+        if changed:
+            yield ("total_files", str(sum(max(p.total, p.processed) for p in progress.values())))
+            yield ("progress", str(sum(p.processed for p in progress.values())))
+
+    @staticmethod
+    def _folder_line(result: Dict[str, Any]) -> str:
+        folder = result["source_folder"]
+        if result.get("status") != "completed":
+            return f"[{folder}] {'cancelada' if result.get('status') == 'cancelled' else 'falhou'}."
+        return (f"[{folder}] {result['moved_count']} de {result['total_files_scanned']} ficheiros movidos "
+                f"em {result['duration_seconds']:.1f} s.")
@@ -0,0 +1,76 @@
+# Ficheiro: benchmarks/bench_batch.py
+"""Mede a escalabilidade da organização em lote com o número de processos.
+
+Cria várias pastas de origem sintéticas (ver `corpus.py`) em tmpfs, com muitas
+palavras-chave para que a classificação pese, e organiza-as com `BatchOrganizer` para cada
+número de processos, sem diário, índice nem relatórios. Mostra o tempo, o ritmo e a
+aceleração face a um processo; a eficiência perto de 100% significa escala linear.
+
+Uso: python benchmarks/bench_batch.py [--folders 8] [--files 5000] [--keywords 5000] [--processes 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from threading import Event
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from batch import BatchOptions, BatchOrganizer  # noqa: E402
+from corpus import CorpusSpec, build_corpus, make_keywords, make_rules, storage_root  # noqa: E402
+from logic import FileSorterLogic  # noqa: E402
+
+
+def run(base: Path, processes: int, folders: int, spec: CorpusSpec, keywords, rules) -> float:
+    with tempfile.TemporaryDirectory(dir=base) as tmp:
+        root = Path(tmp)
+        sources = []
+        for i in range(folders):
+            folder = root / f"caixa_{i:03d}"
+            build_corpus(folder, CorpusSpec(**{**spec.to_dict(), "seed": spec.seed + i}), keywords)
+            sources.append(folder)
+        logic = FileSorterLogic(config_path=root / "config.json")
+        logic.set_rules(rules)
+        organizer = BatchOrganizer(logic, processes=processes, per_device_limit=processes,
+                                   options=BatchOptions(report=False))
+        started = time.perf_counter()
+        generator = organizer.run(sources, Event())
+        try:
+            while True:
+                next(generator)
+        except StopIteration as e:
+            summary = e.value
+        elapsed = time.perf_counter() - started
+        assert summary["totals"]["failed_folders"] == 0, summary["folders"]
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--folders", type=int, default=8)
+    parser.add_argument("--files", type=int, default=5000, help="ficheiros por pasta")
+    parser.add_argument("--keywords", type=int, default=5000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    base = storage_root("tmpfs") or storage_root("disk")
+    spec = CorpusSpec(files=args.files, keywords=args.keywords, files_per_dir=args.files)
+    keywords = make_keywords(spec.keywords, spec.seed)
+    rules = make_rules(keywords)
+    total = args.folders * args.files
+    print(f"{args.folders} pastas x {args.files} ficheiros em {base}; {os.cpu_count()} núcleos")
+    print(f"{'processos':>9} {'tempo (s)':>10} {'fich./s':>10} {'aceleração':>10} {'eficiência':>10}")
+    baseline = None
+    for processes in args.processes:
+        elapsed = run(base, processes, args.folders, spec, keywords, rules)
+        # Sem medição com um processo, a primeira serve de base (admitindo que já escalava).
+        baseline = baseline or elapsed * processes
+        speedup = baseline / elapsed
+        print(f"{processes:>9} {elapsed:>10.2f} {total / elapsed:>10.0f} {speedup:>10.2f} {speedup / processes:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
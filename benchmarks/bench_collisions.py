@@ -0,0 +1,97 @@
+# Ficheiro: benchmarks/bench_collisions.py
+"""Compara o número de chamadas stat() na escolha de nomes livres, antes e depois do índice de colisões.
+
+Uso: python benchmarks/bench_collisions.py [--existing 500] [--incoming 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from collisions import DestinationNameIndex  # noqa: E402
+
+
+class StatCounter:
+    """Conta chamadas a os.stat e os.scandir enquanto está ativo."""
+
+    def __init__(self):
+        self.stat_calls = 0
+        self.scandir_calls = 0
+
+    def __enter__(self):
+        self._stat, self._scandir = os.stat, os.scandir
+
+        def counting_stat(*args, **kwargs):
+            self.stat_calls += 1
+            return self._stat(*args, **kwargs)
+
+        def counting_scandir(*args, **kwargs):
+            self.scandir_calls += 1
+            return self._scandir(*args, **kwargs)
+
+        os.stat, os.scandir = counting_stat, counting_scandir
+        return self
+
+    def __exit__(self, *exc):
+        os.stat, os.scandir = self._stat, self._scandir
+
+
+def legacy_safe_path(destination: Path, filename: str) -> Path:
+    """O algoritmo anterior: experimenta `nome (1)`, `nome (2)`, ... com Path.exists()."""
+    source = Path(filename)
+    final_destination = destination / filename
+    counter = 1
+    while final_destination.exists():
+        final_destination = destination / f"{source.stem} ({counter}){source.suffix}"
+        counter += 1
+    return final_destination
+
+
+def prepare(folder: Path, existing: int, filename: str) -> None:
+    source = Path(filename)
+    folder.mkdir()
+    (folder / filename).touch()
+    for i in range(1, existing):
+        (folder / f"{source.stem} ({i}){source.suffix}").touch()
+
+
+def run(strategy: str, root: Path, existing: int, incoming: int, filename: str) -> dict:
+    folder = root / strategy
+    prepare(folder, existing, filename)
+    index = DestinationNameIndex()
+    counter = StatCounter()
+    elapsed = 0.0
+    for _ in range(incoming):
+        start = time.perf_counter()
+        with counter:
+            if strategy == "legacy":
+                path = legacy_safe_path(folder, filename)
+            else:
+                path = index.reserve(folder, filename)
+        elapsed += time.perf_counter() - start
+        path.touch()  # simula o movimento, fora da contagem
+    return {"strategy": strategy, "stat_calls": counter.stat_calls,
+            "scandir_calls": counter.scandir_calls, "seconds": round(elapsed, 4)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--existing", type=int, default=500, help="ficheiros com o mesmo nome já no destino")
+    parser.add_argument("--incoming", type=int, default=2000, help="ficheiros com o mesmo nome a chegar")
+    parser.add_argument("--filename", default="scan.pdf")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for strategy in ("legacy", "index"):
+            result = run(strategy, Path(tmp), args.existing, args.incoming, args.filename)
+            print(f"{result['strategy']:>7}: {result['stat_calls']:>10} stat()  "
+                  f"{result['scandir_calls']:>3} scandir()  {result['seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Ficheiro: benchmarks/bench_copy.py
+"""Compara os métodos de cópia entre sistemas de ficheiros com o shutil.move usado antes.
+
+Para cada tamanho, cria ficheiros na pasta de origem e move-os para a de destino com cada
+método do `FileCopier` (que sincroniza cada cópia com o disco antes de apagar a origem) e
+com `shutil.move`, com e sem fsync, mostrando o débito e o método realmente usado. Por
+omissão a origem é /dev/shm e o destino a pasta temporária do sistema; para comparar
+sistemas de ficheiros montados em loop (por exemplo, btrfs ou XFS com reflink), indique
+as pastas com --source e --dest.
+
+Uso: python benchmarks/bench_copy.py [--sizes 1 64 512] [--count 8] [--source DIR] [--dest DIR] [--threads 4]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import filesystem_type  # noqa: E402
+from mover import COPY_BACKENDS, FileCopier, _copy_then_unlink  # noqa: E402
+
+MIB = 1024 * 1024
+
+
+def write_files(folder: Path, count: int, size: int) -> List[Path]:
+    block = os.urandom(MIB)
+    paths = []
+    for i in range(count):
+        path = folder / f"ficheiro_{i:03d}.bin"
+        with open(path, "wb") as f:
+            for offset in range(0, size, MIB):
+                f.write(block[:min(MIB, size - offset)])
+        paths.append(path)
+    return paths
+
+
+def shutil_move(fsync: bool) -> Callable[[Path, Path], None]:
+    def move(source: Path, destination: Path) -> None:
+        shutil.move(str(source), str(destination))
+        if fsync:
+            fd = os.open(destination, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    return move
+
+
+def run(source_root: Path, dest_root: Path, size: int, count: int, label: str, move: Callable[[Path, Path], None],
+        used: Callable[[], str]) -> None:
+    with tempfile.TemporaryDirectory(dir=source_root) as source_tmp, tempfile.TemporaryDirectory(dir=dest_root) as dest_tmp:
+        sources = write_files(Path(source_tmp), count, size)
+        started = time.perf_counter()
+        for source in sources:
+            move(source, Path(dest_tmp) / source.name)
+        elapsed = time.perf_counter() - started
+    rate = size * count / MIB / elapsed if elapsed > 0 else float("inf")
+    print(f"{size // MIB:>8} {label:>22} {elapsed:>9.3f} {rate:>10.0f}  {used()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 512], help="tamanhos dos ficheiros em MiB")
+    parser.add_argument("--count", type=int, default=8, help="ficheiros por tamanho")
+    parser.add_argument("--source", type=Path, default=Path("/dev/shm") if Path("/dev/shm").is_dir() else None)
+    parser.add_argument("--dest", type=Path, default=Path(tempfile.gettempdir()))
+    parser.add_argument("--threads", type=int, default=4, help="threads por ficheiro na variante com blocos paralelos")
+    args = parser.parse_args()
+    source_root = args.source or Path(tempfile.gettempdir())
+
+    print(f"origem: {source_root} ({filesystem_type(source_root)}), destino: {args.dest} ({filesystem_type(args.dest)})")
+    if os.stat(source_root).st_dev == os.stat(args.dest).st_dev:
+        print("AVISO: origem e destino no mesmo sistema de ficheiros; shutil.move vai só renomear.")
+    print(f"{'MiB':>8} {'método':>22} {'tempo (s)':>9} {'MiB/s':>10}  usado")
+    for size_mib in args.sizes:
+        size = size_mib * MIB
+        for fsync in (False, True):
+            run(source_root, args.dest, size, args.count, "shutil.move" + ("+fsync" if fsync else ""),
+                shutil_move(fsync), lambda: "-")
+        variants = [(backend, FileCopier(backend)) for backend in COPY_BACKENDS]
+        variants.append((f"auto, {args.threads} threads", FileCopier("auto", chunk_workers=args.threads, parallel_threshold=0)))
+        variants.append((f"buffered, {args.threads} threads",
+                         FileCopier("buffered", chunk_workers=args.threads, parallel_threshold=0)))
+        for label, copier in variants:
+            run(source_root, args.dest, size, args.count, label,
+                lambda source, destination, copier=copier: _copy_then_unlink(source, destination, copier),
+                lambda copier=copier: ", ".join(f"{method} {count}" for method, count in sorted(copier.used.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Ficheiro: benchmarks/bench_events.py
+"""Mede o ritmo de mensagens que chegam à interface através do EventChannel.
+
+Simula uma organização que emite um "log" e um "progress" por ficheiro e um consumidor
+que, como o ciclo do Tk, retira até MAX_MESSAGES_PER_TICK mensagens a cada 100 ms.
+
+Uso: python benchmarks/bench_events.py [--files 200000]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from events import EventChannel  # noqa: E402
+
+TICK_SECONDS = 0.1
+MAX_MESSAGES_PER_TICK = 20
+
+
+def fake_organize(files: int):
+    yield ("total_files", str(files))
+    for i in range(files):
+        yield ("log", f"Movido 'ficheiro_{i}.pdf' para 'PDF'.")
+        yield ("progress", str(i + 1))
+    yield ("done", "Organização concluída!")
+    return {"moved_count": files}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000)
+    args = parser.parse_args()
+
+    channel = EventChannel()
+    worker = threading.Thread(target=channel.pump, args=(fake_organize(args.files),))
+    start = time.perf_counter()
+    worker.start()
+
+    ticks, received, max_depth, lines = 0, 0, 0, 0
+    while worker.is_alive() or not channel.empty():
+        max_depth = max(max_depth, channel.queue.qsize())
+        for msg_type, msg_data in channel.drain(MAX_MESSAGES_PER_TICK):
+            received += 1
+            if msg_type == "batch":
+                lines += len(msg_data["logs"])
+        ticks += 1
+        time.sleep(TICK_SECONDS)
+    elapsed = time.perf_counter() - start
+
+    print(f"eventos do gerador:     {channel.events_received} ({channel.events_received / elapsed:,.0f}/s)")
+    print(f"mensagens na interface: {received} ({received / elapsed:.1f}/s, teto ~{channel.max_batches_per_second:.0f}/s + eventos finais)")
+    print(f"linhas de log enviadas: {lines}")
+    print(f"profundidade máxima da fila: {max_depth} (limite {channel.queue.maxsize})")
+    print(f"tempo total: {elapsed:.2f}s em {ticks} ciclos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Ficheiro: benchmarks/bench_journal.py
+"""Mede o custo do diário de movimentos numa organização real, numa pasta temporária.
+
+Organiza a mesma pasta sintética com e sem diário e mostra o tempo, o número de fsync
+(um por lote) e o tempo de desfazer a organização a partir do diário.
+
+Uso: python benchmarks/bench_journal.py [--files 20000] [--workers 4]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from threading import Event
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from journal import MoveJournal  # noqa: E402
+from logic import FileSorterLogic  # noqa: E402
+from mover import ParallelMoveExecutor  # noqa: E402
+
+EXTENSIONS = ["jpg", "pdf", "txt", "docx", "mp3", "zip"]
+
+
+def make_files(folder: Path, count: int) -> None:
+    folder.mkdir()
+    for i in range(count):
+        (folder / f"ficheiro_{i:06d}.{EXTENSIONS[i % len(EXTENSIONS)]}").touch()
+
+
+def consume(generator) -> None:
+    for _ in generator:
+        pass
+
+
+def organize_once(logic: FileSorterLogic, folder: Path, executor, journal_dir: Path = None):
+    """Organiza `folder` (com diário se `journal_dir` for dado); devolve (segundos, diário)."""
+    journal = MoveJournal.create(journal_dir, folder) if journal_dir is not None else None
+    started = time.perf_counter()
+    consume(logic.organize_files(folder, Event(), executor=executor, journal=journal))
+    return time.perf_counter() - started, journal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3, help="repetições alternadas; conta o melhor tempo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        logic = FileSorterLogic(config_path=tmp_path / "config.json")
+        executor = ParallelMoveExecutor(default_concurrency=args.workers) if args.workers > 0 else None
+        plain, journaled, undo = [], [], []
+        for run in range(args.repeat):
+            make_files(tmp_path / f"sem_diario_{run}", args.files)
+            make_files(tmp_path / f"com_diario_{run}", args.files)
+            # Alterna a ordem para que a cache do sistema de ficheiros não favoreça sempre o mesmo.
+            order = [False, True] if run % 2 == 0 else [True, False]
+            for with_journal in order:
+                if with_journal:
+                    elapsed, journal = organize_once(logic, tmp_path / f"com_diario_{run}", executor, tmp_path / "diarios")
+                    journaled.append(elapsed)
+                else:
+                    plain.append(organize_once(logic, tmp_path / f"sem_diario_{run}", executor)[0])
+            started = time.perf_counter()
+            consume(logic.undo_journal(journal.path, Event(), executor=executor))
+            undo.append(time.perf_counter() - started)
+
+        size = journal.path.stat().st_size
+        print(f"ficheiros:          {args.files} (melhor de {args.repeat})")
+        print(f"sem diário:         {min(plain):.2f}s")
+        print(f"com diário:         {min(journaled):.2f}s ({min(journaled) / min(plain) - 1:+.1%}), "
+              f"{journal.commits} fsync, {size / 1024:.0f} KiB")
+        print(f"desfazer:           {min(undo):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
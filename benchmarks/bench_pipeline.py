@@ -0,0 +1,282 @@
+# Ficheiro: benchmarks/bench_pipeline.py
+"""Benchmark de ponta a ponta e por etapa da organização, com curvas de escala e deteção de regressões.
+
+Para cada ponto cria uma árvore sintética (ver `corpus.py`) em tmpfs e/ou em disco e mede:
+
+- por etapa, sobre uma cópia da árvore: varredura (scan), classificação pelas regras
+  (match), escolha de nomes livres no destino (collisions), movimentos (move) e
+  relatório HTML (report);
+- de ponta a ponta, sobre outra cópia: `FileSorterLogic.organize_files` seguido de
+  `generate_html_report`, como na aplicação.
+
+A curva "keywords" mede só a compilação das regras e a classificação de nomes em memória,
+que são as únicas etapas que dependem do número de palavras-chave.
+
+Os resultados são gravados em JSON (por omissão em `benchmarks/results/`, fora do git); com --compare, cada tempo é comparado com o mesmo
+ponto de uma execução anterior e as regressões acima de --threshold são assinaladas
+(código de saída 1).
+
+Uso: python benchmarks/bench_pipeline.py [--curve files keywords] [--files 1000 10000 100000 1000000]
+         [--keywords 10 100 1000 10000] [--storage tmpfs disk] [--output resultados.json]
+         [--compare base.json] [--load resultados.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from threading import Event
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import (NAME_DISTRIBUTIONS, CorpusSpec, build_corpus, filesystem_type, generate_names,  # noqa: E402
+                    make_keywords, make_rules, storage_root)
+from collisions import DestinationNameIndex  # noqa: E402
+from logic import FileSorterLogic  # noqa: E402
+from matcher import RuleMatcher  # noqa: E402
+from mover import ParallelMoveExecutor, move_without_collision  # noqa: E402
+from report import MoveLog  # noqa: E402
+from scanner import DirectoryScanner  # noqa: E402
+
+RESULTS_FORMAT = "filesorter-bench"
+# Tempos abaixo disto são demasiado ruidosos para servir de base a uma regressão.
+MIN_COMPARABLE_SECONDS = 0.02
+# Onde ficam os resultados sem --output; ignorada pelo git.
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _new_logic(tmp: Path, rules: List[Dict[str, Any]]) -> FileSorterLogic:
+    logic = FileSorterLogic(config_path=tmp / "config.json")
+    logic.set_rules(rules)
+    return logic
+
+
+def time_stages(logic: FileSorterLogic, root: Path, report_dir: Path) -> Dict[str, float]:
+    """Executa as etapas da organização uma a uma, como `organize_files` as encadeia."""
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    entries = [(entry.path, entry.name) for entry in DirectoryScanner(root, recursive=True)]
+    timings["scan"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    folders = logic.matcher.classify_batch([name for _, name in entries])
+    timings["match"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    name_index = DestinationNameIndex()
+    planned = []
+    # pasta de destino -> (caminho, caminho em texto), como em `organize_files`.
+    destinations: Dict[str, tuple] = {}
+    for (path, name), folder in zip(entries, folders):
+        destination = destinations.get(folder)
+        if destination is None:
+            destination = destinations[folder] = (root / folder, str(root / folder))
+        if os.path.dirname(path) != destination[1]:
+            planned.append((Path(path), name_index.reserve(destination[0], name), folder))
+    timings["collisions"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    move_log = MoveLog()
+    for destination_path, _ in destinations.values():
+        destination_path.mkdir(exist_ok=True)
+    root_prefix = len(os.path.join(str(root), ""))
+    for source, destination, folder in planned:
+        final_destination, _ = move_without_collision(source, destination, name_index)
+        move_log.add(str(source)[root_prefix:], folder, final_destination.name)
+    timings["move"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    report_data = {"source_folder": str(root), "moved_count": move_log.count, "total_files_scanned": len(entries),
+                   "created_folders": sorted(move_log.folder_counts), "move_log": move_log,
+                   "folder_counts": dict(move_log.folder_counts)}
+    logic.generate_html_report(report_data, output_dir=report_dir)
+    timings["report"] = time.perf_counter() - started
+    move_log.close()
+    return timings
+
+
+def time_end_to_end(logic: FileSorterLogic, root: Path, report_dir: Path, workers: int) -> Dict[str, Any]:
+    executor = ParallelMoveExecutor(default_concurrency=workers) if workers > 0 else None
+    started = time.perf_counter()
+    generator = logic.organize_files(root, Event(), executor=executor, recursive=True)
+    while True:
+        try:
+            next(generator)
+        except StopIteration as e:
+            report_data = e.value
+            break
+    organized = time.perf_counter()
+    logic.generate_html_report(report_data, output_dir=report_dir)
+    finished = time.perf_counter()
+    return {"organize": organized - started, "report": finished - organized, "total": finished - started,
+            "moved": report_data["moved_count"], "scanned": report_data["total_files_scanned"]}
+
+
+def run_files_point(spec: CorpusSpec, storage: str, base: Path, workers: int) -> Dict[str, Any]:
+    keywords = make_keywords(spec.keywords, spec.seed)
+    rules = make_rules(keywords)
+    tmp = Path(tempfile.mkdtemp(prefix="filesorter_bench_", dir=base))
+    try:
+        started = time.perf_counter()
+        build_corpus(tmp / "etapas", spec, keywords)
+        generated = time.perf_counter() - started
+        stages = time_stages(_new_logic(tmp, rules), tmp / "etapas", tmp / "relatorio_etapas")
+        shutil.rmtree(tmp / "etapas")
+
+        build_corpus(tmp / "completo", spec, keywords)
+        end_to_end = time_end_to_end(_new_logic(tmp, rules), tmp / "completo", tmp / "relatorio_completo", workers)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"curve": "files", "storage": storage, "filesystem": filesystem_type(base), "files": spec.files,
+            "keywords": spec.keywords, "spec": spec.to_dict(), "generate": generated, "stages": stages,
+            "end_to_end": end_to_end, "files_per_second": spec.files / end_to_end["total"] if end_to_end["total"] else None}
+
+
+def run_keywords_point(spec: CorpusSpec) -> Dict[str, Any]:
+    keywords = make_keywords(spec.keywords, spec.seed)
+    rules = make_rules(keywords)
+    names = [name for _, name in generate_names(spec, keywords)]
+    started = time.perf_counter()
+    matcher = RuleMatcher(rules)
+    compiled = time.perf_counter()
+    matcher.classify_batch(names)
+    matched = time.perf_counter()
+    return {"curve": "keywords", "storage": "memória", "files": spec.files, "keywords": spec.keywords,
+            "spec": spec.to_dict(), "stages": {"compile": compiled - started, "match": matched - compiled},
+            "names_per_second": spec.files / (matched - compiled) if matched > compiled else None}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).resolve().parent,
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _point_key(run: Dict[str, Any]) -> tuple:
+    return run["curve"], run["storage"], run["files"], run["keywords"]
+
+
+def _timings(run: Dict[str, Any]) -> Dict[str, float]:
+    timings = {f"etapa.{stage}": seconds for stage, seconds in run["stages"].items()}
+    for name in ("organize", "report", "total"):
+        if name in run.get("end_to_end", {}):
+            timings[f"completo.{name}"] = run["end_to_end"][name]
+    return timings
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Linhas com os tempos que pioraram mais do que `threshold` (fração) em relação à base."""
+    base_runs = {_point_key(run): run for run in baseline["runs"]}
+    regressions = []
+    for run in current["runs"]:
+        base = base_runs.get(_point_key(run))
+        if base is None:
+            continue
+        base_timings = _timings(base)
+        for name, seconds in _timings(run).items():
+            old = base_timings.get(name)
+            if old is None or max(old, seconds) < MIN_COMPARABLE_SECONDS:
+                continue
+            if seconds > old * (1 + threshold):
+                curve, storage, files, keywords = _point_key(run)
+                regressions.append(f"{curve}/{storage} {files} ficheiros, {keywords} palavras-chave: {name} "
+                                   f"{old:.3f}s -> {seconds:.3f}s ({seconds / old - 1:+.0%})")
+    return regressions
+
+
+def print_run(run: Dict[str, Any]) -> None:
+    stages = " ".join(f"{name}={seconds:.3f}" for name, seconds in run["stages"].items())
+    line = f"{run['curve']:>8} {run['storage']:>7} {run['files']:>9,} ficheiros {run['keywords']:>6,} palavras-chave | {stages}"
+    if "end_to_end" in run:
+        end_to_end = run["end_to_end"]
+        line += (f" | completo {end_to_end['total']:.3f}s (organizar {end_to_end['organize']:.3f}, "
+                 f"relatório {end_to_end['report']:.3f}) {run['files_per_second']:,.0f} ficheiros/s")
+    print(line, flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--curve", nargs="+", choices=["files", "keywords"], default=["files", "keywords"])
+    parser.add_argument("--files", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--keywords", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--fixed-keywords", type=int, default=100, help="palavras-chave na curva de ficheiros")
+    parser.add_argument("--fixed-files", type=int, default=100_000, help="nomes na curva de palavras-chave")
+    parser.add_argument("--storage", nargs="+", choices=["tmpfs", "disk"], default=["tmpfs", "disk"])
+    parser.add_argument("--disk-dir", type=Path, default=None, help="pasta em disco (por omissão, a temporária do sistema)")
+    parser.add_argument("--names", choices=NAME_DISTRIBUTIONS, default="downloads", help="distribuição dos nomes")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--keyword-rate", type=float, default=0.3)
+    parser.add_argument("--files-per-dir", type=int, default=1000)
+    parser.add_argument("--file-size", type=int, default=0, help="bytes por ficheiro")
+    parser.add_argument("--workers", type=int, default=0, help="movimentos em paralelo na medição de ponta a ponta")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=None, help="ficheiro JSON dos resultados (por omissão, em benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, default=None, metavar="BASE", help="resultados anteriores a comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="piora relativa a partir da qual há regressão")
+    parser.add_argument("--load", type=Path, default=None, help="compara resultados já gravados em vez de medir")
+    args = parser.parse_args()
+
+    def spec(files: int, keywords: int) -> CorpusSpec:
+        return CorpusSpec(files=files, keywords=keywords, names=args.names, duplicate_rate=args.duplicate_rate,
+                          keyword_rate=args.keyword_rate, files_per_dir=args.files_per_dir,
+                          file_size=args.file_size, seed=args.seed)
+
+    if args.load:
+        results = json.loads(args.load.read_text(encoding="utf-8"))
+        for run in results["runs"]:
+            print_run(run)
+    else:
+        results = {"format": RESULTS_FORMAT, "version": 1, "created": datetime.now().isoformat(timespec="seconds"),
+                   "commit": _git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                   "runs": []}
+        if "files" in args.curve:
+            for storage in args.storage:
+                base = storage_root(storage, args.disk_dir)
+                if base is None:
+                    print(f"(sem {storage} neste sistema; ignorado)", file=sys.stderr)
+                    continue
+                for files in args.files:
+                    try:
+                        run = run_files_point(spec(files, args.fixed_keywords), storage, base, args.workers)
+                    except OSError as e:
+                        # Por exemplo, um tmpfs pequeno sem inodes para um milhão de ficheiros.
+                        print(f"(ponto {storage}/{files} ignorado: {e})", file=sys.stderr)
+                        continue
+                    results["runs"].append(run)
+                    print_run(run)
+        if "keywords" in args.curve:
+            for keywords in args.keywords:
+                run = run_keywords_point(spec(args.fixed_files, keywords))
+                results["runs"].append(run)
+                print_run(run)
+        output = args.output
+        if output is None:
+            RESULTS_DIR.mkdir(exist_ok=True)
+            output = RESULTS_DIR / f"bench_pipeline_{datetime.now():%Y-%m-%d_%H%M%S}.json"
+        output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultados: {output}", file=sys.stderr)
+
+    if args.compare:
+        regressions = compare_results(json.loads(args.compare.read_text(encoding="utf-8")), results, args.threshold)
+        for line in regressions:
+            print(f"REGRESSÃO: {line}")
+        if regressions:
+            return 1
+        print(f"Sem regressões acima de {args.threshold:.0%} em relação a {args.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
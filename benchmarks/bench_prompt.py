@@ -0,0 +1,78 @@
+# Ficheiro: benchmarks/bench_prompt.py
+"""Mede o tamanho e a cobertura do texto de nomes enviado à IA, sem rede e sem disco.
+
+Compara a abordagem anterior (primeiros 150 nomes, cortados a 4000 caracteres) com o
+resumo por grupos de `sampling.FilenameSummary`. A cobertura é a fração dos ficheiros
+cujo padrão (extensão + forma do nome) aparece no texto enviado.
+
+Uso: python benchmarks/bench_prompt.py [--sizes 100 10000 1000000] [--seed 7]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sampling import FilenameSummary, name_shape  # noqa: E402
+
+PROMPT_CHARS = 4000
+
+
+def synthetic_names(count: int, seed: int) -> List[str]:
+    """Uma pasta de "Downloads" sintética: muitos padrões repetidos e uma cauda de nomes únicos."""
+    rng = random.Random(seed)
+    words = ["fatura", "relatorio", "contrato", "ferias", "projeto", "notas", "recibo", "apresentacao"]
+    generators = [
+        (30, lambda i: f"IMG_2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}_{i:04d}.jpg"),
+        (15, lambda i: f"scan {i}.pdf"),
+        (10, lambda i: f"fatura_{rng.randint(1, 99999):05d}.pdf"),
+        (8, lambda i: f"relatorio_vendas_q{rng.randint(1, 4)}_{rng.randint(2019, 2025)}.xlsx"),
+        (6, lambda i: f"{rng.getrandbits(64):016x}.bin"),
+        (6, lambda i: f"Screenshot 2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} at {rng.randint(10, 23)}.{rng.randint(10, 59)}.png"),
+        (5, lambda i: f"video_{i}.mp4"),
+        (20, lambda i: f"{rng.choice(words)}_{rng.choice(words)}_{rng.choice('abcdefgh')}{rng.choice(words)}.{rng.choice(['docx', 'txt', 'odt'])}"),
+    ]
+    weights = [w for w, _ in generators]
+    names = []
+    for i in range(count):
+        _, make = rng.choices(generators, weights)[0]
+        names.append(make(i))
+    rng.shuffle(names)
+    return names
+
+
+def legacy_text(names: List[str]) -> str:
+    return ", ".join(names[:150])[:PROMPT_CHARS]
+
+
+def legacy_coverage(names: List[str], text: str) -> float:
+    # Só contam os nomes que chegaram inteiros ao texto cortado.
+    included = [name for name in text.split(", ")][:-1] if len(text) == PROMPT_CHARS else text.split(", ")
+    shapes = {name_shape(name) for name in included}
+    return sum(1 for name in names if name_shape(name) in shapes) / len(names)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 200_000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'ficheiros':>10} | {'anterior: chars':>15} {'cobertura':>9} | {'resumo: chars':>13} {'cobertura':>9} {'tempo':>7}")
+    for size in args.sizes:
+        names = synthetic_names(size, args.seed)
+        old = legacy_text(names)
+        start = time.perf_counter()
+        summary = FilenameSummary().add_all(names)
+        text = summary.render(PROMPT_CHARS)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>10} | {len(old):>15} {legacy_coverage(names, old):>9.1%} | "
+              f"{len(text):>13} {summary.coverage(PROMPT_CHARS):>9.1%} {elapsed:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
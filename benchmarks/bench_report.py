@@ -0,0 +1,62 @@
+# Ficheiro: benchmarks/bench_report.py
+"""Mede a memória de pico e o tempo do relatório HTML paginado para vários números de movimentos.
+
+Os movimentos são registados num `report.MoveLog` (como durante uma organização) e o relatório
+é escrito numa pasta temporária. A memória de pico, medida com tracemalloc, deve manter-se
+praticamente igual seja qual for o número de movimentos.
+
+Uso: python benchmarks/bench_report.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from report import MoveLog, write_html_report  # noqa: E402
+
+FOLDERS = ["Imagens", "Documentos", "Faturas", "Videos", "Musica", "TXT", "ZIP", "SEM_EXTENSAO"]
+
+
+def run(size: int):
+    """Regista `size` movimentos e escreve o relatório; devolve (tempo do registo, tempo do relatório, páginas)."""
+    started = time.perf_counter()
+    move_log = MoveLog()
+    for i in range(size):
+        folder = FOLDERS[i % len(FOLDERS)]
+        move_log.add(f"sub/{i // 1000}/ficheiro_{i:07d}.dat", folder, f"ficheiro_{i:07d}.dat")
+    logged = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        report_data = {"source_folder": output_dir, "moved_count": size, "total_files_scanned": size,
+                       "created_folders": FOLDERS, "move_log": move_log,
+                       "folder_counts": dict(move_log.folder_counts)}
+        index = write_html_report(report_data, Path(output_dir))
+        written = time.perf_counter()
+        pages = len(list(index.parent.glob("pagina_*.html")))
+    move_log.close()
+    return logged - started, written - logged, pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'movimentos':>11} {'registo (s)':>12} {'relatório (s)':>14} {'pico (KiB)':>11} {'páginas':>8}")
+    for size in args.sizes:
+        log_time, report_time, pages = run(size)
+        # Segunda passagem só para a memória: o tracemalloc torna tudo várias vezes mais lento.
+        tracemalloc.start()
+        run(size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{size:>11,} {log_time:>12.2f} {report_time:>14.2f} {peak / 1024:>11,.0f} {pages:>8}")
+
+
+if __name__ == "__main__":
+    main()
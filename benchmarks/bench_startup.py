@@ -0,0 +1,82 @@
+# Ficheiro: benchmarks/bench_startup.py
+"""Mede o tempo de arranque do caminho só-regras (CLI e motor) e falha se ultrapassar o orçamento.
+
+Também verifica que importar a CLI não carrega o motor, e que nem a CLI nem o motor (usado
+pela interface e pelos processos do lote) carregam o cliente da IA ou o Tk. Sai com código 1
+quando alguma das condições falha, para poder ser usado como verificação de regressão.
+
+Uso: python benchmarks/bench_startup.py [--budget-ms 150] [--runs 15]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Os mesmos que tests/test_startup.py: a IA só entra no GeminiRuleSuggester e o motor em main()/suggest.
+AI_AND_GUI_MODULES = ("google.generativeai", "dotenv", "tkinter", "tkinterdnd2")
+FORBIDDEN_MODULES = {
+    "cli": AI_AND_GUI_MODULES + ("logic", "ai_cache", "batch", "watcher", "multiprocessing"),
+    "logic": AI_AND_GUI_MODULES + ("batch", "watcher", "multiprocessing"),
+}
+
+_PROBE = """
+import json, sys
+import {module}
+print(json.dumps([m for m in {forbidden!r} if m in sys.modules]))
+"""
+
+
+def loaded_modules(module: str) -> list:
+    probe = _PROBE.format(module=module, forbidden=FORBIDDEN_MODULES[module])
+    return json.loads(subprocess.run([sys.executable, "-c", probe], cwd=REPO_ROOT, check=True,
+                                     capture_output=True, text=True).stdout)
+
+
+def time_import(module: str, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=REPO_ROOT, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def baseline(runs: int) -> float:
+    """Tempo de arranque do próprio interpretador, descontado das medições."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="custo máximo de cada import, além do interpretador")
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args()
+
+    interpreter_ms = baseline(args.runs)
+    print(f"interpretador: {interpreter_ms:.1f} ms")
+    ok = True
+    for module in FORBIDDEN_MODULES:
+        loaded = loaded_modules(module)
+        import_ms = statistics.median(time_import(module, args.runs)) - interpreter_ms
+        print(f"import {module + ':':<7} {import_ms:.1f} ms (orçamento {args.budget_ms:.0f} ms)")
+        if loaded:
+            print(f"FALHA: 'import {module}' carrega módulos pesados: {', '.join(loaded)}")
+            ok = False
+        if import_ms > args.budget_ms:
+            print(f"FALHA: orçamento de arranque de '{module}' ultrapassado")
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Ficheiro: benchmarks/bench_watch.py
+"""Mede a latência da vigilância de pastas, da chegada de cada ficheiro até estar ordenado.
+
+Uma thread escreve ficheiros numa pasta temporária a um ritmo fixo (ficheiros por minuto)
+enquanto o `FolderWatcher` os ordena; no fim mostra os percentis da latência e a fila
+máxima para cada observador.
+
+Uso: python benchmarks/bench_watch.py [--rate 6000] [--seconds 10] [--backends inotify polling]
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from threading import Event
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from logic import FileSorterLogic  # noqa: E402
+from watcher import FolderWatcher  # noqa: E402
+
+EXTENSIONS = ["jpg", "pdf", "txt", "docx", "mp3", "zip"]
+
+
+def produce(folder: Path, rate: float, seconds: float) -> int:
+    """Escreve ficheiros de 4 KiB ao ritmo de `rate` por minuto; devolve quantos escreveu."""
+    interval = 60.0 / rate
+    started = time.monotonic()
+    count = 0
+    while time.monotonic() - started < seconds:
+        with open(folder / f"ficheiro_{count:07d}.{EXTENSIONS[count % len(EXTENSIONS)]}", "wb") as f:
+            f.write(b"x" * 4096)
+        count += 1
+        delay = started + count * interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    return count
+
+
+def run(backend: str, rate: float, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "entrada"
+        folder.mkdir()
+        watcher = FolderWatcher(FileSorterLogic(config_path=Path(tmp) / "config.json"), folder, backend=backend)
+        cancel_event = Event()
+
+        def consume() -> None:
+            for _ in watcher.run(cancel_event):
+                pass
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        time.sleep(0.5)
+        produced = produce(folder, rate, seconds)
+        deadline = time.monotonic() + 5
+        while watcher.stats.sorted < produced and time.monotonic() < deadline:
+            time.sleep(0.05)
+        cancel_event.set()
+        thread.join()
+
+        stats = watcher.stats.snapshot()
+        latency = stats["latency_ms"]
+        print(f"{backend:>8} {produced:>9} {stats['sorted']:>9} {latency['p50']:>8} {latency['p95']:>8} "
+              f"{latency['p99']:>8} {latency['max']:>8} {stats['max_queue_depth']:>6}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=6000, help="ficheiros por minuto")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--backends", nargs="+", default=["inotify", "polling"])
+    args = parser.parse_args()
+
+    print(f"{'':>8} {'escritos':>9} {'ordenados':>9} {'p50 (ms)':>8} {'p95':>8} {'p99':>8} {'máx.':>8} {'fila':>6}")
+    for backend in args.backends:
+        run(backend, args.rate, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# Ficheiro: benchmarks/corpus.py
+"""Gerador de árvores de ficheiros e conjuntos de regras sintéticos para os benchmarks.
+
+Tudo é determinado pela semente: a mesma `CorpusSpec` gera sempre os mesmos nomes, nas
+mesmas pastas, com as mesmas regras, para que execuções diferentes sejam comparáveis.
+"""
+
+import os
+import random
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SYLLABLES = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi", "xo", "za",
+             "bra", "cle", "dro", "fri", "glu", "pra", "tre", "sto", "mun", "ver"]
+EXTENSIONS = ["jpg", "pdf", "txt", "docx", "png", "mp3", "mp4", "zip", "xlsx", "csv", "odt", "bin"]
+# Pesos das extensões: poucas muito frequentes e uma cauda longa, como numa pasta de Downloads.
+EXTENSION_WEIGHTS = [30, 20, 10, 8, 8, 5, 5, 4, 4, 3, 2, 1]
+NAME_DISTRIBUTIONS = ("downloads", "uniform", "camera")
+# Pastas de destino por regra: as palavras-chave são repartidas por este número de pastas, no máximo.
+MAX_RULE_FOLDERS = 100
+
+
+@dataclass
+class CorpusSpec:
+    """Parâmetros de uma árvore sintética.
+
+    `duplicate_rate` é a fração de ficheiros com um nome já usado noutra pasta (colisões
+    no destino); `keyword_rate` é a fração de nomes que contêm uma palavra-chave das regras.
+    """
+    files: int = 10_000
+    keywords: int = 100
+    names: str = "downloads"
+    duplicate_rate: float = 0.05
+    keyword_rate: float = 0.3
+    files_per_dir: int = 1000
+    file_size: int = 0
+    seed: int = 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _word(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def make_keywords(count: int, seed: int = 1) -> List[str]:
+    """`count` palavras-chave distintas e pronunciáveis, terminadas num algarismo."""
+    rng = random.Random(seed)
+    keywords: List[str] = []
+    seen = set()
+    while len(keywords) < count:
+        keyword = _word(rng, rng.randint(3, 4)) + str(rng.randint(0, 9))
+        if keyword not in seen:
+            seen.add(keyword)
+            keywords.append(keyword)
+    return keywords
+
+
+def make_rules(keywords: List[str]) -> List[Dict[str, Any]]:
+    """Regras no formato do config.json, com as palavras-chave repartidas por até MAX_RULE_FOLDERS pastas."""
+    folder_count = max(1, min(MAX_RULE_FOLDERS, len(keywords) // 10 or 1))
+    rules = [{"folder": f"Regra_{i:03d}", "keywords": []} for i in range(folder_count)]
+    for i, keyword in enumerate(keywords):
+        rules[i % folder_count]["keywords"].append(keyword)
+    return rules
+
+
+def _base_name(rng: random.Random, distribution: str, i: int) -> Tuple[str, str]:
+    """(raiz do nome, extensão) segundo a distribuição pedida."""
+    if distribution == "camera":
+        return f"IMG_2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}_{i:07d}", rng.choice(["jpg", "jpg", "jpg", "mp4", "png"])
+    extension = rng.choices(EXTENSIONS, EXTENSION_WEIGHTS)[0] if distribution == "downloads" else rng.choice(EXTENSIONS)
+    if distribution == "uniform":
+        return f"{_word(rng, 3)}_{i:07d}", extension
+    pattern = rng.random()
+    if pattern < 0.3:
+        stem = f"scan {i}"
+    elif pattern < 0.5:
+        stem = f"Screenshot 2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} at {rng.randint(10, 23)}.{rng.randint(10, 59)}.{i}"
+    elif pattern < 0.6:
+        stem = f"{rng.getrandbits(48):012x}"
+    else:
+        stem = f"{_word(rng, 2)}_{_word(rng, 3)}_{i}"
+    return stem, extension
+
+
+def generate_names(spec: CorpusSpec, keywords: List[str]) -> Iterator[Tuple[int, str]]:
+    """(índice da pasta, nome) de cada ficheiro da árvore, sem nada em disco.
+
+    Um nome duplicado é sempre colocado numa pasta diferente da do original.
+    """
+    rng = random.Random(spec.seed)
+    dir_count = max(1, -(-spec.files // max(1, spec.files_per_dir)))
+    # Nomes recentes que podem ser repetidos; uma janela limitada mantém a memória constante.
+    recent: List[Tuple[int, str]] = []
+    for i in range(spec.files):
+        directory = i % dir_count
+        if recent and dir_count > 1 and rng.random() < spec.duplicate_rate:
+            original_dir, name = rng.choice(recent)
+            if original_dir != directory:
+                yield directory, name
+                continue
+        stem, extension = _base_name(rng, spec.names, i)
+        if keywords and rng.random() < spec.keyword_rate:
+            stem = f"{stem}_{rng.choice(keywords)}" if rng.random() < 0.5 else f"{rng.choice(keywords)}_{stem}"
+        name = f"{stem}.{extension}"
+        if len(recent) < 10_000:
+            recent.append((directory, name))
+        else:
+            recent[rng.randrange(len(recent))] = (directory, name)
+        yield directory, name
+
+
+def directory_for(root: Path, index: int) -> Path:
+    """Pasta número `index`: a raiz, e depois dois níveis com até 100 subpastas cada."""
+    if index == 0:
+        return root
+    return root / f"lote_{index // 100:03d}" / f"sub_{index % 100:02d}"
+
+
+def build_corpus(root: Path, spec: CorpusSpec, keywords: Optional[List[str]] = None) -> int:
+    """Cria a árvore de `spec` em `root` e devolve o número de ficheiros criados."""
+    keywords = make_keywords(spec.keywords, spec.seed) if keywords is None else keywords
+    root.mkdir(parents=True, exist_ok=True)
+    created_dirs = set()
+    content = b"\0" * spec.file_size
+    count = 0
+    for index, name in generate_names(spec, keywords):
+        directory = directory_for(root, index)
+        if index not in created_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(index)
+        path = os.path.join(directory, name)
+        if content:
+            with open(path, "wb") as f:
+                f.write(content)
+        else:
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o644))
+        count += 1
+    return count
+
+
+def filesystem_type(path: Path) -> str:
+    """Tipo do sistema de ficheiros de `path` segundo /proc/mounts (ou "desconhecido")."""
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return "desconhecido"
+    target = os.path.realpath(path)
+    best = ("", "desconhecido")
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        inside = target == mount_point or target.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) > len(best[0]):
+            best = (mount_point, fs_type)
+    return best[1]
+
+
+def storage_root(kind: str, disk_dir: Optional[Path] = None) -> Optional[Path]:
+    """Pasta base para "tmpfs" (/dev/shm) ou "disk"; None se o tipo pedido não existir aqui."""
+    if kind == "tmpfs":
+        shm = Path("/dev/shm")
+        return shm if shm.is_dir() and os.access(shm, os.W_OK) else None
+    if disk_dir is not None:
+        disk_dir.mkdir(parents=True, exist_ok=True)
+        return disk_dir
+    return Path(tempfile.gettempdir())
@@ -0,0 +1,458 @@
+# Ficheiro: cli.py
+"""Interface de linha de comandos do FileSorter, sem Tk, para uso em servidores e no cron.
+
+Exemplos:
+    python -m cli organize ~/Downloads --recursive
+    python -m cli dry-run ~/Downloads --save-plan plano.jsonl
+    python -m cli apply-plan plano.jsonl --workers 4
+    python -m cli resume ~/Downloads
+    python -m cli undo ~/Downloads
+    python -m cli report ~/Downloads
+    python -m cli watch ~/Downloads
+    python -m cli batch '/srv/caixas/*' --processes 8
+    python -m cli suggest ~/Downloads "separe faturas de fotos" --apply
+    python -m cli clear-cache
+"""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+from pathlib import Path
+from threading import Event
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app_paths import (get_cache_dir, get_config_path, get_content_hash_cache_path, get_journal_dir,
+                       get_state_index_path, setup_logging)
+from journal import MoveJournal, find_journals
+from metrics import RunMetrics
+from mover import COPY_BACKENDS, FileCopier, ParallelMoveExecutor
+from planner import MovePlan
+from report import write_batch_report
+
+if TYPE_CHECKING:
+    # O motor (e, por ele, a IA) só é importado em main(), para que "import cli" fique leve.
+    from logic import FileSorterLogic
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    # Só as constantes; os módulos pesados (processos, SQLite) são importados por quem os usa.
+    from dedup import DEDUP_POLICIES
+
+    parser = argparse.ArgumentParser(prog="filesorter", description="Organiza ficheiros por regras de palavras-chave.")
+    parser.add_argument("--config", type=Path, default=None, help="ficheiro de regras (por omissão, o da aplicação)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="regista também mensagens informativas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_scan_options(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("folder", type=Path, help="pasta a organizar")
+        sub.add_argument("--recursive", "-r", action="store_true", help="inclui subpastas")
+        sub.add_argument("--max-depth", type=int, default=None, help="profundidade máxima com --recursive")
+        sub.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="ignora entradas que correspondam ao padrão")
+
+    def add_move_options(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--workers", type=int, default=0, help="movimentos em paralelo por sistema de ficheiros (0 = sequencial)")
+        sub.add_argument("--no-report", action="store_true", help="não gera o relatório HTML")
+        sub.add_argument("--quiet", "-q", action="store_true", help="mostra apenas erros e o resumo")
+        sub.add_argument("--metrics", action="store_true", help="mede o tempo de cada fase e mostra-o no fim")
+        sub.add_argument("--metrics-json", type=Path, metavar="FICHEIRO", help="grava as métricas em JSON (implica --metrics)")
+        sub.add_argument("--metrics-textfile", type=Path, metavar="FICHEIRO",
+                         help="grava as métricas no formato de texto do Prometheus (implica --metrics)")
+        add_copy_options(sub)
+
+    def add_copy_options(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--copy-backend", choices=COPY_BACKENDS, default="auto",
+                         help="primeiro método a tentar quando o destino está noutro sistema de ficheiros")
+        sub.add_argument("--copy-threads", type=int, default=1, metavar="N",
+                         help="threads por ficheiro grande (>= 256 MiB) copiado entre sistemas de ficheiros")
+
+    def add_journal_options(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--no-journal", action="store_true", help="não regista o diário (sem retomar nem desfazer)")
+
+    def add_journal_choice(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("folder", type=Path, help="pasta organizada")
+        sub.add_argument("--journal", type=Path, metavar="FICHEIRO", help="diário a usar (por omissão, o mais recente da pasta)")
+
+    organize = subparsers.add_parser("organize", help="move os ficheiros para as pastas das regras")
+    add_scan_options(organize)
+    add_move_options(organize)
+    add_journal_options(organize)
+    organize.add_argument("--full", action="store_true", help="trata todos os ficheiros, sem usar o índice dos já arrumados")
+    organize.add_argument("--dedup", choices=DEDUP_POLICIES, default=None,
+                          help="ficheiros com o mesmo conteúdo de um já no destino são apagados, ligados (hard link) "
+                               "ou postos de quarentena, em vez de ficarem como 'nome (1)'")
+    organize.add_argument("--hash-workers", type=int, default=4, metavar="N", help="threads para calcular hashes com --dedup")
+
+    dry_run = subparsers.add_parser("dry-run", help="mostra para onde cada ficheiro iria, sem mover nada")
+    add_scan_options(dry_run)
+    dry_run.add_argument("--save-plan", type=Path, metavar="FICHEIRO", help="guarda o plano (JSONL) para aplicar mais tarde")
+    dry_run.add_argument("--html", type=Path, metavar="PASTA", help="escreve uma pré-visualização HTML nesta pasta")
+
+    apply_plan = subparsers.add_parser("apply-plan", help="executa um plano guardado com dry-run --save-plan")
+    apply_plan.add_argument("plan", type=Path, help="ficheiro do plano")
+    add_move_options(apply_plan)
+    add_journal_options(apply_plan)
+
+    resume = subparsers.add_parser("resume", help="retoma uma organização interrompida a partir do diário")
+    add_journal_choice(resume)
+    add_move_options(resume)
+
+    undo = subparsers.add_parser("undo", help="desfaz uma organização, repondo os nomes originais")
+    add_journal_choice(undo)
+    undo.add_argument("--workers", type=int, default=4, help="ficheiros repostos em paralelo por sistema de ficheiros (0 = sequencial)")
+    undo.add_argument("--quiet", "-q", action="store_true", help="mostra apenas erros e o resumo")
+    add_copy_options(undo)
+
+    watch = subparsers.add_parser("watch", help="fica a vigiar a pasta e ordena cada ficheiro que chega")
+    watch.add_argument("folder", type=Path, help="pasta a vigiar")
+    watch.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="ignora ficheiros que correspondam ao padrão")
+    watch.add_argument("--polling", action="store_true", help="lê a pasta periodicamente em vez de usar o inotify")
+    # Sem valor, ficam os do FolderWatcher: o módulo (ctypes, inotify) só é importado ao vigiar.
+    watch.add_argument("--poll-interval", type=float, default=None, metavar="S", help="intervalo entre leituras com --polling")
+    watch.add_argument("--quiet-period", type=float, default=None, metavar="S",
+                       help="espera depois de um ficheiro ser fechado antes de o ordenar")
+    watch.add_argument("--open-quiet-period", type=float, default=None, metavar="S",
+                       help="espera sem alterações para ficheiros que nunca foram vistos a fechar")
+    watch.add_argument("--stats-interval", type=float, default=60.0, metavar="S", help="mostra as estatísticas a este ritmo (0 = nunca)")
+    watch.add_argument("--quiet", "-q", action="store_true", help="mostra apenas erros e as estatísticas")
+    add_copy_options(watch)
+
+    batch = subparsers.add_parser("batch", help="organiza várias pastas de origem em paralelo, em vários processos")
+    batch.add_argument("sources", nargs="*", help="pastas ou padrões glob (entre aspas), por exemplo '/srv/caixas/*'")
+    batch.add_argument("--from-file", type=Path, metavar="FICHEIRO", help="lê pastas ou padrões de um ficheiro, um por linha")
+    batch.add_argument("--processes", "-j", type=int, default=0, help="processos em paralelo (0 = um por núcleo)")
+    batch.add_argument("--per-device", type=int, default=None, metavar="N",
+                       help="pastas em curso ao mesmo tempo no mesmo dispositivo (por omissão, o do BatchOrganizer)")
+    batch.add_argument("--recursive", "-r", action="store_true", help="inclui subpastas")
+    batch.add_argument("--max-depth", type=int, default=None, help="profundidade máxima com --recursive")
+    batch.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="ignora entradas que correspondam ao padrão")
+    batch.add_argument("--workers", type=int, default=0, help="movimentos em paralelo por pasta e sistema de ficheiros (0 = sequencial)")
+    batch.add_argument("--no-report", action="store_true", help="não gera relatórios HTML")
+    batch.add_argument("--report-dir", type=Path, default=Path("."), metavar="PASTA", help="onde escrever o relatório do lote")
+    batch.add_argument("--summary-json", type=Path, metavar="FICHEIRO", help="grava o resumo do lote em JSON")
+    batch.add_argument("--quiet", "-q", action="store_true", help="mostra apenas erros e o resumo")
+    batch.add_argument("--no-journal", action="store_true", help="não regista os diários (sem retomar nem desfazer)")
+    batch.add_argument("--full", action="store_true", help="trata todos os ficheiros, sem usar o índice dos já arrumados")
+    batch.add_argument("--dedup", choices=DEDUP_POLICIES, default=None, help="trata os duplicados como em organize --dedup")
+    add_copy_options(batch)
+
+    report = subparsers.add_parser("report", help="resume quantos ficheiros iriam para cada pasta")
+    add_scan_options(report)
+
+    suggest = subparsers.add_parser("suggest", help="pede à IA um novo conjunto de regras")
+    suggest.add_argument("folder", type=Path, help="pasta cujos nomes de ficheiros serão analisados")
+    suggest.add_argument("request", help="o pedido em linguagem natural")
+    suggest.add_argument("--apply", action="store_true", help="guarda as regras sugeridas")
+    suggest.add_argument("--no-cache", action="store_true", help="ignora a cache de sugestões e consulta sempre a IA")
+
+    subparsers.add_parser("clear-cache", help="apaga as respostas da IA guardadas em cache")
+    return parser
+
+
+def _plan(logic: "FileSorterLogic", args: argparse.Namespace) -> MovePlan:
+    return logic.plan_organization(args.folder, recursive=args.recursive, max_depth=args.max_depth, exclude=args.exclude)
+
+
+def _drain(generator, args: argparse.Namespace) -> Tuple[int, Dict[str, Any]]:
+    """Mostra os eventos de uma operação; devolve o número de erros e o valor final do gerador."""
+    errors = 0
+    while True:
+        try:
+            msg_type, msg_data = next(generator)
+        except StopIteration as e:
+            return errors, e.value
+        if msg_type == "error":
+            errors += 1
+            print(f"ERRO: {msg_data}", file=sys.stderr)
+        elif msg_type == "log" and not args.quiet:
+            print(msg_data)
+        elif msg_type == "stats":
+            print(msg_data, file=sys.stderr)
+        elif msg_type in ("done", "cancelled"):
+            print(msg_data)
+
+
+def _metrics(args: argparse.Namespace) -> Optional[RunMetrics]:
+    if args.metrics or args.metrics_json or args.metrics_textfile:
+        return RunMetrics()
+    return None
+
+
+def _print_metrics(metrics: RunMetrics, copier: Optional[FileCopier] = None) -> None:
+    summary = metrics.summary()
+    phases = ", ".join(f"{phase} {values['seconds']:.3f}s" for phase, values in summary["phases"].items()
+                       if values["seconds"] or values["items"])
+    print(f"Fases: {phases}", file=sys.stderr)
+    latency = summary["move_latency_seconds"]
+    if latency["count"]:
+        print(f"Movimentos: {summary['throughput']['files_per_second']:.0f} ficheiros/s, "
+              f"{summary['bytes_moved']['total'] / 1e6:.1f} MB; latência p50 {latency['p50'] * 1000:.2f} ms, "
+              f"p99 {latency['p99'] * 1000:.2f} ms", file=sys.stderr)
+    if copier is not None and copier.used:
+        print("Cópias entre sistemas de ficheiros: " + ", ".join(f"{method} {count}" for method, count in sorted(copier.used.items())),
+              file=sys.stderr)
+
+
+def _consume(logic: "FileSorterLogic", generator, args: argparse.Namespace, metrics: Optional[RunMetrics] = None) -> int:
+    """Mostra os eventos de uma organização e gera o relatório; devolve o código de saída."""
+    errors, report_data = _drain(generator, args)
+    if report_data:
+        skipped = report_data.get("skipped_unchanged", 0)
+        print(f"{report_data['moved_count']} de {report_data['total_files_scanned']} ficheiros movidos"
+              + (f"; {skipped} sem alterações ignorados." if skipped else "."))
+        if report_data.get("duplicate_count"):
+            print(f"{report_data['duplicate_count']} duplicados ({report_data['dedup_policy']}), "
+                  f"{report_data['dedup_bytes_saved'] / 1e6:.1f} MB libertados.")
+        if not args.no_report:
+            report_path = logic.generate_html_report(report_data, metrics=metrics)
+            if report_path:
+                print(f"Relatório: {report_path}")
+    if metrics is not None and report_data:
+        _print_metrics(metrics, logic.copier)
+        try:
+            if args.metrics_json:
+                metrics.write_json(args.metrics_json)
+            if args.metrics_textfile:
+                metrics.write_prometheus(args.metrics_textfile, labels={"source": report_data["source_folder"]})
+        except OSError as e:
+            print(f"ERRO: Não foi possível gravar as métricas: {e}", file=sys.stderr)
+            return 1
+    return 1 if errors else 0
+
+
+def _executor(args: argparse.Namespace) -> Optional[ParallelMoveExecutor]:
+    return ParallelMoveExecutor(default_concurrency=args.workers) if args.workers > 0 else None
+
+
+def _journal(args: argparse.Namespace, source_folder: Path, options: Optional[Dict[str, Any]] = None,
+             plan_path: Optional[Path] = None) -> Optional[MoveJournal]:
+    if args.no_journal:
+        return None
+    journal = MoveJournal.create(get_journal_dir(), source_folder, options=options, plan_path=plan_path)
+    print(f"Diário: {journal.path}", file=sys.stderr)
+    return journal
+
+
+def _chosen_journal(args: argparse.Namespace) -> Optional[Path]:
+    if args.journal:
+        return args.journal
+    journals = find_journals(get_journal_dir(), args.folder)
+    return journals[0] if journals else None
+
+
+def _run_organize(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    from dedup import ContentHashCache, Deduplicator
+    from file_index import FileStateIndex
+
+    options = {"recursive": args.recursive, "max_depth": args.max_depth, "exclude": args.exclude, "dedup": args.dedup}
+    state_index = None if args.full else FileStateIndex(get_state_index_path())
+    hash_cache = ContentHashCache(get_content_hash_cache_path()) if args.dedup else None
+    dedup = Deduplicator(args.dedup, cache=hash_cache, hash_workers=args.hash_workers) if args.dedup else None
+    metrics = _metrics(args)
+    try:
+        generator = logic.organize_files(args.folder, Event(), executor=_executor(args), recursive=args.recursive,
+                                         max_depth=args.max_depth, exclude=args.exclude,
+                                         journal=_journal(args, args.folder, options), state_index=state_index,
+                                         metrics=metrics, dedup=dedup)
+        return _consume(logic, generator, args, metrics)
+    finally:
+        if state_index is not None:
+            state_index.close()
+        if hash_cache is not None:
+            hash_cache.close()
+
+
+def _run_dry_run(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    plan = _plan(logic, args)
+    for relative, folder, final_name in plan.moves:
+        print(f"{relative} -> {folder}/{final_name}")
+    print(f"{len(plan.moves)} de {plan.total_files_scanned} ficheiros seriam movidos; "
+          f"{len(plan.created_folders)} pastas novas.", file=sys.stderr)
+    if args.save_plan:
+        plan.save(args.save_plan)
+        print(f"Plano guardado em {args.save_plan}.", file=sys.stderr)
+    if args.html:
+        report_path = logic.generate_html_report(plan.to_report_data(), output_dir=args.html)
+        if report_path:
+            print(f"Pré-visualização: {report_path}", file=sys.stderr)
+    return 0
+
+
+def _run_apply_plan(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    try:
+        plan = MovePlan.load(args.plan)
+    except (OSError, ValueError) as e:
+        print(f"ERRO: Não foi possível ler o plano: {e}", file=sys.stderr)
+        return 2
+    journal = _journal(args, Path(plan.source_folder), plan_path=args.plan)
+    metrics = _metrics(args)
+    return _consume(logic, logic.execute_plan(plan, Event(), executor=_executor(args), journal=journal, metrics=metrics),
+                    args, metrics)
+
+
+def _run_resume(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    journal_path = _chosen_journal(args)
+    if journal_path is None:
+        print(f"ERRO: Não há nenhum diário para '{args.folder}'.", file=sys.stderr)
+        return 2
+    print(f"Diário: {journal_path}", file=sys.stderr)
+    metrics = _metrics(args)
+    return _consume(logic, logic.resume_journal(journal_path, Event(), executor=_executor(args), metrics=metrics),
+                    args, metrics)
+
+
+def _run_undo(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    journal_path = _chosen_journal(args)
+    if journal_path is None:
+        print(f"ERRO: Não há nenhum diário para '{args.folder}'.", file=sys.stderr)
+        return 2
+    print(f"Diário: {journal_path}", file=sys.stderr)
+    errors, result = _drain(logic.undo_journal(journal_path, Event(), executor=_executor(args)), args)
+    return 1 if errors or not result else 0
+
+
+def _run_watch(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    from watcher import FolderWatcher
+
+    timings = {"quiet_period": args.quiet_period, "open_quiet_period": args.open_quiet_period,
+               "poll_interval": args.poll_interval}
+    watcher = FolderWatcher(logic, args.folder, backend="polling" if args.polling else "auto", exclude=args.exclude,
+                            **{name: value for name, value in timings.items() if value is not None})
+    print("Ctrl+C para terminar.", file=sys.stderr)
+    generator = watcher.run(Event(), stats_interval=args.stats_interval or None)
+    try:
+        errors, _ = _drain(generator, args)
+    except KeyboardInterrupt:
+        generator.close()
+        errors = 0
+    print(watcher.stats.text(), file=sys.stderr)
+    return 1 if errors else 0
+
+
+def _run_batch(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    # multiprocessing e o ProcessPoolExecutor só fazem falta aqui.
+    from batch import DEFAULT_PER_DEVICE_LIMIT, BatchOptions, BatchOrganizer, expand_sources, read_source_list
+
+    patterns = list(args.sources)
+    if args.from_file:
+        try:
+            patterns += read_source_list(args.from_file)
+        except OSError as e:
+            print(f"ERRO: Não foi possível ler a lista de pastas: {e}", file=sys.stderr)
+            return 2
+    folders = expand_sources(patterns)
+    if not folders:
+        print("ERRO: Nenhuma pasta de origem encontrada.", file=sys.stderr)
+        return 2
+    options = BatchOptions(recursive=args.recursive, max_depth=args.max_depth, exclude=tuple(args.exclude),
+                           move_workers=args.workers, journal_dir=None if args.no_journal else get_journal_dir(),
+                           state_index_path=None if args.full else get_state_index_path(), dedup=args.dedup,
+                           hash_cache_path=get_content_hash_cache_path() if args.dedup else None,
+                           copy_backend=args.copy_backend, copy_threads=args.copy_threads,
+                           report=not args.no_report, forward_logs=not args.quiet)
+    organizer = BatchOrganizer(logic, processes=args.processes or None, options=options,
+                               per_device_limit=args.per_device if args.per_device is not None else DEFAULT_PER_DEVICE_LIMIT)
+    cancel_event = Event()
+
+    def interrupt(signum, frame) -> None:
+        # Os processos ignoram o Ctrl+C; o cancelamento chega-lhes pelo evento partilhado.
+        cancel_event.set()
+
+    previous_handler = signal.signal(signal.SIGINT, interrupt)
+    try:
+        _, summary = _drain(organizer.run(folders, cancel_event), args)
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+
+    totals = summary["totals"]
+    print(f"{totals['moved_count']} de {totals['total_files_scanned']} ficheiros movidos em {totals['folders']} pastas"
+          + (f"; {totals['failed_folders']} pastas com falha." if totals["failed_folders"] else "."))
+    if not args.no_report:
+        try:
+            print(f"Relatório do lote: {write_batch_report(summary, args.report_dir)}")
+        except OSError as e:
+            print(f"ERRO: Não foi possível escrever o relatório do lote: {e}", file=sys.stderr)
+    if args.summary_json:
+        try:
+            args.summary_json.write_text(json.dumps(summary, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        except OSError as e:
+            print(f"ERRO: Não foi possível gravar o resumo: {e}", file=sys.stderr)
+            return 1
+    return 1 if totals["errors"] or totals["failed_folders"] or summary["cancelled"] else 0
+
+
+def _run_suggest(logic: "FileSorterLogic", args: argparse.Namespace) -> int:
+    from ai_cache import SuggestionCache
+    from logic import GeminiRuleSuggester
+
+    try:
+        suggester = GeminiRuleSuggester(cache=SuggestionCache(get_cache_dir() / "suggestions"))
+    except ValueError as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        return 2
+    rules = suggester.suggest_rules(args.folder, args.request, use_cache=not args.no_cache)
+    if suggester.cache.hits:
+        print("(resposta obtida da cache)", file=sys.stderr)
+    if rules is None:
+        print("ERRO: A IA não conseguiu gerar regras. Verifique o ficheiro de log para detalhes.", file=sys.stderr)
+        return 1
+    print(json.dumps(rules, indent=2, ensure_ascii=False))
+    if args.apply and rules:
+        logic.set_rules(rules)
+        logic.save_rules()
+        print(f"Regras guardadas em {logic.config_path}.")
+    return 0
+
+
+def _run_clear_cache() -> int:
+    from ai_cache import SuggestionCache
+
+    cache = SuggestionCache(get_cache_dir() / "suggestions")
+    print(f"{cache.clear()} sugestões removidas de {cache.directory}.")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    setup_logging(logging.INFO if args.verbose else None)
+    if args.command == "clear-cache":
+        return _run_clear_cache()
+    from logic import FileSorterLogic
+
+    copier = None
+    if hasattr(args, "copy_backend"):
+        copier = FileCopier(args.copy_backend, chunk_workers=args.copy_threads)
+    logic = FileSorterLogic(config_path=args.config or get_config_path(), copier=copier)
+
+    if args.command == "apply-plan":
+        return _run_apply_plan(logic, args)
+    if args.command == "batch":
+        return _run_batch(logic, args)
+    if args.command != "suggest" and not args.folder.is_dir():
+        print(f"ERRO: Diretório '{args.folder}' não encontrado.", file=sys.stderr)
+        return 2
+
+    if args.command == "organize":
+        return _run_organize(logic, args)
+    if args.command == "resume":
+        return _run_resume(logic, args)
+    if args.command == "undo":
+        return _run_undo(logic, args)
+    if args.command == "dry-run":
+        return _run_dry_run(logic, args)
+    if args.command == "watch":
+        return _run_watch(logic, args)
+    if args.command == "report":
+        plan = _plan(logic, args)
+        counts = plan.folder_counts()
+        for folder, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            marker = " (nova)" if folder in plan.created_folders else ""
+            print(f"{count:>8}  {folder}{marker}")
+        print(f"{len(plan.moves):>8}  total")
+        return 0
+    return _run_suggest(logic, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# Ficheiro: collisions.py
+
+import os
+from pathlib import Path, PurePath
+from threading import Lock
+from typing import Dict, Set, Tuple
+
+
+class _DirectoryNames:
+    __slots__ = ("names", "next_counter")
+
+    def __init__(self, names: Set[str]):
+        self.names = names
+        # Próximo sufixo " (n)" a tentar para cada (stem, extensão).
+        self.next_counter: Dict[Tuple[str, str], int] = {}
+
+
+class DestinationNameIndex:
+    """Índice em memória dos nomes ocupados em cada pasta de destino.
+
+    Cada pasta é listada uma única vez com `os.scandir`; a partir daí os nomes
+    atribuídos são registados no índice, e o contador seguinte de cada stem é
+    guardado para que encontrar um nome livre não exija percorrer " (1)", " (2)", ...
+    O índice é partilhado entre threads, pelo que todas as operações usam um lock.
+    """
+
+    def __init__(self):
+        self._directories: Dict[Path, _DirectoryNames] = {}
+        self._lock = Lock()
+        self.listed_directories = 0
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return os.path.normcase(name)
+
+    def _entry(self, directory: Path) -> _DirectoryNames:
+        entry = self._directories.get(directory)
+        if entry is None:
+            names: Set[str] = set()
+            try:
+                with os.scandir(directory) as it:
+                    names = {self._key(e.name) for e in it}
+            except FileNotFoundError:
+                pass
+            self.listed_directories += 1
+            entry = _DirectoryNames(names)
+            self._directories[directory] = entry
+        return entry
+
+    def reserve(self, directory: Path, filename: str) -> Path:
+        """Devolve um caminho livre para `filename` em `directory` e marca-o como ocupado."""
+        return directory / self.reserve_name(directory, filename)
+
+    def reserve_name(self, directory: Path, filename: str) -> str:
+        """Como `reserve`, mas devolve só o nome escolhido."""
+        with self._lock:
+            entry = self._entry(directory)
+            key = self._key(filename)
+            if key not in entry.names:
+                entry.names.add(key)
+                return filename
+
+            name = PurePath(filename)
+            stem_key = (name.stem, name.suffix)
+            counter = entry.next_counter.get(stem_key, 1)
+            candidate = f"{name.stem} ({counter}){name.suffix}"
+            while self._key(candidate) in entry.names:
+                counter += 1
+                candidate = f"{name.stem} ({counter}){name.suffix}"
+            entry.next_counter[stem_key] = counter + 1
+            entry.names.add(self._key(candidate))
+            return candidate
+
+    def mark_taken(self, path: Path) -> None:
+        """Regista um nome criado fora do índice (por exemplo, por outro processo)."""
+        with self._lock:
+            self._entry(path.parent).names.add(self._key(path.name))
+
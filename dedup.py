@@ -0,0 +1,333 @@
+# Ficheiro: dedup.py
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import stat as stat_module
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# O que fazer a um ficheiro cujo conteúdo já existe na pasta de destino.
+DEDUP_POLICIES = ("delete", "hardlink", "quarantine")
+# Pasta (dentro da pasta organizada) para onde vão os duplicados com a política "quarantine".
+QUARANTINE_FOLDER = "_Duplicados"
+# Blocos do início e do fim lidos para o hash parcial; ficheiros até ao dobro disto são lidos por inteiro.
+PARTIAL_BLOCK_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 16 * 1024 * 1024
+DEFAULT_HASH_WORKERS = 4
+# Espera máxima (segundos) por uma base bloqueada: os processos do lote partilham a cache.
+SQLITE_BUSY_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dir TEXT NOT NULL, dev INTEGER NOT NULL, ino INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+    partial TEXT, full TEXT, PRIMARY KEY (dir, dev, ino)
+);
+"""
+
+# (dev, inode, tamanho, mtime_ns): identifica uma versão de um ficheiro sem o ler.
+FileKey = Tuple[int, int, int, int]
+
+
+def _key_of(st: os.stat_result) -> FileKey:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def partial_digest(path: Union[str, Path], size: int) -> str:
+    """Hash do tamanho e dos primeiros e últimos PARTIAL_BLOCK_SIZE bytes do ficheiro."""
+    digest = hashlib.sha256(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        digest.update(f.read(PARTIAL_BLOCK_SIZE))
+        if size > PARTIAL_BLOCK_SIZE:
+            f.seek(max(PARTIAL_BLOCK_SIZE, size - PARTIAL_BLOCK_SIZE))
+            digest.update(f.read(PARTIAL_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def full_digest(path: Union[str, Path]) -> str:
+    """Hash de todo o conteúdo, lido através de um mmap (sem cópias para a memória do Python)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, OverflowError):
+            # Ficheiros vazios, sistemas de ficheiros sem mmap ou espaço de endereços curto.
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+        with mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as view:
+                for offset in range(0, len(view), HASH_CHUNK_SIZE):
+                    digest.update(view[offset:offset + HASH_CHUNK_SIZE])
+    return digest.hexdigest()
+
+
+class ContentHashCache:
+    """Cache persistente (SQLite) dos hashes dos ficheiros de cada pasta de destino.
+
+    Cada linha é válida enquanto o ficheiro mantiver (dev, inode, tamanho, mtime), por isso
+    uma nova execução não volta a ler o conteúdo do que já estava arrumado. Um ficheiro
+    movido por renomeação mantém o inode e o mtime, e o hash calculado na origem continua
+    válido no destino.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def load(self, directory: str) -> Dict[FileKey, Tuple[Optional[str], Optional[str]]]:
+        rows = self._db.execute("SELECT dev, ino, size, mtime_ns, partial, full FROM hashes WHERE dir = ?", (directory,))
+        return {tuple(row[:4]): (row[4], row[5]) for row in rows}
+
+    def replace(self, directory: str, rows: Iterable[Tuple[FileKey, Optional[str], Optional[str]]]) -> None:
+        """Substitui os hashes conhecidos de `directory` (as linhas de ficheiros que já lá não estão desaparecem)."""
+        with self._db:
+            self._db.execute("DELETE FROM hashes WHERE dir = ?", (directory,))
+            self._db.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 [(directory, *key, partial, full) for key, partial, full in rows if partial or full])
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class _Content:
+    __slots__ = ("path", "key", "partial", "full", "incoming")
+
+    def __init__(self, path: Path, key: FileKey, incoming: bool):
+        self.path = path
+        self.key = key
+        self.partial: Optional[str] = None
+        self.full: Optional[str] = None
+        # True para ficheiros deste lote que ainda vão ser movidos para a pasta.
+        self.incoming = incoming
+
+    @property
+    def size(self) -> int:
+        return self.key[2]
+
+
+class _FolderContents:
+    __slots__ = ("by_size", "incoming", "dirty")
+
+    def __init__(self):
+        self.by_size: Dict[int, List[_Content]] = {}
+        # Ficheiros registados por `find_duplicates` que ainda não chegaram à pasta, por origem.
+        self.incoming: Dict[Path, _Content] = {}
+        self.dirty = False
+
+
+@dataclass
+class Duplicate:
+    """Um ficheiro (`source`) com o mesmo conteúdo que `original`, já no destino ou planeado antes dele."""
+    source: Path
+    original: Path
+    size: int
+    source_key: FileKey
+    original_key: FileKey
+
+
+class Deduplicator:
+    """Deteta, no momento de mover, ficheiros cujo conteúdo já existe na pasta de destino.
+
+    A comparação é feita por etapas, e cada uma só é feita para o que sobrou da anterior:
+    primeiro o tamanho (sem ler nada), depois um hash parcial do início e do fim do ficheiro
+    e, só quando este coincide, o hash completo. Os hashes são calculados num conjunto
+    limitado de threads e guardados por pasta de destino em `cache`, se existir.
+
+    Cada pasta de destino é listada uma vez; os ficheiros que não são duplicados passam a
+    contar como conteúdo da pasta, pelo que três cópias do mesmo download na origem dão um
+    ficheiro movido e dois duplicados.
+    """
+
+    def __init__(self, policy: str, cache: Optional[ContentHashCache] = None, hash_workers: int = DEFAULT_HASH_WORKERS):
+        if policy not in DEDUP_POLICIES:
+            raise ValueError(f"Política de duplicados desconhecida: '{policy}'.")
+        self.policy = policy
+        self.cache = cache
+        self.hash_workers = max(1, hash_workers)
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+        self._folders: Dict[Path, _FolderContents] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _folder(self, directory: Path) -> _FolderContents:
+        folder = self._folders.get(directory)
+        if folder is not None:
+            return folder
+        folder = self._folders[directory] = _FolderContents()
+        cached = self.cache.load(str(directory)) if self.cache is not None else {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if not st.st_size:
+                        continue
+                    # O inode vem do DirEntry: no Windows o stat de um DirEntry não o preenche.
+                    key = (st.st_dev, entry.inode(), st.st_size, st.st_mtime_ns)
+                    content = _Content(Path(entry.path), key, incoming=False)
+                    content.partial, content.full = cached.get(key, (None, None))
+                    folder.by_size.setdefault(st.st_size, []).append(content)
+        except FileNotFoundError:
+            pass
+        # Linhas de ficheiros que desapareceram ou mudaram deixam de estar na listagem.
+        folder.dirty = len(cached) != sum(c.partial is not None or c.full is not None
+                                          for group in folder.by_size.values() for c in group)
+        return folder
+
+    def _map(self, function, items: Sequence[_Content]) -> List:
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix="dedup-hash")
+        return list(self._pool.map(function, items))
+
+    def _hash_all(self, contents: Sequence[_Content], full: bool) -> None:
+        def compute(content: _Content) -> Optional[str]:
+            try:
+                return full_digest(content.path) if full else partial_digest(content.path, content.size)
+            except OSError:
+                return None
+
+        for content, digest in zip(contents, self._map(compute, contents)):
+            if digest is None:
+                continue
+            self.files_hashed += 1
+            self.bytes_hashed += content.size if full else min(content.size, 2 * PARTIAL_BLOCK_SIZE)
+            if full:
+                content.full = digest
+            else:
+                content.partial = digest
+                if content.size <= 2 * PARTIAL_BLOCK_SIZE:
+                    # O hash parcial já cobriu o ficheiro inteiro.
+                    content.full = digest
+
+    def find_duplicates(self, files: Sequence[Tuple[Path, os.stat_result, Path]]) -> List[Optional[Duplicate]]:
+        """Para cada (ficheiro, stat, pasta de destino) do lote, o duplicado encontrado ou None.
+
+        Os ficheiros que não são duplicados ficam registados como conteúdo da sua pasta de
+        destino; quem chama deve movê-los para lá (ou chamar `forget` se o movimento falhar).
+        """
+        incoming: List[Optional[Tuple[_FolderContents, _Content]]] = []
+        groups: Dict[int, Tuple[_FolderContents, List[_Content]]] = {}
+        for source, st, directory in files:
+            if not stat_module.S_ISREG(st.st_mode) or not st.st_size:
+                incoming.append(None)
+                continue
+            folder = self._folder(directory)
+            content = _Content(source, _key_of(st), incoming=True)
+            group = folder.by_size.setdefault(st.st_size, [])
+            group.append(content)
+            groups[id(group)] = (folder, group)
+            incoming.append((folder, content))
+
+        # Etapa 2: hash parcial, só nos grupos do mesmo tamanho com mais de um ficheiro.
+        suspects = []
+        for folder, group in groups.values():
+            if len(group) > 1:
+                suspects.append(group)
+                folder.dirty = True
+        self._hash_all([c for group in suspects for c in group if c.partial is None], full=False)
+        # Etapa 3: hash completo, só onde o hash parcial coincide.
+        to_hash: List[_Content] = []
+        for group in suspects:
+            partials: Dict[str, int] = {}
+            for content in group:
+                if content.partial is not None:
+                    partials[content.partial] = partials.get(content.partial, 0) + 1
+            to_hash.extend(c for c in group if c.full is None and c.partial is not None and partials[c.partial] > 1)
+        self._hash_all(to_hash, full=True)
+
+        results: List[Optional[Duplicate]] = []
+        for item in incoming:
+            if item is None:
+                results.append(None)
+                continue
+            folder, content = item
+            group = folder.by_size[content.size]
+            original = None
+            for other in group:
+                if other is content:
+                    break
+                same_file = other.key[:2] == content.key[:2]
+                if same_file or (content.full is not None and other.full == content.full):
+                    original = other
+                    break
+            if original is None:
+                folder.incoming[content.path] = content
+                folder.dirty = True
+                results.append(None)
+            else:
+                group.remove(content)
+                results.append(Duplicate(content.path, original.path, content.size, content.key, original.key))
+        return results
+
+    def forget(self, source: Path, directory: Path) -> None:
+        """Retira de `directory` um ficheiro registado por `find_duplicates` que afinal não foi para lá."""
+        folder = self._folders.get(directory)
+        content = folder.incoming.pop(source, None) if folder is not None else None
+        if content is not None:
+            folder.by_size[content.size].remove(content)
+
+    def moved(self, source: Path, destination: Path, copied: bool = False) -> None:
+        """Atualiza o caminho de um ficheiro registado depois de movido (o nome final pode ter mudado)."""
+        folder = self._folders.get(destination.parent)
+        content = folder.incoming.pop(source, None) if folder is not None else None
+        if content is None:
+            return
+        content.path, content.incoming = destination, False
+        if copied:
+            # Uma cópia entre dispositivos tem outro inode; o hash continua válido para o conteúdo.
+            try:
+                content.key = _key_of(os.lstat(destination))
+            except OSError:
+                folder.by_size[content.size].remove(content)
+
+    @staticmethod
+    def unchanged(duplicate: Duplicate) -> bool:
+        """True se nem o duplicado nem o original mudaram desde que foram comparados."""
+        try:
+            return (_key_of(os.lstat(duplicate.source)) == duplicate.source_key
+                    # Sem o dev: no Windows o stat de um DirEntry também não o preenche.
+                    and _key_of(os.lstat(duplicate.original))[1:] == duplicate.original_key[1:])
+        except OSError:
+            return False
+
+    @staticmethod
+    def link_to_original(duplicate: Duplicate) -> None:
+        """Substitui o duplicado por uma ligação física ao original, sem nunca ficar sem nenhum dos dois."""
+        temporary = duplicate.source.with_name(f".{duplicate.source.name}.{os.getpid()}.dedup")
+        os.link(duplicate.original, temporary)
+        try:
+            os.replace(temporary, duplicate.source)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def finish(self) -> None:
+        """Grava na cache os hashes das pastas alteradas e termina as threads de hash."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self.cache is not None:
+            for directory, folder in self._folders.items():
+                if folder.dirty:
+                    self.cache.replace(str(directory), ((c.key, c.partial, c.full) for group in folder.by_size.values()
+                                                        for c in group if not c.incoming))
+        self._folders = {}
+
+    def stats_text(self) -> str:
+        return f"Duplicados: {self.files_hashed} hashes calculados, {self.bytes_hashed / 1e6:.1f} MB lidos"
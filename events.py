@@ -0,0 +1,169 @@
+# Ficheiro: events.py
+
+import itertools
+import queue
+import time
+from collections import deque
+from threading import Event, Lock
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+# Eventos que podem ser agregados; todos os outros ("error", "done", ...) passam de imediato.
+COALESCED_TYPES = ("log", "progress", "total_files")
+
+
+class EventChannel:
+    """Canal entre a thread de trabalho e a interface, com agregação, limite de ritmo e contrapressão.
+
+    Os eventos "log", "progress" e "total_files" são agrupados num único evento
+    ("batch", {...}) enviado no máximo a cada `flush_interval` segundos, o que limita o
+    ritmo de lotes para a interface a 1 / `flush_interval` por segundo (mais os eventos
+    que não são agregados). Cada lote guarda no máximo
+    `max_logs_per_batch` linhas; as restantes são apenas contadas em "dropped_logs".
+    A fila tem tamanho limitado: se a interface se atrasar, a thread de trabalho espera.
+
+    Um lote só é enviado quando chega um novo evento; se a thread de trabalho ficar parada
+    (num movimento demorado, por exemplo), é `drain` que, com a fila vazia, recolhe o lote
+    pendente assim que passar `flush_interval`, para as últimas linhas não ficarem retidas.
+    """
+
+    def __init__(self, maxsize: int = 32, flush_interval: float = 0.1, max_logs_per_batch: int = 200):
+        self.queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize)
+        self.flush_interval = flush_interval
+        self.max_logs_per_batch = max_logs_per_batch
+        self.events_received = 0
+        self.messages_sent = 0
+        self._pending: Dict[str, Any] = {}
+        self._last_flush = time.monotonic()
+        # Protege o lote pendente, que a interface também pode recolher em `drain`.
+        self._lock = Lock()
+
+    @property
+    def max_batches_per_second(self) -> float:
+        return 1.0 / self.flush_interval if self.flush_interval > 0 else float("inf")
+
+    def put(self, event: Tuple[str, Any], cancel_event: Optional[Event] = None) -> bool:
+        """Envia um evento, esperando enquanto a fila estiver cheia; devolve False se foi cancelado."""
+        while True:
+            try:
+                self.queue.put(event, timeout=0.1)
+                self.messages_sent += 1
+                return True
+            except queue.Full:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+
+    def _new_batch(self) -> Dict[str, Any]:
+        return {"logs": deque(maxlen=self.max_logs_per_batch), "dropped_logs": 0, "progress": None, "total_files": None}
+
+    def send(self, msg_type: str, msg_data: Any, cancel_event: Optional[Event] = None) -> None:
+        """Recebe um evento do gerador, agregando-o ou enviando-o conforme o tipo."""
+        self.events_received += 1
+        if msg_type not in COALESCED_TYPES:
+            self.flush(cancel_event)
+            self.put((msg_type, msg_data), cancel_event)
+            return
+
+        with self._lock:
+            batch = self._pending or self._new_batch()
+            self._pending = batch
+            if msg_type == "log":
+                # Ficam as linhas mais recentes, que são as que a interface mostra.
+                if len(batch["logs"]) == self.max_logs_per_batch:
+                    batch["dropped_logs"] += 1
+                batch["logs"].append(msg_data)
+            else:
+                batch[msg_type] = msg_data
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush(cancel_event)
+
+    def _take_pending(self) -> Optional[Dict[str, Any]]:
+        """Retira o lote pendente (com o lock já adquirido)."""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return None
+        batch, self._pending = self._pending, {}
+        batch["logs"] = list(batch["logs"])
+        return batch
+
+    def flush(self, cancel_event: Optional[Event] = None) -> None:
+        # O lote é posto na fila ainda com o lock: assim `drain` nunca entrega um lote
+        # mais recente antes deste.
+        with self._lock:
+            batch = self._take_pending()
+            if batch is not None:
+                self.put(("batch", batch), cancel_event)
+
+    def pump(self, generator: Generator[Tuple[str, Any], None, Any], cancel_event: Optional[Event] = None) -> Any:
+        """Consome um gerador de eventos até ao fim e devolve o valor que ele retornar."""
+        try:
+            while True:
+                msg_type, msg_data = next(generator)
+                self.send(msg_type, msg_data, cancel_event)
+        except StopIteration as e:
+            return e.value
+        finally:
+            self.flush(cancel_event)
+
+    def drain(self, max_items: int) -> List[Tuple[str, Any]]:
+        """Retira até `max_items` mensagens sem bloquear (para o ciclo da interface).
+
+        Se a fila esvaziar e o lote pendente já tiver esperado `flush_interval`, é recolhido
+        também. O lock é tentado sem esperar: se estiver com a thread de trabalho, ela está a
+        enviar o lote pela fila (talvez à espera de espaço, que só este ciclo liberta).
+        """
+        items = []
+        for _ in range(max_items):
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        else:
+            return items
+
+        if time.monotonic() - self._last_flush >= self.flush_interval and self._lock.acquire(blocking=False):
+            try:
+                # Com o lock, nenhum lote anterior pode estar a caminho da fila.
+                if self.queue.empty():
+                    batch = self._take_pending()
+                    if batch is not None:
+                        self.messages_sent += 1
+                        items.append(("batch", batch))
+            finally:
+                self._lock.release()
+        return items
+
+    def empty(self) -> bool:
+        return self.queue.empty()
+
+
+class LogBuffer:
+    """Buffer circular das linhas do log, lido por janelas para uma vista virtualizada.
+
+    Guarda as últimas `maxlen` linhas; as mais antigas são descartadas e contadas em `dropped`.
+    A vista só desenha as linhas visíveis, por isso o custo de cada atualização não cresce
+    com o tamanho do log.
+    """
+
+    def __init__(self, maxlen: int = 100_000):
+        self.lines: "deque[str]" = deque(maxlen=maxlen)
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def extend(self, lines: List[str]) -> int:
+        """Acrescenta linhas e devolve quantas das mais antigas foram descartadas."""
+        overflow = max(0, len(self.lines) + len(lines) - self.lines.maxlen)
+        self.dropped += overflow
+        self.lines.extend(lines)
+        return overflow
+
+    def clear(self) -> None:
+        self.lines.clear()
+        self.dropped = 0
+
+    def window(self, first: int, count: int) -> Tuple[int, List[str]]:
+        """Devolve até `count` linhas a partir de `first`, ajustado para a janela ficar cheia."""
+        first = max(0, min(first, len(self.lines) - count))
+        return first, list(itertools.islice(self.lines, first, first + count))
@@ -0,0 +1,179 @@
+# Ficheiro: file_index.py
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from matcher import RuleMatcher, changed_keywords, resolve_rules
+
+# Só se confia no estado de uma pasta cuja última alteração é anterior ao início da
+# execução por pelo menos esta margem (o mesmo cuidado do "racy clean" do git).
+RACY_MARGIN_NS = 2_000_000_000
+# Os processos do lote partilham o índice: quem encontra a base bloqueada espera até este limite (segundos).
+SQLITE_BUSY_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rule_sets (version TEXT PRIMARY KEY, rules TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    dev INTEGER NOT NULL, ino INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+    root TEXT NOT NULL, dir TEXT NOT NULL, name TEXT NOT NULL, version TEXT NOT NULL,
+    PRIMARY KEY (dev, ino)
+);
+CREATE INDEX IF NOT EXISTS files_by_dir ON files (dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY, dev INTEGER NOT NULL, ino INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+    version TEXT NOT NULL, scan_key TEXT NOT NULL, file_count INTEGER NOT NULL, subdirs TEXT NOT NULL
+);
+"""
+
+# (dev, tamanho, mtime_ns, nome, versão das regras) de um ficheiro já arrumado, indexado pelo inode.
+FileRecord = Tuple[int, int, int, str, str]
+
+
+def rules_version(rules: Iterable[Dict[str, Any]], today: Optional[date] = None) -> str:
+    """Identificador de um conjunto de regras: muda sempre que muda o resultado possível da classificação.
+
+    As condições entram com as datas relativas resolvidas para `today`, por isso regras com
+    "older_than_days" mudam de versão a cada dia; as regras sem condições mantêm a versão.
+    """
+    canonical = []
+    for rule in resolve_rules(rules, today):
+        item = {"folder": rule["folder"], "keywords": rule.get("keywords", [])}
+        if "conditions" in rule:
+            item["conditions"] = rule["conditions"]
+        canonical.append(item)
+    return hashlib.sha1(json.dumps(canonical, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class FileStateIndex:
+    """Índice persistente (SQLite) dos ficheiros e pastas que já estavam arrumados.
+
+    Um ficheiro é identificado por (dev, inode, tamanho, mtime) e guarda a versão das regras
+    com que foi classificado. Uma pasta "assente" (todos os ficheiros no sítio certo e sem
+    alterações desde então) nem volta a ser listada: basta um stat() para confirmar que o
+    mtime não mudou, e as suas subpastas vêm do índice.
+
+    Quando as regras mudam, só são reavaliados os nomes que contêm uma palavra-chave cuja
+    regra mudou (ver `matcher.changed_keywords`); os restantes mantêm a classificação.
+    Com regras com condições, o registo de um ficheiro continua válido enquanto o seu
+    stat não mudar, mas a lógica só deixa assentar as pastas cujos ficheiros são
+    classificados apenas pelo nome (ver `RuleMatcher.decided_by_name`).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=SQLITE_BUSY_TIMEOUT)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.version = ""
+        self.root = ""
+        self.scan_key = ""
+        self._rules: List[Dict[str, Any]] = []
+        # versão antiga -> matcher das palavras-chave alteradas desde então (None se desconhecida).
+        self._affected: Dict[str, Optional[RuleMatcher]] = {}
+
+    def begin_run(self, root: Path, rules: List[Dict[str, Any]], scan_options: Dict[str, Any],
+                  today: Optional[date] = None) -> None:
+        """Regista as regras desta execução e revalida as pastas assentes com outra versão.
+
+        "Arrumado" depende da pasta de origem (o destino é sempre relativo a ela) e das
+        opções da varredura, por isso ambas fazem parte da chave de cada pasta assente.
+        As regras são guardadas com as datas relativas resolvidas para `today` (o dia usado
+        na classificação), para que a comparação com versões antigas as tenha em conta.
+        """
+        rules = resolve_rules(rules, today)
+        self._rules = rules
+        self.version = rules_version(rules)
+        self.root = str(root)
+        self.scan_key = json.dumps({"root": self.root, **scan_options}, sort_keys=True)
+        self._affected = {self.version: None}
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO rule_sets VALUES (?, ?)", (self.version, json.dumps(rules, ensure_ascii=False)))
+            stale = self._db.execute("SELECT path, version FROM dirs WHERE version != ?", (self.version,)).fetchall()
+            for path, version in stale:
+                names = (name for (name,) in self._db.execute("SELECT name FROM files WHERE dir = ?", (path,)))
+                if any(not self.outcome_unchanged(version, name) for name in names):
+                    self._db.execute("DELETE FROM dirs WHERE path = ?", (path,))
+                else:
+                    self._db.execute("UPDATE dirs SET version = ? WHERE path = ?", (self.version, path))
+
+    def outcome_unchanged(self, version: str, filename: str) -> bool:
+        """True se `filename`, classificado com a versão `version`, teria o mesmo destino agora."""
+        if version == self.version:
+            return True
+        if version not in self._affected:
+            row = self._db.execute("SELECT rules FROM rule_sets WHERE version = ?", (version,)).fetchone()
+            if row is None:
+                self._affected[version] = None
+            else:
+                keywords = changed_keywords(json.loads(row[0]), self._rules)
+                self._affected[version] = RuleMatcher([{"folder": "", "keywords": sorted(keywords)}])
+        affected = self._affected[version]
+        return affected is not None and affected.match(filename) is None
+
+    def settled_listing(self, directory: Path) -> Optional[Tuple[List[str], int]]:
+        """Se a pasta está assente e não mudou, devolve (subpastas, nº de ficheiros) sem a listar."""
+        row = self._db.execute("SELECT dev, ino, mtime_ns, version, scan_key, file_count, subdirs FROM dirs WHERE path = ?",
+                               (str(directory),)).fetchone()
+        if row is None or row[3] != self.version or row[4] != self.scan_key:
+            return None
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return None
+        if (stat.st_dev, stat.st_ino, stat.st_mtime_ns) != (row[0], row[1], row[2]):
+            return None
+        return json.loads(row[6]), row[5]
+
+    def records_in(self, directory: str) -> Dict[int, FileRecord]:
+        rows = self._db.execute("SELECT ino, dev, size, mtime_ns, name, version FROM files WHERE dir = ? AND root = ?",
+                                (directory, self.root))
+        return {row[0]: row[1:] for row in rows}
+
+    def is_unchanged(self, record: Optional[FileRecord], name: str, stat: os.stat_result) -> bool:
+        """True se o ficheiro é o mesmo do registo e continuaria no mesmo destino com as regras atuais."""
+        return (record is not None and record[3] == name
+                and (record[0], record[1], record[2]) == (stat.st_dev, stat.st_size, stat.st_mtime_ns)
+                and self.outcome_unchanged(record[4], name))
+
+    def replace_directory(self, directory: str, stats: Sequence[Tuple[str, int, os.stat_result]]) -> None:
+        """Substitui os ficheiros arrumados conhecidos de uma pasta pelos (nome, inode, stat) desta listagem.
+
+        O inode vem de `DirEntry.inode()`, porque no Windows o stat de um `DirEntry` não o preenche.
+        """
+        with self._db:
+            self._db.execute("DELETE FROM files WHERE dir = ?", (directory,))
+            self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 [(st.st_dev, ino, st.st_size, st.st_mtime_ns, self.root, directory, name, self.version)
+                                  for name, ino, st in stats])
+
+    def settle_directory(self, directory: str, stat: os.stat_result, subdirs: List[str], file_count: int,
+                         run_started_ns: int) -> bool:
+        """Marca a pasta como assente se não mudou desde a listagem; devolve True se ficou marcada."""
+        try:
+            current = os.stat(directory)
+        except OSError:
+            return False
+        if ((current.st_dev, current.st_ino, current.st_mtime_ns) != (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+                or stat.st_mtime_ns > run_started_ns - RACY_MARGIN_NS):
+            self.forget_directory(directory)
+            return False
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (directory, stat.st_dev, stat.st_ino, stat.st_mtime_ns, self.version, self.scan_key,
+                              file_count, json.dumps(subdirs, ensure_ascii=False)))
+        return True
+
+    def forget_directory(self, directory: str) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM dirs WHERE path = ?", (directory,))
+
+    def close(self) -> None:
+        self._db.close()
+
@@ -0,0 +1,198 @@
+# Ficheiro: journal.py
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+JOURNAL_FORMAT = "filesorter-journal"
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".jsonl"
+
+# Registos, um array JSON por linha depois do cabeçalho:
+#   ["I", id, origem, destino]   intenção, escrita e sincronizada antes do movimento
+#   ["D", id, destino_final]      movimento concluído (o nome final pode mudar numa colisão)
+#   ["F", pasta]                  pasta de destino criada nesta execução
+#   ["U", id]                     movimento desfeito
+#   ["E", estado]                 fim da execução: "completed", "cancelled" ou "undone"
+# Os caminhos são relativos à pasta de origem, com '/' como separador.
+
+# Um só codificador para todos os registos; json.dumps com opções cria um novo a cada chamada.
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _relative(source_path: Path, prefix: str, path: Path) -> str:
+    # Corte de texto em vez de Path.relative_to, que pesa quando é chamado três vezes por ficheiro.
+    text = str(path)
+    if not text.startswith(prefix):
+        return path.relative_to(source_path).as_posix()
+    relative = text[len(prefix):]
+    return relative.replace(os.sep, "/") if os.sep != "/" else relative
+
+
+def _folder_hash(source_folder: Union[str, Path]) -> str:
+    return hashlib.sha1(str(Path(source_folder).resolve()).encode("utf-8", "surrogateescape")).hexdigest()[:10]
+
+
+def journal_name(source_folder: Union[str, Path], timestamp: datetime) -> str:
+    return f"{timestamp.strftime('%Y-%m-%d_%H%M%S_%f')}_{_folder_hash(source_folder)}{JOURNAL_SUFFIX}"
+
+
+class MoveJournal:
+    """Diário de movimentos só de acréscimo, gravado antes de mover (write-ahead).
+
+    As intenções de um lote são escritas e sincronizadas com um único fsync antes de os
+    ficheiros serem movidos; as conclusões ficam no buffer e vão para o disco no commit do
+    lote seguinte (ou no fecho). Depois de uma falha só os movimentos do último lote ficam
+    em dúvida, e o custo é de um fsync por lote em vez de um por ficheiro.
+    """
+
+    def __init__(self, path: Path, next_id: int = 0):
+        self.path = Path(path)
+        self.next_id = next_id
+        self.commits = 0
+        self._prefixes: Dict[Path, str] = {}
+        self._file = self.path.open('a', encoding='utf-8', buffering=1024 * 1024)
+
+    @classmethod
+    def create(cls, directory: Path, source_folder: Union[str, Path], options: Optional[Dict[str, Any]] = None,
+               plan_path: Optional[Union[str, Path]] = None) -> "MoveJournal":
+        """Cria o diário de uma nova execução, com as opções necessárias para a retomar."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now()
+        path = directory / journal_name(source_folder, timestamp)
+        journal = cls(path)
+        header = {"format": JOURNAL_FORMAT, "version": JOURNAL_VERSION, "source_folder": str(Path(source_folder).resolve()),
+                  "created": timestamp.isoformat(timespec="seconds"), "options": options or {},
+                  "plan": str(Path(plan_path).resolve()) if plan_path is not None else None}
+        journal._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        journal.commit()
+        return journal
+
+    @classmethod
+    def reopen(cls, state: "JournalState") -> "MoveJournal":
+        """Continua a escrever no diário de uma execução interrompida."""
+        return cls(state.path, next_id=state.max_id + 1)
+
+    def _relative(self, source_path: Path, path: Path) -> str:
+        prefix = self._prefixes.get(source_path)
+        if prefix is None:
+            prefix = self._prefixes[source_path] = os.path.join(str(source_path), "")
+        return _relative(source_path, prefix, path)
+
+    def _write(self, record: List[Any]) -> None:
+        self._file.write(_ENCODER.encode(record) + "\n")
+
+    def log_intents(self, source_path: Path, moves: Iterable[Tuple[Path, Path]],
+                    ids: Optional[Iterable[int]] = None) -> List[int]:
+        """Regista as intenções de um lote e devolve os identificadores atribuídos.
+
+        Deve ser seguido de `commit()` antes de mover os ficheiros.
+        """
+        ids = iter(ids) if ids is not None else None
+        assigned = []
+        for source, destination in moves:
+            move_id = next(ids) if ids is not None else self.next_id
+            self.next_id = max(self.next_id, move_id + 1)
+            self._write(["I", move_id, self._relative(source_path, source), self._relative(source_path, destination)])
+            assigned.append(move_id)
+        return assigned
+
+    def log_done(self, source_path: Path, move_id: int, final_destination: Path) -> None:
+        self._write(["D", move_id, self._relative(source_path, final_destination)])
+
+    def log_folder(self, folder_name: str) -> None:
+        self._write(["F", folder_name])
+
+    def log_undone(self, move_id: int) -> None:
+        self._write(["U", move_id])
+
+    def commit(self) -> None:
+        """Garante que tudo o que foi escrito até aqui está no disco (um único fsync)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.commits += 1
+
+    def finish(self, status: str) -> None:
+        self._write(["E", status])
+        self.close()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.commit()
+            self._file.close()
+
+
+@dataclass
+class JournalState:
+    """Resultado de reler um diário: o que foi concluído, o que ficou em dúvida e como retomar."""
+    path: Path
+    source_folder: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    plan: Optional[str] = None
+    created: str = ""
+    # (id, origem, destino final) dos movimentos concluídos e não desfeitos, pela ordem do diário.
+    completed: List[Tuple[int, str, str]] = field(default_factory=list)
+    completed_count: int = 0
+    # Intenções sem conclusão registada: {id: (origem, destino planeado)}.
+    in_doubt: Dict[int, Tuple[str, str]] = field(default_factory=dict)
+    created_folders: List[str] = field(default_factory=list)
+    undone: Set[int] = field(default_factory=set)
+    max_id: int = -1
+    status: Optional[str] = None
+
+
+def read_journal(path: Union[str, Path], keep_completed: bool = True) -> JournalState:
+    """Relê um diário. Uma última linha incompleta (escrita interrompida) é ignorada.
+
+    Com `keep_completed=False` só se contam os movimentos concluídos, o que basta para
+    retomar e mantém a memória limitada às intenções em dúvida.
+    """
+    path = Path(path)
+    with path.open('r', encoding='utf-8') as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != JOURNAL_FORMAT or header.get("version") != JOURNAL_VERSION:
+            raise ValueError(f"'{path}' não é um diário do FileSorter suportado.")
+        state = JournalState(path=path, source_folder=header["source_folder"], options=header.get("options") or {},
+                             plan=header.get("plan"), created=header.get("created", ""))
+        pending: Dict[int, Tuple[str, str]] = {}
+        completed: Dict[int, Tuple[str, str]] = {}
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            kind = record[0]
+            if kind == "I":
+                pending[record[1]] = (record[2], record[3])
+                state.max_id = max(state.max_id, record[1])
+            elif kind == "D":
+                origin = pending.pop(record[1], ("", ""))[0]
+                state.completed_count += 1
+                if keep_completed:
+                    completed[record[1]] = (origin, record[2])
+            elif kind == "F":
+                state.created_folders.append(record[1])
+            elif kind == "U":
+                state.undone.add(record[1])
+            elif kind == "E":
+                state.status = record[1]
+    state.in_doubt = pending
+    state.completed = [(move_id, origin, final) for move_id, (origin, final) in completed.items()
+                       if move_id not in state.undone]
+    return state
+
+
+def find_journals(directory: Path, source_folder: Optional[Union[str, Path]] = None) -> List[Path]:
+    """Diários guardados em `directory`, do mais recente para o mais antigo, opcionalmente só de uma pasta."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    pattern = f"*{JOURNAL_SUFFIX}"
+    if source_folder is not None:
+        pattern = f"*_{_folder_hash(source_folder)}{JOURNAL_SUFFIX}"
+    return sorted(directory.glob(pattern), reverse=True)
@@ -3,73 +3,146 @@
 import json
 import logging
 import os
-import shutil
 import time
-from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Union, Generator, Tuple, Optional, Any
+from typing import Dict, Iterable, List, Union, Generator, Tuple, Optional, Any, Sequence, Set
 from threading import Event
 
-import google.generativeai as genai
-from dotenv import load_dotenv
+from ai_cache import SuggestionCache, make_cache_key
+from attributes import FILE_TYPES, FileAttributes, PathEntry
+from matcher import RuleConditions, RuleMatcher
+from collisions import DestinationNameIndex
+from dedup import QUARANTINE_FOLDER, Deduplicator
+from file_index import FileStateIndex
+from journal import MoveJournal, JournalState, read_journal
+from metrics import RunMetrics
+from mover import FileCopier, MoveResult, ParallelMoveExecutor, move_file, run_move, same_file
+from planner import MovePlan
+from report import REPORT_DIR_PATTERNS, MoveLog, write_html_report
+from sampling import FilenameSummary
+from scanner import DirectoryScanner
+
+# Número de entradas lidas da pasta antes de começar a movê-las.
+SCAN_BATCH_SIZE = 1000
+# Tamanho máximo do resumo de nomes enviado à IA, igual ao corte anterior da lista de nomes.
+PROMPT_SUMMARY_CHARS = 4000
 
 class GeminiRuleSuggester:
-    """Gera regras de organização contextuais, agora com melhor manuseamento de pedidos vagos."""
+    """Gera regras de organização contextuais, agora com melhor manuseamento de pedidos vagos.
+
+    `model` permite injetar qualquer objeto com `generate_content` (por exemplo, um modelo falso
+    em testes), e `cache` evita repetir pedidos iguais sobre a mesma amostra de ficheiros.
+    """
+
+    DEFAULT_MODEL_NAME = 'gemini-1.5-flash'
+
+    def __init__(self, model: Optional[Any] = None, cache: Optional[SuggestionCache] = None,
+                 model_name: str = DEFAULT_MODEL_NAME, sample_limit: Optional[int] = 200_000):
+        self.model_name = model_name
+        self.cache = cache
+        # Número máximo de nomes lidos da pasta para o resumo (None = todos).
+        self.sample_limit = sample_limit
+        if model is not None:
+            self.model = model
+            return
+
+        # Importados só aqui: quem usa apenas as regras não paga o custo de carregar o cliente da IA.
+        try:
+            import google.generativeai as genai
+            from dotenv import load_dotenv
+        except ImportError as e:
+            raise ValueError(f"Dependências da IA não instaladas ({e.name}). Instale-as com 'pip install -r requirements.txt'.") from e
 
-    def __init__(self):
         load_dotenv()
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("Chave de API do Gemini não encontrada. Verifique o seu ficheiro .env.")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model = genai.GenerativeModel(model_name)
 
-    def _build_prompt(self, filenames: List[str], user_request: str) -> str:
+    def _build_prompt(self, file_summary: str, user_request: str) -> str:
         system_instruction = """
-        Você é um especialista em organização de ficheiros extremamente meticuloso. A sua tarefa é criar um conjunto de regras de organização analisando uma lista de nomes de ficheiros e um pedido do utilizador.
+        Você é um especialista em organização de ficheiros extremamente meticuloso. A sua tarefa é criar um conjunto de regras de organização analisando um resumo dos nomes de ficheiros e um pedido do utilizador.
+        O resumo agrupa os ficheiros por extensão e padrão de nome, com o número de ficheiros e exemplos de cada grupo. Dê mais peso aos grupos maiores.
 
         As regras devem ser fornecidas num formato JSON estrito, que será uma LISTA de objetos.
-        Cada objeto na lista representa UMA regra e deve conter DUAS chaves:
+        Cada objeto na lista representa UMA regra e deve conter DUAS chaves, e opcionalmente uma terceira:
         1. "folder": O nome da pasta de destino (em MAIÚSCULAS e descritivo).
-        2. "keywords": UMA LISTA de palavras-chave em minúsculas que, se encontradas no nome de um ficheiro, o moverão para esta pasta.
+        2. "keywords": UMA LISTA de palavras-chave em minúsculas que, se encontradas no nome de um ficheiro, o moverão para esta pasta. Pode ser uma lista vazia se a regra depender só das condições.
+        3. "conditions" (opcional): um objeto com condições sobre o ficheiro, que têm TODAS de se verificar, além de uma palavra-chave no nome (se houver palavras-chave). Chaves possíveis:
+           - "min_size", "max_size": tamanho em bytes ou texto como "500KB", "10MB", "2GB" (limites incluídos);
+           - "modified_after", "modified_before": data de modificação no formato "AAAA-MM-DD" (a primeira incluída, a segunda excluída);
+           - "newer_than_days", "older_than_days": idade da última modificação, em dias inteiros;
+           - "types": lista de tipos reais do ficheiro, reconhecidos pelo conteúdo e não pela extensão. Valores possíveis: {types}.
 
         Exemplo de resposta JSON válida:
         [
-          { "folder": "RELATORIOS_VENDAS", "keywords": ["vendas", "relatorio_q3"] },
-          { "folder": "FATURAS_CLIENTES", "keywords": ["fatura", "invoice", "recibo"] }
+          {{ "folder": "RELATORIOS_VENDAS", "keywords": ["vendas", "relatorio_q3"] }},
+          {{ "folder": "FATURAS_CLIENTES", "keywords": ["fatura", "invoice", "recibo"] }},
+          {{ "folder": "FOTOS_2023", "keywords": ["img_", "dsc"], "conditions": {{ "types": ["image"], "modified_after": "2023-01-01", "modified_before": "2024-01-01" }} }},
+          {{ "folder": "VIDEOS_GRANDES", "keywords": [], "conditions": {{ "types": ["video"], "min_size": "1GB" }} }}
         ]
 
         INSTRUÇÕES IMPORTANTES:
         - Se o pedido do utilizador for VAGO ou GENÉRICO (ex: "organize isto", "arrume a confusão"), a sua tarefa é inferir categorias lógicas a partir dos nomes dos ficheiros. Crie pastas como DOCUMENTOS, IMAGENS, TRABALHO, PESSOAL, etc., e atribua palavras-chave apropriadas.
         - Crie regras específicas primeiro, e depois uma regra mais genérica no final para apanhar ficheiros comuns (como por extensão, ex: [".pdf", ".docx"]) se nenhuma palavra-chave específica corresponder.
+        - Use "conditions" só quando o nome não chega: se o utilizador pedir para separar por data, tamanho ou tipo real, ou quando os nomes são genéricos (ex: "IMG_0001.jpg", "document.pdf"). Avaliar condições obriga a ler cada ficheiro, por isso prefira regras com palavras-chave sempre que possível.
+        - A primeira regra que corresponde ganha; coloque as regras com condições antes das regras genéricas que apanhariam os mesmos ficheiros.
         - A sua resposta deve ser APENAS o array JSON. Sem explicações, sem markdown, apenas o JSON.
-        """
-        file_list_str = ", ".join(filenames)[:4000]
+        """.format(types=", ".join(f'"{file_type}"' for file_type in FILE_TYPES))
         prompt = (f"{system_instruction}\n\n"
                   f"--- INÍCIO DOS DADOS ---\n"
-                  f"Lista de nomes de ficheiros a analisar: {file_list_str}\n"
+                  f"Resumo dos nomes de ficheiros a analisar:\n{file_summary}\n"
                   f"Pedido do utilizador: \"{user_request}\"\n"
                   f"--- FIM DOS DADOS ---\n\n"
                   f"Gere o array JSON com as regras de organização:")
         return prompt
 
-    def suggest_rules(self, folder_path: Union[str, Path], user_request: str) -> Optional[List[Dict[str, Any]]]:
+    @staticmethod
+    def _invalid_conditions(rules: List[Dict[str, Any]]) -> Optional[str]:
+        """Descrição do primeiro problema nas "conditions" das regras, ou None se todas são válidas."""
+        for rule in rules:
+            try:
+                if rule.get("conditions"):
+                    RuleConditions(rule["conditions"])
+            except ValueError as e:
+                return f"pasta '{rule['folder']}': {e}"
+        return None
+
+    def suggest_rules(self, folder_path: Union[str, Path], user_request: str,
+                      use_cache: bool = True) -> Optional[List[Dict[str, Any]]]:
         source_path = Path(folder_path)
         if not source_path.is_dir():
             logging.error(f"O caminho fornecido '{folder_path}' não é um diretório válido.")
             return None
-        
-        filenames = [f.name for f in source_path.iterdir() if f.is_file()][:150]
-        if not filenames:
+
+        summary = FilenameSummary().add_all(entry.name for entry in islice(DirectoryScanner(source_path), self.sample_limit))
+        if not summary.total:
             return []
+        file_summary = summary.render(PROMPT_SUMMARY_CHARS)
 
-        prompt = self._build_prompt(filenames, user_request)
+        # Sem use_cache a consulta à cache é ignorada, mas a nova resposta substitui a anterior.
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key([file_summary], user_request, self.model_name)
+            cached_rules = self.cache.get(cache_key) if use_cache else None
+            if cached_rules is not None:
+                return cached_rules
+
+        prompt = self._build_prompt(file_summary, user_request)
         try:
             response = self.model.generate_content(prompt)
             cleaned_response = response.text.strip().replace("```json", "").replace("```", "").strip()
             
             rules = json.loads(cleaned_response)
             if isinstance(rules, list) and all(isinstance(r, dict) and 'folder' in r and 'keywords' in r for r in rules):
+                invalid = self._invalid_conditions(rules)
+                if invalid:
+                    logging.error(f"Resposta da IA com condições inválidas: {invalid}")
+                    return None
+                if cache_key is not None:
+                    self.cache.put(cache_key, rules)
                 return rules
             else:
                 logging.error(f"Resposta da IA não está no formato esperado: {rules}")
@@ -78,10 +151,164 @@ class GeminiRuleSuggester:
             logging.error(f"Erro ao comunicar com a API do Gemini: {e}")
             return None
 
+class _RunTotals:
+    """Contadores de uma execução, partilhados por `organize_files` e `execute_plan`."""
+
+    def __init__(self, journal: Optional[MoveJournal] = None, metrics: Optional[RunMetrics] = None,
+                 dedup: Optional[Deduplicator] = None):
+        self.journal = journal
+        self.metrics = metrics
+        self.dedup = dedup
+        self.moved_count = 0
+        self.processed = 0
+        self.created_folders: Set[str] = set()
+        self.ensured: Set[Path] = set()
+        self.move_log = MoveLog()
+        # Ficheiros que o índice de estado deu como arrumados e inalterados.
+        self.skipped_unchanged = 0
+        # Duplicados tratados: (origem, ação, original), e bytes libertados (apagados ou ligados).
+        self.duplicate_log = MoveLog()
+        self.dedup_bytes_saved = 0
+
+    def report_data(self, source_path: Path, total_files_scanned: int) -> Dict[str, Any]:
+        data = {
+            "source_folder": str(source_path),
+            "moved_count": self.moved_count,
+            "total_files_scanned": total_files_scanned,
+            "skipped_unchanged": self.skipped_unchanged,
+            "created_folders": sorted(list(self.created_folders)),
+            "move_log": self.move_log,
+            "folder_counts": dict(self.move_log.folder_counts)
+        }
+        if self.dedup is not None:
+            data["dedup_policy"] = self.dedup.policy
+            data["duplicates"] = self.duplicate_log
+            data["duplicate_count"] = len(self.duplicate_log)
+            data["dedup_bytes_saved"] = self.dedup_bytes_saved
+        if self.metrics is not None:
+            self.metrics.count("scanned", total_files_scanned)
+            self.metrics.count("moved", self.moved_count)
+            self.metrics.count("skipped_unchanged", self.skipped_unchanged)
+            self.metrics.count("folders_created", len(self.created_folders))
+            if self.dedup is not None:
+                self.metrics.count("duplicates", len(self.duplicate_log))
+            data["metrics"] = self.metrics.finish()
+        return data
+
+class _DirectoryProgress:
+    __slots__ = ("stat", "subdirs", "file_count", "done", "in_place", "dirty", "known", "reused")
+
+    def __init__(self):
+        self.stat: Optional[os.stat_result] = None
+        self.subdirs: List[str] = []
+        self.file_count: Optional[int] = None
+        self.done = 0
+        self.in_place: List[Tuple[str, int, os.stat_result]] = []
+        self.dirty = False
+        # Registos do índice para esta pasta e quantos deles foram confirmados sem alterações.
+        self.known = 0
+        self.reused = 0
+
+class _IncrementalRun:
+    """Liga um `FileStateIndex` a uma organização: salta o que não mudou e regista o que ficou arrumado.
+
+    Cada pasta listada é acompanhada até todos os seus ficheiros terem sido tratados; nessa
+    altura os ficheiros arrumados são gravados no índice. No fim de uma execução completa,
+    as pastas sem nenhum ficheiro fora do sítio ficam assentes e deixam de ser listadas.
+    """
+
+    def __init__(self, index: FileStateIndex, matcher: RuleMatcher):
+        self.index = index
+        self.matcher = matcher
+        self.started_ns = time.time_ns()
+        self._progress: Dict[str, _DirectoryProgress] = {}
+        self._settle: List[Tuple[str, _DirectoryProgress]] = []
+        self._records_dir: Optional[str] = None
+        self._records: Dict[int, Any] = {}
+
+    def settled_listing(self, directory: Path):
+        return self.index.settled_listing(directory)
+
+    def listed(self, directory: Path, stat: os.stat_result, subdirs: List[str], file_count: int) -> None:
+        key = str(directory)
+        progress = self._progress_of(key)
+        progress.stat, progress.subdirs, progress.file_count = stat, subdirs, file_count
+        self._check_finished(key, progress)
+
+    def _progress_of(self, key: str) -> _DirectoryProgress:
+        progress = self._progress.get(key)
+        if progress is None:
+            progress = self._progress[key] = _DirectoryProgress()
+        return progress
+
+    def is_unchanged(self, entry: os.DirEntry) -> bool:
+        """Se o ficheiro já estava arrumado e não mudou, conta-o como tratado e devolve True."""
+        key = os.path.dirname(entry.path)
+        if key != self._records_dir:
+            self._records_dir, self._records = key, self.index.records_in(key)
+            self._progress_of(key).known = len(self._records)
+        record = self._records.get(entry.inode())
+        if record is None:
+            return False
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except OSError:
+            return False
+        if not self.index.is_unchanged(record, entry.name, stat):
+            return False
+        self._progress_of(key).reused += 1
+        self.in_place(entry, key, stat)
+        return True
+
+    def in_place(self, entry: os.DirEntry, key: str, stat: Optional[os.stat_result] = None) -> None:
+        progress = self._progress_of(key)
+        try:
+            progress.in_place.append((entry.name, entry.inode(), stat or entry.stat(follow_symlinks=False)))
+        except OSError:
+            progress.dirty = True
+        progress.done += 1
+        self._check_finished(key, progress)
+
+    def moved_out(self, entry: os.DirEntry, key: str) -> None:
+        progress = self._progress_of(key)
+        progress.dirty = True
+        progress.done += 1
+        self._check_finished(key, progress)
+
+    def _check_finished(self, key: str, progress: _DirectoryProgress) -> None:
+        if progress.file_count is None or progress.done < progress.file_count:
+            return
+        del self._progress[key]
+        # Se todos os registos foram confirmados e não há nada novo, o índice já está certo.
+        if progress.dirty or not progress.reused or not progress.known == progress.reused == len(progress.in_place):
+            self.index.replace_directory(key, progress.in_place)
+        if self._records_dir == key:
+            self._records_dir, self._records = None, {}
+        # Uma pasta só fica assente se o destino de todos os ficheiros depende apenas do nome:
+        # mudar o conteúdo de um ficheiro não altera o mtime da pasta.
+        if progress.dirty or not all(self.matcher.decided_by_name(name) for name, _, _ in progress.in_place):
+            self.index.forget_directory(key)
+        else:
+            progress.in_place = []
+            self._settle.append((key, progress))
+
+    def finish(self) -> int:
+        """Marca as pastas assentes desta execução completa; devolve quantas ficaram marcadas."""
+        settled = sum(self.index.settle_directory(key, progress.stat, progress.subdirs, progress.file_count, self.started_ns)
+                      for key, progress in self._settle)
+        self._settle = []
+        return settled
+
+
 class FileSorterLogic:
-    def __init__(self, config_path: Path):
+    def __init__(self, config_path: Path, copier: Optional[FileCopier] = None):
         self.config_path = config_path
         self.rules: List[Dict[str, Any]] = []
+        self.matcher = RuleMatcher()
+        # Cópia usada nos movimentos entre sistemas de ficheiros (None = FileCopier em modo "auto").
+        self.copier = copier
+        # Stat e tipo pelo cabeçalho para as regras com condições, com cache entre execuções.
+        self.attributes = FileAttributes()
         self.load_rules()
 
     def load_rules(self) -> None:
@@ -96,6 +323,7 @@ class FileSorterLogic:
         except (json.JSONDecodeError, IOError) as e:
             logging.error(f"Erro ao carregar o arquivo de configuração '{self.config_path}': {e}")
             self.rules = []
+        self.matcher = RuleMatcher(self.rules)
 
     def save_rules(self) -> None:
         try:
@@ -105,10 +333,16 @@ class FileSorterLogic:
         except IOError as e:
             logging.error(f"Erro ao salvar o arquivo de configuração '{self.config_path}': {e}")
 
-    def set_rules(self, rules: List[Dict[str, Any]]) -> None:
+    def set_rules(self, rules: List[Dict[str, Any]], matcher: Optional[RuleMatcher] = None) -> None:
+        """Usa `rules`; `matcher` permite reaproveitar um RuleMatcher já compilado com estas regras."""
         self.rules = rules
+        self.matcher = matcher if matcher is not None else RuleMatcher(rules)
 
-    def _get_safe_destination_path(self, destination_path: Path, source_file: Path) -> Path:
+    def _get_safe_destination_path(self, destination_path: Path, source_file: Path,
+                                   name_index: Optional[DestinationNameIndex] = None) -> Path:
+        """Escolhe um nome livre no destino; com `name_index` a escolha é feita em memória, sem stat()."""
+        if name_index is not None:
+            return name_index.reserve(destination_path, source_file.name)
         final_destination = destination_path / source_file.name
         counter = 1
         while final_destination.exists():
@@ -116,114 +350,592 @@ class FileSorterLogic:
             counter += 1
         return final_destination
 
-    def organize_files(self, source_folder: Union[str, Path], cancel_event: Event) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
-        """Organiza ficheiros e, no final, retorna um dicionário com os dados para o relatório."""
+    def organize_files(self, source_folder: Union[str, Path], cancel_event: Event,
+                       executor: Optional[ParallelMoveExecutor] = None, recursive: bool = False,
+                       max_depth: Optional[int] = None, exclude: Sequence[str] = (),
+                       journal: Optional[MoveJournal] = None, state_index: Optional[FileStateIndex] = None,
+                       metrics: Optional[RunMetrics] = None,
+                       dedup: Optional[Deduplicator] = None) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """Organiza ficheiros e, no final, retorna um dicionário com os dados para o relatório.
+
+        Os ficheiros são lidos em lotes à medida que a pasta é percorrida, por isso o evento
+        "total_files" é uma estimativa que se repete, refinada, a cada lote. Com um `executor`,
+        os movimentos de cada lote são planeados e depois executados em paralelo. Com um
+        `journal`, cada lote é registado no diário antes de ser movido (ver `resume_journal`).
+        Com `state_index`, só são tratados os ficheiros novos ou alterados desde a última
+        execução; os restantes são contados em "skipped_unchanged". Com `metrics`, os tempos
+        de cada fase e a latência de cada movimento são medidos e o resumo fica em "metrics".
+        Com `dedup`, um ficheiro cujo conteúdo já existe na pasta de destino é tratado segundo
+        a política do `Deduplicator` em vez de ficar como "nome (1)" (ver `_deduplicate`).
+        """
         source_path = Path(source_folder)
         if not source_path.is_dir():
             yield ("error", f"Diretório '{source_path}' não encontrado.")
             return {}
-        
-        files_to_move = [f for f in source_path.iterdir() if f.is_file()]
-        total_files = len(files_to_move)
-        yield ("total_files", str(total_files))
+        totals = _RunTotals(journal, metrics, dedup)
+        return (yield from self._journaled(
+            self._organize(source_path, cancel_event, executor, recursive, max_depth, exclude, totals, state_index), totals))
 
-        moved_count = 0
-        created_folders = set()
-        move_log = []
+    def _organize(self, source_path: Path, cancel_event: Event, executor: Optional[ParallelMoveExecutor],
+                  recursive: bool, max_depth: Optional[int], exclude: Sequence[str], totals: "_RunTotals",
+                  state_index: Optional[FileStateIndex] = None) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        skip_dirs = self._initial_skip_dirs(source_path)
+        matcher = self.current_matcher()
+        incremental = None
+        if state_index is not None:
+            state_index.begin_run(source_path, self.rules, {"exclude": list(exclude)}, matcher.today)
+            incremental = _IncrementalRun(state_index, matcher)
+        scanner = DirectoryScanner(source_path, recursive=recursive, max_depth=max_depth,
+                                   exclude=exclude, skip_dirs=skip_dirs, listing_state=incremental)
+        name_index = DestinationNameIndex()
+        # pasta de destino -> (caminho, caminho em texto), calculados uma vez por pasta.
+        destinations: Dict[str, Tuple[Path, str]] = {}
 
-        for i, file_path in enumerate(files_to_move):
+        metrics = totals.metrics
+        batches = scanner.batches(SCAN_BATCH_SIZE)
+        if metrics is not None:
+            batches = metrics.timed("scan", batches, len)
+        for batch in batches:
+            yield ("total_files", str(scanner.estimated_total()))
             if cancel_event.is_set():
                 yield ("cancelled", "Operação cancelada pelo utilizador.")
                 return {}
 
-            destination_folder_name = self._get_destination_folder(file_path)
-            destination_path = source_path / destination_folder_name
-            
-            if not destination_path.exists():
-                created_folders.add(destination_folder_name)
-            destination_path.mkdir(exist_ok=True)
-            
-            safe_path = self._get_safe_destination_path(destination_path, file_path)
+            if incremental is not None:
+                unchanged = len(batch)
+                started = time.perf_counter()
+                batch = [entry for entry in batch if not incremental.is_unchanged(entry)]
+                if metrics is not None:
+                    metrics.add_time("index", time.perf_counter() - started, unchanged)
+                unchanged -= len(batch)
+                if unchanged:
+                    totals.skipped_unchanged += unchanged
+                    totals.processed += unchanged
+                    yield ("progress", str(totals.processed))
+
+            moving: List[Tuple[os.DirEntry, Path]] = []
+            folders = self._classify(matcher, batch, metrics)
+            for entry, folder in zip(batch, folders):
+                destination = destinations.get(folder)
+                if destination is None:
+                    destination_path = source_path / folder
+                    destination = destinations[folder] = (destination_path, str(destination_path))
+                parent = os.path.dirname(entry.path)
+                if parent == destination[1]:
+                    # O ficheiro já está na pasta a que pertence.
+                    if incremental is not None:
+                        incremental.in_place(entry, parent)
+                    totals.processed += 1
+                    yield ("progress", str(totals.processed))
+                    continue
+                if incremental is not None:
+                    incremental.moved_out(entry, parent)
+                moving.append((entry, destination[0]))
+
+            if totals.dedup is not None and moving:
+                moving = yield from self._deduplicate(source_path, moving, totals)
+            planned = []
+            for entry, destination_path in moving:
+                file_path = Path(entry.path)
+                self._ensure_folder(destination_path, totals, skip_dirs)
+                if metrics is None:
+                    planned.append((file_path, self._get_safe_destination_path(destination_path, file_path, name_index)))
+                else:
+                    started = time.perf_counter()
+                    planned.append((file_path, self._get_safe_destination_path(destination_path, file_path, name_index)))
+                    metrics.add_time("collisions", time.perf_counter() - started)
+
+            if (yield from self._run_moves(source_path, planned, cancel_event, executor, name_index, totals)):
+                yield ("cancelled", "Operação cancelada pelo utilizador.")
+                return {}
+            if metrics is not None:
+                metrics.batch_done(totals.processed)
+
+        if incremental is not None:
+            incremental.finish()
+            totals.skipped_unchanged += scanner.skipped_files
+        if totals.dedup is not None:
+            yield ("log", f"{totals.dedup.stats_text()}.")
+        yield ("total_files", str(scanner.scanned_files))
+        yield ("done", "Organização concluída! A gerar relatório...")
+        return totals.report_data(source_path, scanner.scanned_files + scanner.skipped_files)
+
+    def _deduplicate(self, source_path: Path, moving: List[Tuple[os.DirEntry, Path]],
+                     totals: "_RunTotals") -> Generator[Tuple[str, str], None, List[Tuple[os.DirEntry, Path]]]:
+        """Trata os duplicados de um lote e devolve os (entrada, pasta de destino) que ainda são movidos.
+
+        Com a política "delete" o duplicado é apagado (o diário não o repõe num "desfazer");
+        com "hardlink" é substituído por uma ligação física ao original e depois movido como
+        os outros, ocupando o espaço uma só vez; com "quarantine" é movido para a pasta
+        QUARANTINE_FOLDER em vez da pasta da regra. Se a ação falhar, o ficheiro é movido
+        normalmente.
+        """
+        dedup, metrics = totals.dedup, totals.metrics
+        started = time.perf_counter()
+        checked, remaining = [], []
+        for entry, destination_path in moving:
             try:
-                shutil.move(str(file_path), str(safe_path))
-                moved_count += 1
-                move_log.append({"from": file_path.name, "to_folder": destination_folder_name, "to_filename": safe_path.name})
-                yield ("log", f"Movido '{file_path.name}' para '{destination_folder_name}'.")
-            except Exception as e:
-                logging.error(f"Falha ao mover '{file_path.name}': {e}")
-                yield ("error", f"Falha ao mover '{file_path.name}': {e}")
-            yield ("progress", str(i + 1))
+                # No Windows o stat de um DirEntry não traz o inode, necessário para confirmar o ficheiro.
+                st = entry.stat(follow_symlinks=False) if os.name != "nt" else os.lstat(entry.path)
+                checked.append((entry, destination_path, st))
+            except OSError:
+                remaining.append((entry, destination_path))
+        duplicates = dedup.find_duplicates([(Path(entry.path), st, destination_path) for entry, destination_path, st in checked])
+        if metrics is not None:
+            metrics.add_time("dedup", time.perf_counter() - started, len(checked))
+
+        for (entry, destination_path, _), duplicate in zip(checked, duplicates):
+            if duplicate is None or not dedup.unchanged(duplicate):
+                remaining.append((entry, destination_path))
+                continue
+            origin = self._relative(source_path, duplicate.source)
+            original = self._relative(source_path, duplicate.original)
+            try:
+                if dedup.policy == "delete":
+                    os.unlink(duplicate.source)
+                elif dedup.policy == "hardlink":
+                    dedup.link_to_original(duplicate)
+            except OSError as e:
+                logging.error(f"Falha ao tratar o duplicado '{origin}': {e}")
+                yield ("log", f"Não foi possível tratar o duplicado '{origin}' ({e}); será movido normalmente.")
+                remaining.append((entry, destination_path))
+                continue
+
+            totals.duplicate_log.add(origin, dedup.policy, original)
+            if dedup.policy == "delete":
+                totals.dedup_bytes_saved += duplicate.size
+                totals.processed += 1
+                yield ("log", f"Apagado '{origin}': igual a '{original}'.")
+                yield ("progress", str(totals.processed))
+            elif dedup.policy == "hardlink":
+                totals.dedup_bytes_saved += duplicate.size
+                remaining.append((entry, destination_path))
+                yield ("log", f"'{origin}' é igual a '{original}'; ficou como ligação física.")
+            else:
+                remaining.append((entry, source_path / QUARANTINE_FOLDER))
+                yield ("log", f"'{origin}' é igual a '{original}'; vai para '{QUARANTINE_FOLDER}'.")
+        return remaining
+
+    @staticmethod
+    def _relative(source_path: Path, path: Path) -> str:
+        return path.name if path.parent == source_path else path.relative_to(source_path).as_posix()
+
+    @staticmethod
+    def _journaled(run: Generator[Tuple[str, str], None, Dict[str, Any]],
+                   totals: "_RunTotals") -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """Executa `run` e fecha o diário com o estado final (e a cache de hashes dos duplicados).
+
+        Se a execução for interrompida por uma exceção, o diário fica sem registo de fim,
+        tal como depois de uma falha do processo, e pode ser retomado.
+        """
+        status = None
+        try:
+            report_data = yield from run
+            status = "completed" if report_data else "cancelled"
+            return report_data
+        finally:
+            if totals.dedup is not None:
+                totals.dedup.finish()
+            if totals.journal is not None:
+                if status is None:
+                    totals.journal.close()
+                else:
+                    totals.journal.finish(status)
+
+    def plan_organization(self, source_folder: Union[str, Path], recursive: bool = False,
+                          max_depth: Optional[int] = None, exclude: Sequence[str] = ()) -> MovePlan:
+        """Calcula o plano completo (origem, pasta, nome final) sem escrever nada no disco.
+
+        As colisões de nomes são resolvidas como na organização real, com o índice de nomes
+        de cada pasta de destino; as pastas são apenas listadas, nunca criadas.
+        """
+        source_path = Path(source_folder)
+        if not source_path.is_dir():
+            raise NotADirectoryError(f"Diretório '{source_path}' não encontrado.")
+
+        skip_dirs = self._initial_skip_dirs(source_path)
+        scanner = DirectoryScanner(source_path, recursive=recursive, max_depth=max_depth,
+                                   exclude=exclude, skip_dirs=skip_dirs)
+        name_index = DestinationNameIndex()
+        plan = MovePlan(source_folder=str(source_path))
+        root_prefix = len(os.path.join(str(source_path), ""))
+        # pasta de destino -> (caminho, caminho em texto), calculados uma vez por pasta.
+        destinations: Dict[str, Tuple[Path, str]] = {}
+
+        matcher = self.current_matcher()
+        for batch in scanner.batches(SCAN_BATCH_SIZE):
+            folders = self._classify(matcher, batch)
+            for entry, folder in zip(batch, folders):
+                destination = destinations.get(folder)
+                if destination is None:
+                    destination_path = source_path / folder
+                    destination = destinations[folder] = (destination_path, str(destination_path))
+                    skip_dirs.add(destination_path)
+                    if not destination_path.is_dir():
+                        plan.created_folders.append(folder)
+                if os.path.dirname(entry.path) == destination[1]:
+                    continue
+                final_name = name_index.reserve_name(destination[0], entry.name)
+                relative = entry.path[root_prefix:].replace(os.sep, "/")
+                plan.moves.append((relative, folder, final_name))
+
+        plan.total_files_scanned = scanner.scanned_files
+        return plan
+
+    def execute_plan(self, plan: MovePlan, cancel_event: Event, executor: Optional[ParallelMoveExecutor] = None,
+                     journal: Optional[MoveJournal] = None,
+                     metrics: Optional[RunMetrics] = None) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """Aplica um plano (por exemplo, lido de ficheiro) com os mesmos eventos de `organize_files`.
+
+        Se entretanto outro ficheiro ocupou um nome planeado, é escolhido o nome livre seguinte.
+        No diário, cada movimento usa como identificador a sua posição no plano.
+        """
+        source_path = Path(plan.source_folder)
+        if not source_path.is_dir():
+            yield ("error", f"Diretório '{source_path}' não encontrado.")
+            return {}
+        totals = _RunTotals(journal, metrics)
+        return (yield from self._journaled(self._apply_plan(plan, 0, source_path, cancel_event, executor, totals), totals))
+
+    def _apply_plan(self, plan: MovePlan, first_index: int, source_path: Path, cancel_event: Event,
+                    executor: Optional[ParallelMoveExecutor],
+                    totals: "_RunTotals") -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        yield ("total_files", str(len(plan.moves) - first_index))
+        name_index = DestinationNameIndex()
+        # Um plano lido de ficheiro pode ter sido alterado: nada pode sair da pasta de origem.
+        root = source_path.resolve()
+        checked: Dict[Path, bool] = {}
+        for start in range(first_index, len(plan.moves), SCAN_BATCH_SIZE):
+            if cancel_event.is_set():
+                yield ("cancelled", "Operação cancelada pelo utilizador.")
+                return {}
+            planned, ids = [], []
+            for move_id, (relative, folder, final_name) in enumerate(plan.moves[start:start + SCAN_BATCH_SIZE], start):
+                source, destination_path = source_path / relative, source_path / folder
+                target = destination_path / final_name
+                if not (self._contained(root, source, checked) and self._contained(root, target, checked)):
+                    logging.error(f"Movimento do plano fora de '{source_path}' rejeitado: '{relative}' -> '{folder}/{final_name}'")
+                    yield ("error", f"Movimento fora da pasta de origem rejeitado: '{relative}' -> '{folder}/{final_name}'")
+                    totals.processed += 1
+                    yield ("progress", str(totals.processed))
+                    continue
+                self._ensure_folder(destination_path, totals)
+                planned.append((source, target))
+                ids.append(move_id)
+            if (yield from self._run_moves(source_path, planned, cancel_event, executor, name_index, totals, ids)):
+                yield ("cancelled", "Operação cancelada pelo utilizador.")
+                return {}
 
         yield ("done", "Organização concluída! A gerar relatório...")
-        
-        return {
-            "source_folder": str(source_path),
-            "moved_count": moved_count,
-            "total_files_scanned": total_files,
-            "created_folders": sorted(list(created_folders)),
-            "move_log": move_log
-        }
+        return totals.report_data(source_path, plan.total_files_scanned)
+
+    @staticmethod
+    def _contained(root: Path, path: Path, checked: Dict[Path, bool]) -> bool:
+        """True se `path` fica dentro de `root` (já resolvida); cada pasta só é resolvida uma vez.
+
+        O próprio `path` não é resolvido: uma ligação simbólica é movida, não seguida.
+        """
+        if path.name in ("", ".", ".."):
+            return False
+        inside = checked.get(path.parent)
+        if inside is None:
+            parent = path.parent.resolve()
+            inside = checked[path.parent] = parent == root or root in parent.parents
+        return inside
+
+    def resume_journal(self, journal_path: Union[str, Path], cancel_event: Event,
+                       executor: Optional[ParallelMoveExecutor] = None, metrics: Optional[RunMetrics] = None,
+                       dedup: Optional[Deduplicator] = None) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """Retoma uma organização interrompida a partir do seu diário.
+
+        Os movimentos concluídos não voltam a ser verificados no disco; só as intenções sem
+        conclusão (no máximo um lote) são confirmadas: se a origem ainda existe o movimento
+        é refeito, se já só existe o destino é dado como concluído. Depois continua-se o
+        plano guardado ou, numa organização normal, a varredura com as mesmas opções; se a
+        organização tratava duplicados e não for dado um `dedup`, é usada a mesma política
+        (sem cache de hashes).
+        """
+        try:
+            state = read_journal(journal_path, keep_completed=False)
+        except (OSError, ValueError, KeyError) as e:
+            yield ("error", f"Não foi possível ler o diário '{journal_path}': {e}")
+            return {}
+        source_path = Path(state.source_folder)
+        if not source_path.is_dir():
+            yield ("error", f"Diretório '{source_path}' não encontrado.")
+            return {}
+        if state.status in ("completed", "undone"):
+            yield ("done", "Esta organização já terminou; não há nada para retomar.")
+            return {}
+
+        if dedup is None and state.options.get("dedup") and not state.plan:
+            dedup = Deduplicator(state.options["dedup"])
+        totals = _RunTotals(MoveJournal.reopen(state), metrics, dedup)
+        return (yield from self._journaled(self._resume(state, source_path, cancel_event, executor, totals), totals))
+
+    def _resume(self, state: JournalState, source_path: Path, cancel_event: Event,
+                executor: Optional[ParallelMoveExecutor],
+                totals: "_RunTotals") -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        yield ("log", f"A retomar: {state.completed_count} movimentos já concluídos, {len(state.in_doubt)} por confirmar.")
+        planned, ids = [], []
+        for move_id, (origin, destination) in sorted(state.in_doubt.items()):
+            source, target = source_path / origin, source_path / destination
+            if same_file(source, target):
+                # Interrompido entre o link e o unlink: falta só apagar o nome antigo.
+                try:
+                    os.unlink(source)
+                except OSError as e:
+                    logging.error(f"Falha ao mover '{source.name}': {e}")
+                    yield ("error", f"Falha ao mover '{source.name}': {e}")
+                else:
+                    totals.journal.log_done(source_path, move_id, target)
+            elif os.path.lexists(source):
+                self._ensure_folder(target.parent, totals)
+                planned.append((source, target))
+                ids.append(move_id)
+            elif os.path.lexists(target):
+                totals.journal.log_done(source_path, move_id, target)
+        if (yield from self._run_moves(source_path, planned, cancel_event, executor, DestinationNameIndex(), totals, ids)):
+            yield ("cancelled", "Operação cancelada pelo utilizador.")
+            return {}
+
+        if state.plan:
+            try:
+                plan = MovePlan.load(state.plan)
+            except (OSError, ValueError) as e:
+                logging.error(f"Não foi possível ler o plano: {e}")
+                yield ("error", f"Não foi possível ler o plano: {e}")
+                return {}
+            return (yield from self._apply_plan(plan, state.max_id + 1, source_path, cancel_event, executor, totals))
+        options = state.options
+        return (yield from self._organize(source_path, cancel_event, executor, options.get("recursive", False),
+                                          options.get("max_depth"), options.get("exclude", ()), totals))
+
+    def undo_journal(self, journal_path: Union[str, Path], cancel_event: Event,
+                     executor: Optional[ParallelMoveExecutor] = None) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """Desfaz uma organização: repõe os nomes originais pela ordem inversa do diário.
+
+        Com um `executor`, cada lote é reposto em paralelo. Um nome original entretanto
+        ocupado nunca é sobrescrito; o ficheiro fica onde está e é reportado um erro. No fim,
+        as pastas criadas pela organização são removidas se tiverem ficado vazias.
+        """
+        try:
+            state = read_journal(journal_path)
+        except (OSError, ValueError, KeyError) as e:
+            yield ("error", f"Não foi possível ler o diário '{journal_path}': {e}")
+            return {}
+        source_path = Path(state.source_folder)
+        if not source_path.is_dir():
+            yield ("error", f"Diretório '{source_path}' não encontrado.")
+            return {}
+
+        if state.status == "undone":
+            yield ("done", "Esta organização já foi desfeita.")
+            return {}
+
+        entries = list(state.completed)
+        for move_id, (origin, destination) in state.in_doubt.items():
+            origin_path, destination_path = source_path / origin, source_path / destination
+            # Também os interrompidos entre o link e o unlink, para apagar o nome de destino.
+            if os.path.lexists(destination_path) and (not os.path.lexists(origin_path)
+                                                       or same_file(origin_path, destination_path)):
+                entries.append((move_id, origin, destination))
+        entries.sort(reverse=True)
+
+        journal = MoveJournal.reopen(state)
+        restored = processed = 0
+        parents: Set[Path] = set()
+        yield ("total_files", str(len(entries)))
+        try:
+            for start in range(0, len(entries), SCAN_BATCH_SIZE):
+                if cancel_event.is_set():
+                    yield ("cancelled", "Operação cancelada pelo utilizador.")
+                    return {}
+                planned, ids = [], {}
+                for move_id, origin, final in entries[start:start + SCAN_BATCH_SIZE]:
+                    current, original = source_path / final, source_path / origin
+                    if same_file(current, original):
+                        # O ficheiro já tem o nome original (ligação de um movimento interrompido).
+                        try:
+                            os.unlink(current)
+                        except OSError as e:
+                            logging.error(f"Falha ao repor '{current.name}': {e}")
+                            yield ("error", f"Falha ao repor '{current.name}': {e}")
+                        else:
+                            journal.log_undone(move_id)
+                            restored += 1
+                        processed += 1
+                        yield ("progress", str(processed))
+                        continue
+                    if original.parent not in parents:
+                        original.parent.mkdir(parents=True, exist_ok=True)
+                        parents.add(original.parent)
+                    planned.append((current, original))
+                    ids[current] = move_id
+
+                results = (executor.run(planned, cancel_event, copier=self.copier) if executor is not None
+                           else self._move_serially(planned, cancel_event, self.copier))
+                for result in results:
+                    if result.cancelled:
+                        continue
+                    if result.error is None:
+                        journal.log_undone(ids[result.source])
+                        restored += 1
+                        yield ("log", f"Reposto '{result.destination.name}' de '{result.source.parent.name}'.")
+                    elif not isinstance(result.error, FileNotFoundError):
+                        logging.error(f"Falha ao repor '{result.source.name}': {result.error}")
+                        yield ("error", f"Falha ao repor '{result.source.name}': {result.error}")
+                    processed += 1
+                    yield ("progress", str(processed))
+                journal.commit()
+
+            for folder in reversed(state.created_folders):
+                try:
+                    (source_path / folder).rmdir()
+                except OSError:
+                    pass
+            if restored == len(entries):
+                journal.finish("undone")
+            yield ("done", f"Organização desfeita: {restored} de {len(entries)} ficheiros repostos.")
+        finally:
+            journal.close()
+        return {"source_folder": str(source_path), "restored_count": restored, "total_entries": len(entries)}
+
+    @staticmethod
+    def _move_serially(planned: List[Tuple[Path, Path]], cancel_event: Event,
+                       copier: Optional[FileCopier] = None) -> Generator[MoveResult, None, None]:
+        for source, destination in planned:
+            if cancel_event.is_set():
+                return
+            try:
+                yield MoveResult(source, destination, method=move_file(source, destination, copier))
+            except Exception as e:
+                yield MoveResult(source, destination, error=e)
+
+    def _initial_skip_dirs(self, source_path: Path) -> Set[Path]:
+        """Pastas que uma varredura recursiva não visita: as das regras e as dos relatórios anteriores."""
+        skip_dirs = {source_path / folder for folder in self.matcher.folders}
+        skip_dirs.add(source_path / QUARANTINE_FOLDER)
+        for pattern in REPORT_DIR_PATTERNS:
+            skip_dirs.update(path for path in source_path.glob(pattern) if path.is_dir())
+        return skip_dirs
+
+    @staticmethod
+    def _ensure_folder(destination_path: Path, totals: "_RunTotals", skip_dirs: Optional[Set[Path]] = None) -> None:
+        if destination_path in totals.ensured:
+            return
+        started = time.perf_counter()
+        if not destination_path.exists():
+            totals.created_folders.add(destination_path.name)
+            if totals.journal is not None:
+                totals.journal.log_folder(destination_path.name)
+        destination_path.mkdir(exist_ok=True)
+        totals.ensured.add(destination_path)
+        if totals.metrics is not None:
+            totals.metrics.add_time("mkdir", time.perf_counter() - started)
+        if skip_dirs is not None:
+            # Uma varredura recursiva não deve voltar a entrar nas pastas que estamos a encher.
+            skip_dirs.add(destination_path)
+
+    def _run_moves(self, source_path: Path, planned: List[Tuple[Path, Path]], cancel_event: Event,
+                   executor: Optional[ParallelMoveExecutor], name_index: DestinationNameIndex,
+                   totals: "_RunTotals", ids: Optional[Iterable[int]] = None) -> Generator[Tuple[str, str], None, bool]:
+        """Executa um lote de movimentos planeados; devolve True se a operação foi cancelada.
+
+        Com diário, as intenções do lote são sincronizadas (um fsync) antes do primeiro movimento.
+        """
+        move_ids = None
+        if totals.journal is not None and planned:
+            move_ids = dict(zip((source for source, _ in planned), totals.journal.log_intents(source_path, planned, ids)))
+            totals.journal.commit()
+
+        measure = totals.metrics is not None
+        if executor is not None:
+            for result in executor.run(planned, cancel_event, name_index, measure=measure, copier=self.copier):
+                if not result.cancelled:
+                    yield from self._report_move(source_path, result, totals, move_ids)
+            return cancel_event.is_set()
+
+        for file_path, safe_path in planned:
+            if cancel_event.is_set():
+                return True
+            result = run_move(file_path, safe_path, name_index, measure, self.copier)
+            yield from self._report_move(source_path, result, totals, move_ids)
+        return False
+
+    @staticmethod
+    def _report_move(source_path: Path, result: MoveResult, totals: "_RunTotals",
+                     move_ids: Optional[Dict[Path, int]] = None) -> Generator[Tuple[str, str], None, None]:
+        if totals.metrics is not None:
+            if result.error is None:
+                totals.metrics.record_move(result.method, result.seconds, result.size)
+                if result.destination.name != result.source.name:
+                    totals.metrics.count("renamed_on_collision")
+            elif not isinstance(result.error, FileNotFoundError):
+                totals.metrics.count("move_errors")
+        if totals.dedup is not None:
+            if result.error is None:
+                totals.dedup.moved(result.source, result.destination, copied=result.method == "copy")
+            else:
+                totals.dedup.forget(result.source, result.destination.parent)
+        if result.error is None:
+            totals.moved_count += 1
+            origin = FileSorterLogic._relative(source_path, result.source)
+            totals.move_log.add(origin, result.destination.parent.name, result.destination.name)
+            if move_ids is not None:
+                totals.journal.log_done(source_path, move_ids[result.source], result.destination)
+            yield ("log", f"Movido '{result.source.name}' para '{result.destination.parent.name}'.")
+        elif not isinstance(result.error, FileNotFoundError):
+            # Um ficheiro que desapareceu entre a varredura e o movimento não é um erro.
+            logging.error(f"Falha ao mover '{result.source.name}': {result.error}")
+            yield ("error", f"Falha ao mover '{result.source.name}': {result.error}")
+        totals.processed += 1
+        yield ("progress", str(totals.processed))
+
+    def current_matcher(self) -> RuleMatcher:
+        """O matcher das regras, recompilado se tem datas relativas ("há N dias") e o dia já mudou."""
+        if self.matcher.is_stale():
+            self.matcher = RuleMatcher(self.rules)
+        return self.matcher
+
+    def _classify(self, matcher: RuleMatcher, entries: Sequence[Any], metrics: Optional[RunMetrics] = None) -> List[str]:
+        """Pasta de cada entrada; o stat e o cabeçalho só são lidos para as regras com condições."""
+        if metrics is None:
+            return matcher.classify_entries(entries, self.attributes)
+        started = time.perf_counter()
+        stats_read, headers_read = self.attributes.stats_read, self.attributes.headers_read
+        folders = matcher.classify_entries(entries, self.attributes)
+        metrics.add_time("match", time.perf_counter() - started, len(entries))
+        if matcher.has_conditions:
+            metrics.count("attribute_stats", self.attributes.stats_read - stats_read)
+            metrics.count("headers_read", self.attributes.headers_read - headers_read)
+        return folders
 
     def _get_destination_folder(self, file_path: Path) -> str:
-        filename_lower = file_path.name.lower()
-        for rule in self.rules:
-            for keyword in rule.get("keywords", []):
-                if keyword.startswith('.') and filename_lower.endswith(keyword):
-                    return rule["folder"]
-                elif not keyword.startswith('.') and keyword in filename_lower:
-                    return rule["folder"]
-        extension = file_path.suffix.lower().replace('.', '')
-        return extension.upper() if extension else "SEM_EXTENSAO"
-
-    def generate_html_report(self, report_data: Dict[str, Any]) -> str:
-        """Gera um ficheiro HTML com o resumo da organização e retorna o seu caminho."""
-        timestamp = datetime.now()
-        report_path = Path(report_data["source_folder"]) / f"_Relatorio_Organizacao_{timestamp.strftime('%Y-%m-%d_%H%M%S')}.html"
-
-        summary_html = (f"<li><strong>Ficheiros analisados:</strong> {report_data['total_files_scanned']}</li>"
-                        f"<li><strong>Ficheiros movidos:</strong> {report_data['moved_count']}</li>"
-                        f"<li><strong>Pastas criadas:</strong> {len(report_data['created_folders'])} ({', '.join(report_data['created_folders']) if report_data['created_folders'] else 'Nenhuma'})</li>")
-
-        log_rows_html = "".join([
-            f"<tr><td>{item['from']}</td><td>{item['to_folder']}</td><td>{item['to_filename']}</td></tr>"
-            for item in report_data["move_log"]
-        ])
-
-        html_template = f"""
-        <!DOCTYPE html>
-        <html lang="pt">
-        <head>
-            <meta charset="UTF-8">
-            <title>Relatório de Organização</title>
-            <style>
-                body {{ font-family: sans-serif; margin: 2em; background-color: #fdfdfd; color: #333; }}
-                h1, h2 {{ color: #333; border-bottom: 2px solid #007bff; padding-bottom: 5px;}}
-                ul {{ list-style-type: none; padding: 0; }}
-                li {{ background: #f4f4f4; margin: 5px 0; padding: 10px; border-left: 5px solid #007bff; }}
-                table {{ width: 100%; border-collapse: collapse; margin-top: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }}
-                th, td {{ padding: 12px; border: 1px solid #ddd; text-align: left; }}
-                th {{ background-color: #007bff; color: white; }}
-                tr:nth-child(even) {{ background-color: #f2f2f2; }}
-            </style>
-        </head>
-        <body>
-            <h1>Relatório de Organização</h1>
-            <p><strong>Pasta de Origem:</strong> {report_data['source_folder']}</p>
-            <p><strong>Data e Hora:</strong> {timestamp.strftime('%Y-%m-%d %H:%M:%S')}</p>
-            <h2>Resumo</h2>
-            <ul>{summary_html}</ul>
-            <h2>Registo Detalhado de Movimentos</h2>
-            <table>
-                <tr><th>Ficheiro Original</th><th>Pasta de Destino</th><th>Novo Nome (se alterado)</th></tr>
-                {log_rows_html}
-            </table>
-        </body>
-        </html>
+        return self.current_matcher().classify_entries([PathEntry(file_path)], self.attributes)[0]
+
+    def classify_names(self, filenames: List[str]) -> List[str]:
+        """Classifica vários nomes de ficheiros de uma vez com as regras compiladas.
+
+        Só com o nome, as regras com condições (tamanho, data, tipo) não são consideradas.
         """
+        return self.matcher.classify_batch(filenames)
+
+    def generate_html_report(self, report_data: Dict[str, Any], output_dir: Optional[Path] = None,
+                             metrics: Optional[RunMetrics] = None) -> str:
+        """Gera o relatório HTML paginado da organização e retorna o caminho do índice ("" se falhar).
+
+        Por omissão o relatório fica na pasta organizada; `output_dir` permite escrevê-lo
+        noutro sítio (por exemplo, numa pré-visualização que não deve tocar na pasta).
+        Com `metrics`, o tempo do relatório é somado à fase "report".
+        """
+        report_dir = Path(output_dir) if output_dir is not None else Path(report_data["source_folder"])
+        started = time.perf_counter()
         try:
-            with report_path.open('w', encoding='utf-8') as f:
-                f.write(html_template)
-            return str(report_path)
-        except IOError as e:
-            logging.error(f"Não foi possível escrever o relatório em '{report_path}': {e}")
-            return ""
\ No newline at end of file
+            return str(write_html_report(report_data, report_dir))
+        except OSError as e:
+            logging.error(f"Não foi possível escrever o relatório em '{report_dir}': {e}")
+            return ""
+        finally:
+            if metrics is not None:
+                metrics.add_time("report", time.perf_counter() - started, report_data.get("moved_count", 0))
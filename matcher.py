@@ -0,0 +1,467 @@
+# Ficheiro: matcher.py
+
+import json
+import logging
+import os
+import re
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from attributes import FILE_TYPES, TYPE_CATEGORIES, FileAttributes
+
+_NO_MATCH = -1
+# Chaves aceites em "conditions" numa regra.
+CONDITION_KEYS = ("min_size", "max_size", "modified_after", "modified_before", "older_than_days", "newer_than_days", "types")
+_SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "kb": 1024, "m": 1024 ** 2, "mb": 1024 ** 2, "g": 1024 ** 3, "gb": 1024 ** 3,
+               "t": 1024 ** 4, "tb": 1024 ** 4}
+_SIZE_PATTERN = re.compile(r"\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*")
+
+
+def fallback_folder(filename: str) -> str:
+    """Pasta usada quando nenhuma regra corresponde: a extensão em maiúsculas."""
+    # Mesma regra de PurePath.suffix, sem o custo de construir um caminho por ficheiro.
+    dot = filename.rfind('.')
+    extension = filename[dot:].lower().replace('.', '') if 0 < dot < len(filename) - 1 else ""
+    return extension.upper() if extension else "SEM_EXTENSAO"
+
+
+def parse_size(value: Any) -> int:
+    """Tamanho em bytes a partir de um número ou de um texto como "500KB" ou "1.5 GB" (potências de 1024)."""
+    if isinstance(value, bool):
+        raise ValueError(f"tamanho inválido: {value!r}")
+    if isinstance(value, (int, float)):
+        size = value
+    else:
+        found = _SIZE_PATTERN.fullmatch(str(value).lower())
+        if found is None or found.group(2) not in _SIZE_UNITS:
+            raise ValueError(f"tamanho inválido: {value!r}")
+        size = float(found.group(1)) * _SIZE_UNITS[found.group(2)]
+    if size < 0:
+        raise ValueError(f"tamanho inválido: {value!r}")
+    return int(size)
+
+
+def _parse_day(value: Any) -> date:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ValueError(f"data inválida (esperado AAAA-MM-DD): {value!r}") from None
+
+
+def _parse_days(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"número de dias inválido: {value!r}")
+    return value
+
+
+class RuleConditions:
+    """Condições de uma regra sobre o tamanho, a data de modificação e o tipo real do ficheiro.
+
+    Todas têm de se verificar (além de uma palavra-chave no nome, se a regra as tiver).
+    "min_size"/"max_size" são limites inclusivos; "modified_after" e "modified_before"
+    são datas (AAAA-MM-DD, a primeira incluída); "older_than_days"/"newer_than_days" são
+    convertidas em datas contadas a partir do início do dia `today`, para que o resultado
+    não mude ao longo do dia; "types" é uma lista de tipos ou categorias reconhecidos pelo
+    cabeçalho (ver `attributes.TYPE_CATEGORIES`). `canonical` é a forma normalizada, com
+    as datas relativas já resolvidas.
+    """
+
+    __slots__ = ("min_size", "max_size", "after", "before", "types", "relative", "canonical")
+
+    def __init__(self, conditions: Dict[str, Any], today: Optional[date] = None):
+        if not isinstance(conditions, dict):
+            raise ValueError("as condições devem ser um objeto")
+        unknown = sorted(set(conditions) - set(CONDITION_KEYS))
+        if unknown:
+            raise ValueError(f"condições desconhecidas: {', '.join(unknown)}")
+        today = today or date.today()
+        self.min_size = parse_size(conditions["min_size"]) if "min_size" in conditions else None
+        self.max_size = parse_size(conditions["max_size"]) if "max_size" in conditions else None
+
+        after = [_parse_day(conditions["modified_after"])] if "modified_after" in conditions else []
+        before = [_parse_day(conditions["modified_before"])] if "modified_before" in conditions else []
+        if "newer_than_days" in conditions:
+            after.append(today - timedelta(days=_parse_days(conditions["newer_than_days"])))
+        if "older_than_days" in conditions:
+            before.append(today - timedelta(days=_parse_days(conditions["older_than_days"])))
+        self.relative = "newer_than_days" in conditions or "older_than_days" in conditions
+        after_day, before_day = max(after, default=None), min(before, default=None)
+        self.after = datetime.combine(after_day, datetime.min.time()).timestamp() if after_day else None
+        self.before = datetime.combine(before_day, datetime.min.time()).timestamp() if before_day else None
+
+        types = conditions.get("types", [])
+        types = [types] if isinstance(types, str) else types
+        if not isinstance(types, list) or any(t not in FILE_TYPES for t in types):
+            raise ValueError(f"tipos inválidos: {types!r} (conhecidos: {', '.join(FILE_TYPES)})")
+        self.types = frozenset(types)
+
+        canonical: Dict[str, Any] = {}
+        for key, value in (("min_size", self.min_size), ("max_size", self.max_size),
+                           ("modified_after", after_day), ("modified_before", before_day)):
+            if value is not None:
+                canonical[key] = value.isoformat() if isinstance(value, date) else value
+        if self.types:
+            canonical["types"] = sorted(self.types)
+        self.canonical = canonical
+
+    @property
+    def needs_stat(self) -> bool:
+        return (self.min_size is not None or self.max_size is not None
+                or self.after is not None or self.before is not None)
+
+    def stat_matches(self, st: os.stat_result) -> bool:
+        return ((self.min_size is None or st.st_size >= self.min_size)
+                and (self.max_size is None or st.st_size <= self.max_size)
+                and (self.after is None or st.st_mtime >= self.after)
+                and (self.before is None or st.st_mtime < self.before))
+
+    def type_matches(self, file_type: Optional[str]) -> bool:
+        return file_type is not None and (file_type in self.types or TYPE_CATEGORIES.get(file_type) in self.types)
+
+
+def _rule_conditions(rule: Dict[str, Any], today: Optional[date] = None) -> Optional[RuleConditions]:
+    """As condições de uma regra (None se não tiver); ValueError se forem inválidas."""
+    conditions = rule.get("conditions")
+    return RuleConditions(conditions, today) if conditions else None
+
+
+def _rule_keywords(rule: Dict[str, Any], conditional: bool) -> List[str]:
+    # Uma regra só com condições aplica-se a qualquer nome: "" é substring de todos.
+    keywords = [keyword for keyword in rule.get("keywords", []) if isinstance(keyword, str)]
+    return keywords if keywords or not conditional else [""]
+
+
+def resolve_rules(rules: Iterable[Dict[str, Any]], today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Cópia das regras com as condições na forma canónica (datas relativas resolvidas para `today`).
+
+    Duas execuções com o mesmo resultado possível da classificação dão as mesmas regras
+    resolvidas, mesmo que "older_than_days" seja escrito de outra forma; uma regra com
+    condições inválidas fica com {"invalid": true} (nunca corresponde).
+    """
+    resolved = []
+    for rule in rules:
+        if not isinstance(rule, dict) or "folder" not in rule:
+            continue
+        rule = dict(rule)
+        try:
+            conditions = _rule_conditions(rule, today)
+        except ValueError:
+            rule["conditions"] = {"invalid": True}
+        else:
+            if conditions is None or not conditions.canonical:
+                rule.pop("conditions", None)
+            else:
+                rule["conditions"] = conditions.canonical
+        resolved.append(rule)
+    return resolved
+
+
+def _keyword_chains(rules: Iterable[Dict[str, Any]]) -> Dict[str, List[Tuple[int, str, bool]]]:
+    """{palavra-chave: [(índice, destino, com condições)]} das regras que a contêm, até à primeira sem condições.
+
+    Sem condições basta a primeira regra; com condições um nome pode passar às regras
+    seguintes que têm a mesma palavra-chave. O destino junta a pasta às condições: a mesma
+    palavra-chave com outras condições pode levar o mesmo nome a outra pasta. As regras só
+    com condições contam com a palavra-chave "", que está em todos os nomes.
+    """
+    chains: Dict[str, List[Tuple[int, str, bool]]] = {}
+    closed: Set[str] = set()
+    for rule_index, rule in enumerate(resolve_rules(rules)):
+        conditions = rule.get("conditions")
+        outcome = json.dumps([rule["folder"], conditions], sort_keys=True, ensure_ascii=False) if conditions else rule["folder"]
+        for keyword in _rule_keywords(rule, bool(conditions)):
+            if keyword in closed:
+                continue
+            chains.setdefault(keyword, []).append((rule_index, outcome, bool(conditions)))
+            if not conditions:
+                closed.add(keyword)
+    return chains
+
+
+def _precedence(first: List[Tuple[int, str, bool]], second: List[Tuple[int, str, bool]]) -> Tuple[int, ...]:
+    """De que palavra-chave vem cada regra candidata de um nome com as duas, até à primeira sem condições."""
+    merged = sorted([(index, 0, conditional) for index, _, conditional in first]
+                    + [(index, 1, conditional) for index, _, conditional in second])
+    pattern = []
+    for _, which, conditional in merged:
+        pattern.append(which)
+        if not conditional:
+            break
+    return tuple(pattern)
+
+
+def _crossed(items: List[Tuple[int, int, str, str]]) -> Set[str]:
+    """Palavras-chave que trocaram de ordem com outra de destino diferente.
+
+    Cada item é (índice antigo, índice novo, destino, palavra-chave), de cadeias com uma só
+    regra. Percorre-se a ordem antiga nos dois sentidos, guardando o índice novo mais
+    extremo já visto e o mais extremo de outro destino: n log n em vez de comparar todos os pares.
+    """
+    crossed: Set[str] = set()
+    for sign in (1, -1):
+        ordered = sorted(items, key=lambda item: sign * item[0])
+        # (índice novo com sinal, destino) máximo e o máximo entre os de outro destino.
+        best: Optional[Tuple[int, str]] = None
+        rival: Optional[Tuple[int, str]] = None
+        start = 0
+        while start < len(ordered):
+            # As palavras-chave da mesma regra antiga não se comparam entre si.
+            end = start
+            while end < len(ordered) and ordered[end][0] == ordered[start][0]:
+                end += 1
+            group = ordered[start:end]
+            for _, new, outcome, keyword in group:
+                other = best if best is not None and best[1] != outcome else rival
+                if other is not None and other[0] > sign * new:
+                    crossed.add(keyword)
+            for _, new, outcome, _ in group:
+                value = (sign * new, outcome)
+                if best is None or value[0] > best[0]:
+                    if best is not None and best[1] != outcome:
+                        rival = best
+                    best = value
+                elif outcome != best[1] and (rival is None or value[0] > rival[0]):
+                    rival = value
+            start = end
+    return crossed
+
+
+def changed_keywords(old_rules: Iterable[Dict[str, Any]], new_rules: Iterable[Dict[str, Any]]) -> Set[str]:
+    """Palavras-chave que podem mudar o destino de algum nome entre dois conjuntos de regras.
+
+    São as acrescentadas, as removidas, as que mudaram de pasta ou de condições e as que
+    trocaram de precedência com uma palavra-chave de outro destino. Um nome que não
+    contenha nenhuma delas tem o mesmo destino com os dois conjuntos.
+    """
+    old, new = _keyword_chains(old_rules), _keyword_chains(new_rules)
+
+    def outcomes(chain: List[Tuple[int, str, bool]]) -> List[str]:
+        return [outcome for _, outcome, _ in chain]
+
+    changed = {keyword for keyword in old.keys() | new.keys()
+               if keyword not in old or keyword not in new or outcomes(old[keyword]) != outcomes(new[keyword])}
+    common = [keyword for keyword in old if keyword not in changed]
+    # Quase todas as cadeias têm uma só regra: a precedência entre duas é só a ordem dos índices.
+    single = [keyword for keyword in common if len(old[keyword]) == 1]
+    changed |= _crossed([(old[keyword][0][0], new[keyword][0][0], old[keyword][0][1], keyword) for keyword in single])
+    # As cadeias mais longas vêm de regras com condições, que são poucas: comparam-se com todas.
+    longer = [keyword for keyword in common if len(old[keyword]) > 1]
+    for i, first in enumerate(longer):
+        for second in single + longer[i + 1:]:
+            if outcomes(old[first]) == outcomes(old[second]):
+                continue
+            if _precedence(old[first], old[second]) != _precedence(new[first], new[second]):
+                changed.update((first, second))
+    return changed
+
+
+class RuleMatcher:
+    """Compila as regras uma única vez e classifica nomes de ficheiros sem percorrer cada palavra-chave.
+
+    As palavras-chave que começam por '.' são tratadas como sufixos e resolvidas com uma
+    tabela de dispersão por comprimento; as restantes são procuradas como substrings num
+    autómato Aho-Corasick. Em ambos os casos guarda-se o índice da primeira regra que as
+    contém, pelo que a ordem "primeira regra ganha" é a mesma do ciclo original.
+
+    As regras com "conditions" (ver `RuleConditions`) ficam fora do autómato: como são
+    poucas, as suas palavras-chave são verificadas diretamente, e só para os nomes em que
+    aparecem antes da primeira regra sem condições que corresponde. As datas relativas são
+    resolvidas para o dia `today` (por omissão, o da compilação; ver `is_stale`).
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = (), today: Optional[date] = None):
+        self.today = today or date.today()
+        self.folders: List[str] = []
+        # Regras com condições, por ordem: (índice, condições, substrings, sufixos).
+        self._conditional: List[Tuple[int, RuleConditions, Tuple[str, ...], Tuple[str, ...]]] = []
+        # Há condições com datas relativas ("older_than_days"), que mudam com o dia.
+        self.relative = False
+        # Autómato: transições, ligações de falha e a menor regra que termina em cada nó.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[int] = [_NO_MATCH]
+        # Sufixos agrupados por comprimento: {comprimento: {sufixo: índice_da_regra}}.
+        self._suffixes: Dict[int, Dict[str, int]] = {}
+        self._suffix_lengths: Tuple[int, ...] = ()
+        self._compile(rules)
+
+    def _compile(self, rules: Iterable[Dict[str, Any]]) -> None:
+        for rule in rules:
+            if not isinstance(rule, dict) or "folder" not in rule:
+                continue
+            rule_index = len(self.folders)
+            self.folders.append(rule["folder"])
+            try:
+                conditions = _rule_conditions(rule, self.today)
+            except ValueError as e:
+                logging.error(f"Regra da pasta '{rule['folder']}' ignorada: condições inválidas ({e}).")
+                continue
+            if conditions is not None and conditions.canonical:
+                keywords = _rule_keywords(rule, True)
+                self._conditional.append((rule_index, conditions,
+                                          tuple(keyword for keyword in keywords if not keyword.startswith('.')),
+                                          tuple(keyword for keyword in keywords if keyword.startswith('.'))))
+                self.relative = self.relative or conditions.relative
+                continue
+            for keyword in rule.get("keywords", []):
+                if not isinstance(keyword, str):
+                    continue
+                if keyword.startswith('.'):
+                    table = self._suffixes.setdefault(len(keyword), {})
+                    table.setdefault(keyword, rule_index)
+                else:
+                    self._add_substring(keyword, rule_index)
+        self._suffix_lengths = tuple(sorted(self._suffixes))
+        self._build_failure_links()
+
+    def _add_substring(self, keyword: str, rule_index: int) -> None:
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(_NO_MATCH)
+                self._goto[node][char] = next_node
+            node = next_node
+        if self._out[node] == _NO_MATCH or rule_index < self._out[node]:
+            self._out[node] = rule_index
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Propaga a melhor regra através da ligação de falha (sufixos do caminho atual).
+                inherited = self._out[self._fail[child]]
+                if inherited != _NO_MATCH and (self._out[child] == _NO_MATCH or inherited < self._out[child]):
+                    self._out[child] = inherited
+
+    def _match_index(self, filename_lower: str) -> int:
+        best = self._out[0]
+        for length in self._suffix_lengths:
+            rule_index = self._suffixes[length].get(filename_lower[-length:])
+            if rule_index is not None and (best == _NO_MATCH or rule_index < best):
+                best = rule_index
+        if best == 0 or len(self._goto) == 1:
+            return best
+
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for char in filename_lower:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found = out[node]
+            if found != _NO_MATCH and (best == _NO_MATCH or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+    @property
+    def has_conditions(self) -> bool:
+        return bool(self._conditional)
+
+    def is_stale(self) -> bool:
+        """True se as regras têm datas relativas e o dia mudou desde a compilação."""
+        return self.relative and date.today() != self.today
+
+    def _candidates(self, filename_lower: str, best: int) -> List[Tuple[int, RuleConditions]]:
+        """Regras com condições cujo nome corresponde e que vêm antes da regra `best` (sem condições)."""
+        candidates = []
+        for rule_index, conditions, substrings, suffixes in self._conditional:
+            if best != _NO_MATCH and rule_index > best:
+                break
+            if filename_lower.endswith(suffixes):
+                candidates.append((rule_index, conditions))
+                continue
+            for keyword in substrings:
+                if keyword in filename_lower:
+                    candidates.append((rule_index, conditions))
+                    break
+        return candidates
+
+    def _folder_of(self, rule_index: int, filename: str) -> str:
+        return self.folders[rule_index] if rule_index != _NO_MATCH else fallback_folder(filename)
+
+    def decided_by_name(self, filename: str) -> bool:
+        """True se o destino do nome não depende de nenhuma condição (tamanho, data ou tipo)."""
+        if not self._conditional:
+            return True
+        filename_lower = filename.lower()
+        return not self._candidates(filename_lower, self._match_index(filename_lower))
+
+    def classify_entries(self, entries: Sequence[Any], attributes: FileAttributes) -> List[str]:
+        """Classifica entradas de pasta (`os.DirEntry` ou `attributes.PathEntry`), com as condições.
+
+        Cada atributo só é lido quando uma regra candidata precisa dele, do mais barato para
+        o mais caro: o nome decide sozinho a maioria dos ficheiros; o stat (já guardado no
+        `DirEntry`) só é pedido para os nomes com uma regra com condições candidata; o
+        cabeçalho só é lido para os ficheiros que chegam a uma condição de tipo, de uma vez
+        para o lote inteiro. Se o ficheiro desaparecer, as regras com condições não contam.
+        """
+        if not self._conditional:
+            return self.classify_batch([entry.name for entry in entries])
+        results: List[str] = []
+        # (posição, entrada, stat, candidatas ainda por decidir, melhor regra sem condições)
+        waiting = []
+        for entry in entries:
+            filename_lower = entry.name.lower()
+            best = self._match_index(filename_lower)
+            chosen = best
+            candidates = self._candidates(filename_lower, best)
+            st = attributes.stat(entry) if candidates else None
+            for position, (rule_index, conditions) in enumerate(candidates if st is not None else ()):
+                if conditions.needs_stat and not conditions.stat_matches(st):
+                    continue
+                if conditions.types:
+                    waiting.append((len(results), entry, st, candidates[position:], best))
+                    chosen = None
+                else:
+                    chosen = rule_index
+                break
+            results.append(self._folder_of(chosen, entry.name) if chosen is not None else "")
+        if not waiting:
+            return results
+
+        file_types = attributes.types([(entry.path, st) for _, entry, st, _, _ in waiting])
+        for (position, entry, st, candidates, best), file_type in zip(waiting, file_types):
+            chosen = next((rule_index for rule_index, conditions in candidates
+                           if (not conditions.needs_stat or conditions.stat_matches(st))
+                           and (not conditions.types or conditions.type_matches(file_type))), best)
+            results[position] = self._folder_of(chosen, entry.name)
+        return results
+
+    def match(self, filename: str) -> Optional[str]:
+        """Devolve a pasta da primeira regra sem condições que corresponde ao nome, ou None.
+
+        Só com o nome não há como verificar condições; para elas, ver `classify_entries`.
+        """
+        rule_index = self._match_index(filename.lower())
+        return None if rule_index == _NO_MATCH else self.folders[rule_index]
+
+    def classify(self, filename: str) -> str:
+        """Como `match`, mas recorre à pasta por extensão quando nenhuma regra corresponde."""
+        folder = self.match(filename)
+        return folder if folder is not None else fallback_folder(filename)
+
+    def classify_batch(self, filenames: Iterable[str]) -> List[str]:
+        """Classifica um lote de nomes numa só chamada, reaproveitando resultados de nomes repetidos."""
+        seen: Dict[str, str] = {}
+        results = []
+        for filename in filenames:
+            folder = seen.get(filename)
+            if folder is None:
+                folder = self.classify(filename)
+                seen[filename] = folder
+            results.append(folder)
+        return results
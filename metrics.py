@@ -0,0 +1,195 @@
+# Ficheiro: metrics.py
+
+import json
+import math
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, TypeVar, Union
+
+# Fases medidas numa organização, pela ordem em que aparecem nos resumos.
+PHASES = ("scan", "index", "match", "dedup", "mkdir", "collisions", "move_rename", "move_copy", "report")
+# Resolução do histograma de latências: 8 intervalos por potência de 2 (erro máximo ~9%).
+_BUCKETS_PER_OCTAVE = 8
+_MIN_LATENCY = 1e-7
+
+T = TypeVar("T")
+# Recebe (evento, dados): "batch" depois de cada lote lido da pasta e "finish" com o resumo final.
+MetricsHook = Callable[[str, Dict[str, Any]], None]
+
+
+class LatencyHistogram:
+    """Histograma logarítmico de durações: memória constante e percentis com erro relativo limitado."""
+
+    def __init__(self):
+        self.buckets: Counter = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[int(math.log2(max(seconds, _MIN_LATENCY) / _MIN_LATENCY) * _BUCKETS_PER_OCTAVE)] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Limite superior do intervalo onde cai o percentil pedido (nunca acima do máximo observado)."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, _MIN_LATENCY * 2 ** ((bucket + 1) / _BUCKETS_PER_OCTAVE))
+        return self.max
+
+
+class RunMetrics:
+    """Tempos por fase, contadores e latência por ficheiro de uma organização.
+
+    É opcional: sem um `RunMetrics`, a lógica não mede nada para além de um teste
+    `is not None` por lote ou por ficheiro. Os tempos de fase excluem o tempo em que o
+    gerador está suspenso à espera de quem consome os eventos (a interface, por exemplo).
+    Os movimentos feitos em paralelo somam o tempo de cada thread, por isso as fases
+    "move_*" podem ultrapassar a duração total.
+    """
+
+    def __init__(self, hooks: Iterable[MetricsHook] = ()):
+        self.hooks: List[MetricsHook] = list(hooks)
+        self.phase_seconds: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.phase_items: Dict[str, int] = {phase: 0 for phase in PHASES}
+        self.counters: Counter = Counter()
+        self.bytes_moved: Dict[str, int] = {"rename": 0, "copy": 0}
+        self.move_latency = LatencyHistogram()
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        self.hooks.append(hook)
+
+    def _emit(self, event: str, data: Dict[str, Any]) -> None:
+        for hook in self.hooks:
+            hook(event, data)
+
+    def add_time(self, phase: str, seconds: float, items: int = 1) -> None:
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+        self.phase_items[phase] = self.phase_items.get(phase, 0) + items
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def timed(self, phase: str, iterable: Iterable[T], size: Callable[[T], int] = lambda item: 1) -> Generator[T, None, None]:
+        """Percorre `iterable` somando a `phase` só o tempo gasto a obter cada elemento."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(phase, time.perf_counter() - started, 0)
+                return
+            self.add_time(phase, time.perf_counter() - started, size(item))
+            yield item
+
+    def record_move(self, method: str, seconds: float, size: int) -> None:
+        self.add_time("move_copy" if method == "copy" else "move_rename", seconds)
+        self.move_latency.add(seconds)
+        if size >= 0:
+            self.bytes_moved["copy" if method == "copy" else "rename"] += size
+
+    def batch_done(self, files: int) -> None:
+        if self.hooks:
+            self._emit("batch", {"files": files, "phase_seconds": dict(self.phase_seconds)})
+
+    def finish(self) -> Dict[str, Any]:
+        """Fecha a medição da organização (o relatório ainda pode ser somado) e devolve o resumo."""
+        self.duration = time.perf_counter() - self._started
+        summary = self.summary()
+        self._emit("finish", summary)
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        duration = self.duration if self.duration is not None else time.perf_counter() - self._started
+        moved = self.move_latency.count
+        total_bytes = sum(self.bytes_moved.values())
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": duration,
+            "phases": {phase: {"seconds": self.phase_seconds[phase], "items": self.phase_items[phase]}
+                       for phase in self.phase_seconds},
+            "counters": dict(self.counters),
+            "bytes_moved": dict(self.bytes_moved, total=total_bytes),
+            "throughput": {"files_per_second": moved / duration if duration > 0 else None,
+                           "bytes_per_second": total_bytes / duration if duration > 0 else None},
+            "move_latency_seconds": {"count": moved, "sum": self.move_latency.total,
+                                     "p50": self.move_latency.percentile(0.5),
+                                     "p99": self.move_latency.percentile(0.99),
+                                     "max": self.move_latency.max if moved else None},
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self, labels: Optional[Dict[str, str]] = None) -> str:
+        """Texto no formato de exposição do Prometheus, para o coletor "textfile" do node_exporter."""
+        summary = self.summary()
+        base = "".join(f',{key}="{_escape_label(value)}"' for key, value in sorted((labels or {}).items()))
+
+        def series(key: str = "", value: Any = "") -> str:
+            extra = f'{key}="{_escape_label(value)}"' if key else ""
+            content = (extra + base).lstrip(",")
+            return f"{{{content}}}" if content else ""
+
+        lines = ["# HELP filesorter_phase_seconds Tempo gasto em cada fase da última organização.",
+                 "# TYPE filesorter_phase_seconds gauge"]
+        lines += [f'filesorter_phase_seconds{series("phase", phase)} {values["seconds"]:.6f}'
+                  for phase, values in summary["phases"].items()]
+        lines += ["# HELP filesorter_phase_items Elementos tratados em cada fase da última organização.",
+                  "# TYPE filesorter_phase_items gauge"]
+        lines += [f'filesorter_phase_items{series("phase", phase)} {values["items"]}'
+                  for phase, values in summary["phases"].items()]
+        lines += ["# HELP filesorter_run_count Contadores da última organização (ficheiros, pastas criadas, erros).",
+                  "# TYPE filesorter_run_count gauge"]
+        lines += [f'filesorter_run_count{series("kind", name)} {value}' for name, value in sorted(summary["counters"].items())]
+        lines += ["# HELP filesorter_bytes_moved Bytes movidos na última organização, por método.",
+                  "# TYPE filesorter_bytes_moved gauge"]
+        lines += [f'filesorter_bytes_moved{series("method", method)} {summary["bytes_moved"][method]}'
+                  for method in ("rename", "copy")]
+        latency = summary["move_latency_seconds"]
+        lines += ["# HELP filesorter_move_latency_seconds Duração de cada movimento na última organização.",
+                  "# TYPE filesorter_move_latency_seconds summary"]
+        for key, quantile in (("p50", "0.5"), ("p99", "0.99")):
+            if latency[key] is not None:
+                lines.append(f'filesorter_move_latency_seconds{series("quantile", quantile)} {latency[key]:.9f}')
+        lines.append(f"filesorter_move_latency_seconds_sum{series()} {latency['sum']:.6f}")
+        lines.append(f"filesorter_move_latency_seconds_count{series()} {latency['count']}")
+        lines += ["# HELP filesorter_run_duration_seconds Duração da última organização.",
+                  "# TYPE filesorter_run_duration_seconds gauge",
+                  f"filesorter_run_duration_seconds{series()} {summary['duration_seconds']:.6f}",
+                  "# HELP filesorter_last_run_timestamp_seconds Início da última organização (época Unix).",
+                  "# TYPE filesorter_last_run_timestamp_seconds gauge",
+                  f"filesorter_last_run_timestamp_seconds{series()} {summary['started_at']:.3f}"]
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: Union[str, Path]) -> None:
+        _write_atomically(Path(path), self.to_json() + "\n")
+
+    def write_prometheus(self, path: Union[str, Path], labels: Optional[Dict[str, str]] = None) -> None:
+        _write_atomically(Path(path), self.to_prometheus(labels))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_atomically(path: Path, text: str) -> None:
+    # O coletor textfile pode ler o ficheiro a qualquer momento; nunca deve ver meio ficheiro.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(text, encoding="utf-8")
+    os.replace(temporary, path)
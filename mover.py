@@ -0,0 +1,381 @@
+# Ficheiro: mover.py
+
+import errno
+import os
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Event, Lock
+from typing import IO, TYPE_CHECKING, Dict, Generator, Iterable, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+if TYPE_CHECKING:
+    from collisions import DestinationNameIndex
+
+COPY_BUFFER_SIZE = 1024 * 1024
+MAX_MOVE_ATTEMPTS = 20
+# Métodos de cópia entre sistemas de ficheiros, do mais barato ao mais caro.
+COPY_METHODS = ("reflink", "copy_file_range", "sendfile", "buffered")
+# "auto" começa pelo primeiro; escolher um método começa por ele e continua pelos seguintes.
+COPY_BACKENDS = ("auto",) + COPY_METHODS
+# Ficheiros a partir deste tamanho podem ser copiados em blocos paralelos (ver FileCopier).
+PARALLEL_COPY_THRESHOLD = 256 * 1024 * 1024
+PARALLEL_CHUNK_SIZE = 64 * 1024 * 1024
+# Máximo por chamada a copy_file_range/sendfile (o Linux não passa de ~2 GiB por chamada).
+_MAX_KERNEL_COPY = 1024 * 1024 * 1024
+# ioctl FICLONE do Linux: o destino partilha os blocos da origem (btrfs, XFS, bcachefs).
+FICLONE = 0x40049409
+# Erros que querem dizer "este método não serve entre estes dois sistemas de ficheiros".
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF,
+                       getattr(errno, "ENOTSOCK", errno.EOPNOTSUPP), getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+
+class FileCopier:
+    """Copia o conteúdo de um ficheiro para outro sistema de ficheiros pelo método mais barato disponível.
+
+    Os métodos são tentados por esta ordem: reflink (FICLONE, instantâneo em sistemas
+    copy-on-write), `os.copy_file_range` e `os.sendfile` (a cópia fica no kernel, sem passar
+    pelo espaço do utilizador) e, por fim, uma cópia com um buffer reutilizado. Um método
+    recusado entre dois dispositivos não volta a ser tentado para esse par.
+
+    Com `chunk_workers` > 1, os ficheiros com pelo menos `parallel_threshold` bytes são
+    copiados em blocos de PARALLEL_CHUNK_SIZE por várias threads (com copy_file_range
+    ou pread/pwrite). `used` conta quantos ficheiros foram copiados com cada método.
+    """
+
+    def __init__(self, backend: str = "auto", chunk_workers: int = 1,
+                 parallel_threshold: int = PARALLEL_COPY_THRESHOLD, buffer_size: int = COPY_BUFFER_SIZE):
+        if backend not in COPY_BACKENDS:
+            raise ValueError(f"Método de cópia desconhecido: '{backend}'.")
+        self.backend = backend
+        self.chunk_workers = max(1, chunk_workers)
+        self.parallel_threshold = parallel_threshold
+        self.buffer_size = buffer_size
+        self.used: Counter = Counter()
+        self._unsupported: Set[Tuple[str, int, int]] = set()
+        self._lock = Lock()
+
+    def _methods(self) -> Tuple[str, ...]:
+        available = {"reflink": fcntl is not None, "copy_file_range": hasattr(os, "copy_file_range"),
+                     "sendfile": hasattr(os, "sendfile"), "buffered": True}
+        start = 0 if self.backend == "auto" else COPY_METHODS.index(self.backend)
+        return tuple(method for method in COPY_METHODS[start:] if available[method])
+
+    def copy(self, source: Path, destination: Path) -> str:
+        """Copia `source` para `destination` (que não pode existir) e devolve o método usado.
+
+        O destino só fica se tiver exatamente o tamanho da origem e se a origem não mudou
+        durante a cópia; é sincronizado com o disco e recebe as permissões, datas, atributos
+        estendidos e, se possível, o dono da origem. Em qualquer falha é apagado.
+        """
+        # 'xb' garante que um ficheiro criado entretanto por outro processo não é sobrescrito.
+        with open(source, 'rb') as src, open(destination, 'xb') as dst:
+            try:
+                before = os.fstat(src.fileno())
+                method, copied = self._copy_data(src, dst, before)
+                dst.flush()
+                after = os.fstat(src.fileno())
+                written = os.fstat(dst.fileno())
+                if copied != before.st_size or written.st_size != before.st_size:
+                    raise OSError(errno.EIO, f"Cópia incompleta: {written.st_size} de {before.st_size} bytes", str(source))
+                if (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+                    raise OSError(errno.EAGAIN, "A origem foi alterada durante a cópia", str(source))
+                if hasattr(os, "fchown") and (written.st_uid, written.st_gid) != (before.st_uid, before.st_gid):
+                    try:
+                        os.fchown(dst.fileno(), before.st_uid, before.st_gid)
+                    except PermissionError:
+                        pass
+                os.fsync(dst.fileno())
+            except BaseException:
+                dst.close()
+                os.unlink(destination)
+                raise
+        try:
+            shutil.copystat(source, destination)
+        except BaseException:
+            os.unlink(destination)
+            raise
+        with self._lock:
+            self.used[method] += 1
+        return method
+
+    def _copy_data(self, src: IO[bytes], dst: IO[bytes], st: os.stat_result) -> Tuple[str, int]:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        devices = (st.st_dev, os.fstat(dst_fd).st_dev)
+        parallel = (self.chunk_workers > 1 and st.st_size >= self.parallel_threshold and hasattr(os, "pread"))
+        methods = self._methods()
+        for method in methods:
+            if (method, *devices) in self._unsupported:
+                continue
+            try:
+                if method == "reflink":
+                    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+                    return method, os.fstat(dst_fd).st_size
+                if parallel and method != "sendfile":
+                    return method, self._copy_in_chunks(method, src_fd, dst_fd, st.st_size)
+                if method == "buffered":
+                    return method, self._copy_buffered(src, dst)
+                return method, self._copy_range(method, src_fd, dst_fd, 0, st.st_size)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS or method == methods[-1]:
+                    raise
+                self._unsupported.add((method, *devices))
+                # O método pode ter falhado a meio: recomeça do início com o destino vazio.
+                dst.flush()
+                os.ftruncate(dst_fd, 0)
+                dst.seek(0)
+                src.seek(0)
+        raise OSError(errno.ENOTSUP, "Nenhum método de cópia disponível")
+
+    @staticmethod
+    def _copy_range(method: str, src_fd: int, dst_fd: int, start: int, end: int) -> int:
+        """Copia [start, end) dentro do kernel; devolve os bytes copiados (menos se a origem encolheu)."""
+        position = start
+        while position < end:
+            count = min(end - position, _MAX_KERNEL_COPY)
+            if method == "copy_file_range":
+                copied = os.copy_file_range(src_fd, dst_fd, count, position, position)
+            else:
+                # sendfile escreve na posição atual do destino, por isso só serve para cópias sequenciais.
+                copied = os.sendfile(dst_fd, src_fd, position, count)
+            if not copied:
+                break
+            position += copied
+        return position - start
+
+    def _copy_buffered(self, src: IO[bytes], dst: IO[bytes]) -> int:
+        buffer = bytearray(self.buffer_size)
+        total = 0
+        with memoryview(buffer) as view:
+            while True:
+                count = src.readinto(buffer)
+                if not count:
+                    return total
+                dst.write(view[:count])
+                total += count
+
+    def _copy_slice(self, method: str, src_fd: int, dst_fd: int, start: int, end: int) -> int:
+        if method == "copy_file_range":
+            return self._copy_range(method, src_fd, dst_fd, start, end)
+        position = start
+        while position < end:
+            data = os.pread(src_fd, min(self.buffer_size, end - position), position)
+            if not data:
+                break
+            with memoryview(data) as view:
+                written = 0
+                while written < len(data):
+                    written += os.pwrite(dst_fd, view[written:], position + written)
+            position += len(data)
+        return position - start
+
+    def _copy_in_chunks(self, method: str, src_fd: int, dst_fd: int, size: int) -> int:
+        os.ftruncate(dst_fd, size)
+        slices = [(start, min(start + PARALLEL_CHUNK_SIZE, size)) for start in range(0, size, PARALLEL_CHUNK_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.chunk_workers, thread_name_prefix="copy-chunk") as pool:
+            results = list(pool.map(lambda piece: self._copy_slice(method, src_fd, dst_fd, *piece), slices))
+        # Com o destino já no tamanho final, só a soma dos blocos mostra se a origem encolheu.
+        return sum(results)
+
+
+_DEFAULT_COPIER = FileCopier()
+
+
+def _copy_then_unlink(source: Path, destination: Path, copier: Optional[FileCopier] = None) -> None:
+    if os.path.islink(source):
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(destination))
+        shutil.move(str(source), str(destination))
+        return
+    (copier or _DEFAULT_COPIER).copy(source, destination)
+    # A origem só é apagada depois de a cópia ter sido verificada e sincronizada.
+    os.unlink(source)
+
+
+def move_file(source: Path, destination: Path, copier: Optional[FileCopier] = None) -> str:
+    """Move um ficheiro sem nunca sobrescrever o destino e devolve o método usado ("rename" ou "copy").
+
+    Dentro do mesmo sistema de ficheiros é uma operação só de metadados; a cópia seguida de
+    remoção só é usada quando o destino está noutro dispositivo, com o `copier` indicado (por
+    omissão, um `FileCopier` em modo "auto"). Se o destino já existir é lançado
+    `FileExistsError`, para que quem chama possa escolher outro nome.
+    """
+    if os.name == "nt":
+        # No Windows o próprio os.rename recusa destinos existentes.
+        try:
+            os.rename(source, destination)
+            return "rename"
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        _copy_then_unlink(source, destination, copier)
+        return "copy"
+
+    # Em POSIX o rename sobrescreve em silêncio; link + unlink falha com EEXIST.
+    try:
+        os.link(source, destination, follow_symlinks=False)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno == errno.EXDEV:
+            _copy_then_unlink(source, destination, copier)
+            return "copy"
+        # Sistemas de ficheiros sem hard links (FAT, algumas partilhas de rede).
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(destination))
+        os.rename(source, destination)
+        return "rename"
+    os.unlink(source)
+    return "rename"
+
+
+def same_file(first: Path, second: Path) -> bool:
+    """True se os dois nomes são o mesmo inode, sem seguir ligações simbólicas.
+
+    É o que fica de um `move_file` interrompido entre o link e o unlink: o ficheiro já tem
+    o nome novo e basta apagar o antigo, em vez de o mover outra vez para "nome (1)".
+    """
+    try:
+        first_stat, second_stat = os.lstat(first), os.lstat(second)
+    except OSError:
+        return False
+    return (first_stat.st_dev, first_stat.st_ino) == (second_stat.st_dev, second_stat.st_ino)
+
+
+def move_without_collision(source: Path, destination: Path, name_index: "DestinationNameIndex",
+                           copier: Optional[FileCopier] = None) -> Tuple[Path, str]:
+    """Move `source` para `destination`, escolhendo outro nome se entretanto alguém o ocupou.
+
+    Devolve o caminho final e o método usado por `move_file`.
+    """
+    for _ in range(MAX_MOVE_ATTEMPTS):
+        try:
+            return destination, move_file(source, destination, copier)
+        except FileExistsError:
+            name_index.mark_taken(destination)
+            destination = name_index.reserve(destination.parent, source.name)
+    raise FileExistsError(errno.EEXIST, f"Não foi encontrado um nome livre para '{source.name}'", str(destination.parent))
+
+
+@dataclass
+class MoveResult:
+    source: Path
+    destination: Path
+    method: str = ""
+    error: Optional[BaseException] = None
+    cancelled: bool = False
+    # Só preenchidos quando o movimento é medido: duração e tamanho do ficheiro (-1 se desconhecido).
+    seconds: float = 0.0
+    size: int = -1
+
+
+def run_move(source: Path, destination: Path, name_index: Optional["DestinationNameIndex"] = None,
+             measure: bool = False, copier: Optional[FileCopier] = None) -> MoveResult:
+    """Move um ficheiro e devolve o resultado em vez de lançar exceções.
+
+    Com `measure`, o resultado inclui a duração do movimento e o tamanho do ficheiro
+    (um lstat() extra por ficheiro).
+    """
+    size = -1
+    if measure:
+        try:
+            size = os.lstat(source).st_size
+        except OSError:
+            pass
+        started = time.perf_counter()
+    try:
+        if name_index is None:
+            result = MoveResult(source, destination, method=move_file(source, destination, copier))
+        else:
+            final_destination, method = move_without_collision(source, destination, name_index, copier)
+            result = MoveResult(source, final_destination, method=method)
+    except Exception as e:
+        result = MoveResult(source, destination, error=e)
+    if measure:
+        result.seconds = time.perf_counter() - started
+        result.size = size
+    return result
+
+
+class ParallelMoveExecutor:
+    """Executa movimentos planeados em paralelo, com concorrência limitada por sistema de ficheiros.
+
+    Cada dispositivo de destino (`st_dev`) tem o seu próprio conjunto de threads, com o
+    tamanho definido em `per_device_limits` ou, na sua falta, `default_concurrency`.
+    """
+
+    def __init__(self, default_concurrency: int = 4, per_device_limits: Optional[Dict[int, int]] = None):
+        if default_concurrency < 1:
+            raise ValueError("A concorrência por dispositivo tem de ser pelo menos 1.")
+        self.default_concurrency = default_concurrency
+        self.per_device_limits = dict(per_device_limits or {})
+        self._device_cache: Dict[Path, int] = {}
+
+    def _device_of(self, folder: Path) -> int:
+        device = self._device_cache.get(folder)
+        if device is None:
+            device = os.stat(folder).st_dev
+            self._device_cache[folder] = device
+        return device
+
+    def _limit_for(self, device: int) -> int:
+        return max(1, self.per_device_limits.get(device, self.default_concurrency))
+
+    @staticmethod
+    def _run_one(source: Path, destination: Path, cancel_event: Event,
+                 name_index: Optional["DestinationNameIndex"], measure: bool = False,
+                 copier: Optional[FileCopier] = None) -> MoveResult:
+        if cancel_event.is_set():
+            return MoveResult(source, destination, cancelled=True)
+        return run_move(source, destination, name_index, measure, copier)
+
+    def run(self, moves: Iterable[Tuple[Path, Path]], cancel_event: Event,
+            name_index: Optional["DestinationNameIndex"] = None,
+            measure: bool = False, copier: Optional[FileCopier] = None) -> Generator[MoveResult, None, None]:
+        """Submete os movimentos `(origem, destino)` e devolve os resultados à medida que terminam.
+
+        Com `name_index`, um destino ocupado entretanto por outro processo leva a escolher
+        um novo nome em vez de falhar. Com `measure`, cada resultado traz a duração e o
+        tamanho (ver `run_move`). `copier` é usado nos movimentos entre dispositivos.
+
+        Mantém no máximo o dobro das threads disponíveis em voo, para não materializar
+        todo o plano em futures. Depois de `cancel_event` ser ativado não é submetido mais
+        nada e os movimentos ainda em fila são devolvidos como cancelados.
+        """
+        pools: Dict[int, ThreadPoolExecutor] = {}
+        pending: Set[Future] = set()
+        capacity = 0
+        try:
+            for source, destination in moves:
+                if cancel_event.is_set():
+                    # Já foi lido do plano: também tem de ter um resultado.
+                    yield MoveResult(source, destination, cancelled=True)
+                    break
+                device = self._device_of(destination.parent)
+                pool = pools.get(device)
+                if pool is None:
+                    limit = self._limit_for(device)
+                    pool = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"mover-{device}")
+                    pools[device] = pool
+                    capacity += limit
+                pending.add(pool.submit(self._run_one, source, destination, cancel_event, name_index, measure, copier))
+
+                while len(pending) >= 2 * capacity:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
@@ -0,0 +1,85 @@
+# Ficheiro: planner.py
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+PLAN_FORMAT = "filesorter-plan"
+PLAN_VERSION = 1
+
+# (origem relativa à pasta, pasta de destino, nome final)
+PlannedMove = Tuple[str, str, str]
+
+
+@dataclass
+class MovePlan:
+    """Plano completo de uma organização, calculado sem escrever nada no disco.
+
+    Os movimentos são tuplos simples para que planos com milhões de entradas caibam em
+    memória; em ficheiro, cada movimento ocupa uma linha JSON com um array de três nomes.
+    """
+    source_folder: str
+    moves: List[PlannedMove] = field(default_factory=list)
+    created_folders: List[str] = field(default_factory=list)
+    total_files_scanned: int = 0
+
+    def folder_counts(self) -> Dict[str, int]:
+        return dict(Counter(folder for _, folder, _ in self.moves))
+
+    def to_report_data(self) -> Dict[str, Any]:
+        """Dados no formato de `generate_html_report`, marcados como pré-visualização."""
+        return {
+            "source_folder": self.source_folder,
+            "moved_count": len(self.moves),
+            "total_files_scanned": self.total_files_scanned,
+            "created_folders": sorted(self.created_folders),
+            "move_log": self.moves,
+            "folder_counts": self.folder_counts(),
+            "dry_run": True,
+        }
+
+    def save(self, path: Union[str, Path]) -> None:
+        header = {"format": PLAN_FORMAT, "version": PLAN_VERSION, "source_folder": self.source_folder,
+                  "created_folders": self.created_folders, "total_files_scanned": self.total_files_scanned}
+        with Path(path).open('w', encoding='utf-8') as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for move in self.moves:
+                f.write(json.dumps(move, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "MovePlan":
+        """Lê um plano gravado com `save`; um ficheiro que não seja um plano válido dá ValueError."""
+        with Path(path).open('r', encoding='utf-8') as f:
+            try:
+                header = json.loads(f.readline() or "{}")
+            except ValueError:
+                header = None
+            if not isinstance(header, dict) or header.get("format") != PLAN_FORMAT or header.get("version") != PLAN_VERSION:
+                raise ValueError(f"'{path}' não é um plano do FileSorter suportado.")
+            try:
+                plan = cls(source_folder=header["source_folder"], created_folders=header.get("created_folders", []),
+                           total_files_scanned=header.get("total_files_scanned", -1))
+                if not isinstance(plan.source_folder, str) or not _all_strings(plan.created_folders) \
+                        or not isinstance(plan.total_files_scanned, int):
+                    raise ValueError("valores com o tipo errado")
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"'{path}': cabeçalho do plano inválido ({e}).") from e
+            for number, line in enumerate(f, 2):
+                if not line.strip():
+                    continue
+                try:
+                    move = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"'{path}', linha {number}: JSON inválido ({e}).") from e
+                if not isinstance(move, list) or len(move) != 3 or not _all_strings(move):
+                    raise ValueError(f"'{path}', linha {number}: era esperado um array de três nomes.")
+                plan.moves.append(tuple(move))
+        if plan.total_files_scanned < 0:
+            plan.total_files_scanned = len(plan.moves)
+        return plan
+
+
+def _all_strings(values: Any) -> bool:
+    return isinstance(values, list) and all(isinstance(value, str) for value in values)
@@ -0,0 +1,344 @@
+# Ficheiro: report.py
+
+import csv
+import html
+import os
+import tempfile
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+# Linhas da tabela de movimentos por página HTML.
+REPORT_PAGE_SIZE = 5000
+REPORT_PREFIX = "_Relatorio_Organizacao"
+BATCH_REPORT_PREFIX = "_Relatorio_Lote"
+BATCH_COMPANION_NAME = "pastas.csv"
+BATCH_COMPANION_HEADER = ("source_folder", "status", "scanned", "moved", "skipped_unchanged", "duplicates", "errors",
+                          "seconds", "report")
+PREVIEW_PREFIX = "_Previsualizacao_Organizacao"
+# Pastas de relatório dentro da pasta organizada; uma varredura recursiva não entra nelas.
+REPORT_DIR_PATTERNS = (f"{REPORT_PREFIX}_*", f"{PREVIEW_PREFIX}_*")
+COMPANION_NAME = "movimentos.csv"
+COMPANION_HEADER = ("from", "to_folder", "to_filename")
+DUPLICATES_NAME = "duplicados.csv"
+DUPLICATES_HEADER = ("from", "action", "original")
+MOVE_COLUMNS = ("Ficheiro Original", "Pasta de Destino", "Novo Nome (se alterado)")
+DUPLICATE_COLUMNS = ("Ficheiro Duplicado", "Ação", "Igual a")
+DUPLICATE_ACTIONS = {"delete": "Apagado", "hardlink": "Ligação física", "quarantine": "Quarentena"}
+
+# (origem relativa à pasta, pasta de destino, nome final), como em planner.PlannedMove.
+MoveRow = Tuple[str, str, str]
+
+_STYLE = """body { font-family: sans-serif; margin: 2em; background-color: #fdfdfd; color: #333; }
+h1, h2 { color: #333; border-bottom: 2px solid #007bff; padding-bottom: 5px;}
+ul { list-style-type: none; padding: 0; }
+li { background: #f4f4f4; margin: 5px 0; padding: 10px; border-left: 5px solid #007bff; }
+table { width: 100%; border-collapse: collapse; margin-top: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }
+th, td { padding: 12px; border: 1px solid #ddd; text-align: left; }
+th { background-color: #007bff; color: white; }
+tr:nth-child(even) { background-color: #f2f2f2; }
+nav { margin: 1em 0; }
+nav a { margin-right: 1em; }
+"""
+
+
+class MoveLog:
+    """Registo dos movimentos de uma execução, escrito em disco à medida que acontece.
+
+    As linhas vão para um ficheiro temporário anónimo (apagado ao fechar), por isso a memória
+    usada não depende do número de ficheiros: só as contagens por pasta ficam em memória.
+    Pode ser percorrido várias vezes; cada passagem relê o ficheiro do início.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.folder_counts: Counter = Counter()
+        self._file: Optional[TextIO] = None
+        self._writer = None
+
+    def add(self, origin: str, folder: str, filename: str) -> None:
+        if self._file is None:
+            self._file = tempfile.TemporaryFile('w+', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file)
+        self._writer.writerow((origin, folder, filename))
+        self.count += 1
+        self.folder_counts[folder] += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[MoveRow]:
+        if self._file is None:
+            return
+        self._file.flush()
+        self._file.seek(0)
+        try:
+            for row in csv.reader(self._file):
+                yield tuple(row)
+        finally:
+            # Volta ao fim para que novos movimentos continuem a ser acrescentados.
+            self._file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _PagedTableWriter:
+    """Escreve as linhas em páginas HTML de `page_size` linhas, abrindo uma página de cada vez."""
+
+    def __init__(self, report_dir: Path, title: str, page_size: int, total_rows: int,
+                 columns: Tuple[str, str, str] = MOVE_COLUMNS, page_prefix: str = "pagina"):
+        self.report_dir = report_dir
+        self.title = title
+        self.page_size = page_size
+        self.page_count = max(1, -(-total_rows // page_size))
+        self.columns = columns
+        self.page_prefix = page_prefix
+        self.rows_written = 0
+        self._page: Optional[TextIO] = None
+
+    def page_name(self, number: int) -> str:
+        return f"{self.page_prefix}_{number:05d}.html"
+
+    @property
+    def current_page(self) -> int:
+        return self.rows_written // self.page_size + 1
+
+    def write(self, row: MoveRow) -> None:
+        if self._page is None or self.rows_written % self.page_size == 0:
+            self._close_page()
+            self._open_page(self.current_page)
+        origin, folder, filename = (html.escape(value) for value in row)
+        self._page.write(f"<tr><td>{origin}</td><td>{folder}</td><td>{filename}</td></tr>\n")
+        self.rows_written += 1
+
+    def _navigation(self, number: int) -> str:
+        links = ['<a href="index.html">Índice</a>']
+        if number > 1:
+            links.append(f'<a href="{self.page_name(number - 1)}">&laquo; Anterior</a>')
+        links.append(f"Página {number} de {self.page_count}")
+        if number < self.page_count:
+            links.append(f'<a href="{self.page_name(number + 1)}">Seguinte &raquo;</a>')
+        return f"<nav>{' '.join(links)}</nav>"
+
+    def _open_page(self, number: int) -> None:
+        self._page_number = number
+        self._page = (self.report_dir / self.page_name(number)).open('w', encoding='utf-8')
+        self._page.write(_page_head(f"{self.title} - Página {number}"))
+        self._page.write(f"<h1>{self.title}</h1>\n{self._navigation(number)}\n")
+        self._page.write("<table>\n<tr>" + "".join(f"<th>{column}</th>" for column in self.columns) + "</tr>\n")
+
+    def _close_page(self) -> None:
+        if self._page is not None:
+            self._page.write(f"</table>\n{self._navigation(self._page_number)}\n</body>\n</html>\n")
+            self._page.close()
+            self._page = None
+
+    def close(self) -> None:
+        if self.rows_written == 0:
+            # Sem movimentos, a página 1 existe na mesma para que o índice não tenha ligações quebradas.
+            self._open_page(1)
+        self._close_page()
+
+
+def _page_head(title: str) -> str:
+    return (f'<!DOCTYPE html>\n<html lang="pt">\n<head>\n<meta charset="UTF-8">\n<title>{title}</title>\n'
+            f'<link rel="stylesheet" href="estilo.css">\n</head>\n<body>\n')
+
+
+def write_html_report(report_data: Dict[str, Any], output_dir: Path, timestamp: Optional[datetime] = None,
+                      page_size: int = REPORT_PAGE_SIZE) -> Path:
+    """Escreve o relatório numa pasta própria e devolve o caminho do índice.
+
+    A pasta contém `index.html` (resumo, contagens por pasta e lista de páginas), as páginas
+    com a tabela de movimentos e `movimentos.csv` com as mesmas linhas. `report_data["move_log"]`
+    é percorrido uma única vez e escrito linha a linha, pelo que a memória não cresce com o
+    número de movimentos.
+    """
+    timestamp = timestamp or datetime.now()
+    dry_run = report_data.get("dry_run", False)
+    prefix = PREVIEW_PREFIX if dry_run else REPORT_PREFIX
+    title = "Pré-visualização da Organização" if dry_run else "Relatório de Organização"
+    report_dir = _new_report_dir(Path(output_dir), f"{prefix}_{timestamp.strftime('%Y-%m-%d_%H%M%S')}")
+
+    move_log: Iterable[MoveRow] = report_data["move_log"]
+    folder_counts: Dict[str, int] = report_data.get("folder_counts") or {}
+    total_rows = report_data["moved_count"]
+    first_page: Dict[str, int] = {}
+
+    pages = _PagedTableWriter(report_dir, title, page_size, total_rows)
+    try:
+        with (report_dir / COMPANION_NAME).open('w', encoding='utf-8', newline='') as companion:
+            writer = csv.writer(companion)
+            writer.writerow(COMPANION_HEADER)
+            for row in move_log:
+                writer.writerow(row)
+                first_page.setdefault(row[1], pages.current_page)
+                pages.write(row)
+    finally:
+        pages.close()
+
+    index_path = report_dir / "index.html"
+    with index_path.open('w', encoding='utf-8') as f:
+        f.write(_page_head(title))
+        f.write(f"<h1>{title}</h1>\n")
+        f.write(f"<p><strong>Pasta de Origem:</strong> {html.escape(report_data['source_folder'])}</p>\n")
+        f.write(f"<p><strong>Data e Hora:</strong> {timestamp.strftime('%Y-%m-%d %H:%M:%S')}</p>\n")
+        f.write("<h2>Resumo</h2>\n<ul>\n")
+        f.write(f"<li><strong>Ficheiros analisados:</strong> {report_data['total_files_scanned']}</li>\n")
+        if report_data.get("skipped_unchanged"):
+            f.write(f"<li><strong>Ficheiros sem alterações (ignorados):</strong> {report_data['skipped_unchanged']}</li>\n")
+        f.write(f"<li><strong>Ficheiros {'a mover' if dry_run else 'movidos'}:</strong> {report_data['moved_count']}</li>\n")
+        created = report_data["created_folders"]
+        f.write(f"<li><strong>Pastas criadas:</strong> {len(created)} "
+                f"({html.escape(', '.join(created)) if created else 'Nenhuma'})</li>\n")
+        f.write(f'<li><strong>Dados em CSV:</strong> <a href="{COMPANION_NAME}">{COMPANION_NAME}</a></li>\n</ul>\n')
+
+        f.write("<h2>Resumo por Pasta</h2>\n<table>\n"
+                "<tr><th>Pasta de Destino</th><th>Ficheiros</th><th>Pasta Nova</th><th>Primeira Página</th></tr>\n")
+        created_set = set(created)
+        for folder, count in sorted(folder_counts.items(), key=lambda item: (-item[1], item[0])):
+            page = first_page.get(folder)
+            link = f'<a href="{pages.page_name(page)}">{page}</a>' if page else "-"
+            f.write(f"<tr><td>{html.escape(folder)}</td><td>{count}</td>"
+                    f"<td>{'Sim' if folder in created_set else 'Não'}</td><td>{link}</td></tr>\n")
+        f.write("</table>\n")
+
+        if report_data.get("duplicates"):
+            _write_duplicates_section(f, report_dir, report_data, page_size)
+        if report_data.get("metrics"):
+            _write_metrics_section(f, report_data["metrics"])
+
+        f.write("<h2>Registo Detalhado de Movimentos</h2>\n<ul>\n")
+        for number in range(1, pages.page_count + 1):
+            first = (number - 1) * page_size + 1
+            last = min(number * page_size, pages.rows_written)
+            rows = f"movimentos {first} a {last}" if last >= first else "sem movimentos"
+            f.write(f'<li><a href="{pages.page_name(number)}">Página {number}</a> ({rows})</li>\n')
+        f.write("</ul>\n</body>\n</html>\n")
+    return index_path
+
+
+def _new_report_dir(output_dir: Path, base_name: str) -> Path:
+    report_dir = output_dir / base_name
+    attempt = 1
+    while True:
+        try:
+            report_dir.mkdir(parents=True)
+            break
+        except FileExistsError:
+            # Dois relatórios no mesmo segundo não se sobrepõem.
+            attempt += 1
+            report_dir = output_dir / f"{base_name}_{attempt}"
+    (report_dir / "estilo.css").write_text(_STYLE, encoding='utf-8')
+    return report_dir
+
+
+def write_batch_report(summary: Dict[str, Any], output_dir: Path, timestamp: Optional[datetime] = None) -> Path:
+    """Escreve o relatório de um lote de pastas (ver `batch.BatchSummary.to_dict`) e devolve o índice.
+
+    O índice tem os totais, uma linha por pasta com ligação para o seu próprio relatório e as
+    contagens por pasta de destino somadas em todas as origens; `pastas.csv` tem as mesmas linhas.
+    """
+    timestamp = timestamp or datetime.now()
+    report_dir = _new_report_dir(Path(output_dir), f"{BATCH_REPORT_PREFIX}_{timestamp.strftime('%Y-%m-%d_%H%M%S')}")
+    totals = summary["totals"]
+    folders = sorted(summary["folders"], key=lambda folder: folder["source_folder"])
+    status_names = {"completed": "Concluída", "cancelled": "Cancelada", "failed": "Falhou"}
+
+    with (report_dir / BATCH_COMPANION_NAME).open('w', encoding='utf-8', newline='') as companion:
+        writer = csv.writer(companion)
+        writer.writerow(BATCH_COMPANION_HEADER)
+        for folder in folders:
+            writer.writerow((folder["source_folder"], folder.get("status", ""), folder.get("total_files_scanned", 0),
+                             folder.get("moved_count", 0), folder.get("skipped_unchanged", 0),
+                             folder.get("duplicate_count", 0), folder.get("errors", 0),
+                             f"{folder.get('duration_seconds', 0):.3f}", folder.get("report") or ""))
+
+    title = "Relatório de Lote"
+    index_path = report_dir / "index.html"
+    with index_path.open('w', encoding='utf-8') as f:
+        f.write(_page_head(title))
+        f.write(f"<h1>{title}</h1>\n")
+        f.write(f"<p><strong>Data e Hora:</strong> {timestamp.strftime('%Y-%m-%d %H:%M:%S')}</p>\n")
+        f.write("<h2>Resumo</h2>\n<ul>\n")
+        f.write(f"<li><strong>Pastas:</strong> {totals['folders']}"
+                + (f" ({totals['failed_folders']} com falha)" if totals["failed_folders"] else "") + "</li>\n")
+        if summary.get("cancelled"):
+            f.write("<li><strong>Estado:</strong> cancelado antes do fim</li>\n")
+        f.write(f"<li><strong>Ficheiros analisados:</strong> {totals['total_files_scanned']}</li>\n")
+        if totals["skipped_unchanged"]:
+            f.write(f"<li><strong>Ficheiros sem alterações (ignorados):</strong> {totals['skipped_unchanged']}</li>\n")
+        f.write(f"<li><strong>Ficheiros movidos:</strong> {totals['moved_count']}</li>\n")
+        if totals["duplicate_count"]:
+            f.write(f"<li><strong>Duplicados:</strong> {totals['duplicate_count']}</li>\n")
+        f.write(f"<li><strong>Erros:</strong> {totals['errors']}</li>\n")
+        f.write(f"<li><strong>Duração:</strong> {summary['duration_seconds']:.1f} s com {summary['processes']} processos</li>\n")
+        f.write(f'<li><strong>Dados em CSV:</strong> <a href="{BATCH_COMPANION_NAME}">{BATCH_COMPANION_NAME}</a></li>\n</ul>\n')
+
+        f.write("<h2>Pastas de Origem</h2>\n<table>\n<tr><th>Pasta</th><th>Estado</th><th>Analisados</th>"
+                "<th>Movidos</th><th>Erros</th><th>Tempo (s)</th><th>Relatório</th></tr>\n")
+        for folder in folders:
+            report = folder.get("report")
+            link = f'<a href="{html.escape(Path(report).resolve().as_uri())}">abrir</a>' if report else "-"
+            status = status_names.get(folder.get("status"), folder.get("status", ""))
+            f.write(f"<tr><td>{html.escape(folder['source_folder'])}</td><td>{status}</td>"
+                    f"<td>{folder.get('total_files_scanned', 0)}</td><td>{folder.get('moved_count', 0)}</td>"
+                    f"<td>{folder.get('errors', 0)}</td><td>{folder.get('duration_seconds', 0):.1f}</td><td>{link}</td></tr>\n")
+        f.write("</table>\n")
+
+        f.write("<h2>Resumo por Pasta de Destino</h2>\n<table>\n<tr><th>Pasta de Destino</th><th>Ficheiros</th></tr>\n")
+        for name, count in sorted(totals["folder_counts"].items(), key=lambda item: (-item[1], item[0])):
+            f.write(f"<tr><td>{html.escape(name)}</td><td>{count}</td></tr>\n")
+        f.write("</table>\n</body>\n</html>\n")
+    return index_path
+
+
+def _write_duplicates_section(f: TextIO, report_dir: Path, report_data: Dict[str, Any], page_size: int) -> None:
+    """Resumo dos duplicados no índice, com as linhas em páginas próprias e em `duplicados.csv`."""
+    duplicates: Iterable[MoveRow] = report_data["duplicates"]
+    counts: Counter = Counter()
+    pages = _PagedTableWriter(report_dir, "Duplicados", page_size, len(report_data["duplicates"]),
+                              columns=DUPLICATE_COLUMNS, page_prefix="duplicados")
+    try:
+        with (report_dir / DUPLICATES_NAME).open('w', encoding='utf-8', newline='') as companion:
+            writer = csv.writer(companion)
+            writer.writerow(DUPLICATES_HEADER)
+            for origin, action, original in duplicates:
+                writer.writerow((origin, action, original))
+                counts[action] += 1
+                pages.write((origin, DUPLICATE_ACTIONS.get(action, action), original))
+    finally:
+        pages.close()
+
+    f.write("<h2>Duplicados</h2>\n<ul>\n")
+    for action, count in sorted(counts.items()):
+        f.write(f"<li><strong>{DUPLICATE_ACTIONS.get(action, html.escape(action))}:</strong> {count}</li>\n")
+    if report_data.get("dedup_bytes_saved"):
+        f.write(f"<li><strong>Espaço libertado:</strong> {report_data['dedup_bytes_saved'] / 1e6:.1f} MB</li>\n")
+    f.write(f'<li><strong>Dados em CSV:</strong> <a href="{DUPLICATES_NAME}">{DUPLICATES_NAME}</a></li>\n')
+    for number in range(1, pages.page_count + 1):
+        f.write(f'<li><a href="{pages.page_name(number)}">Duplicados, página {number}</a></li>\n')
+    f.write("</ul>\n")
+
+
+def _write_metrics_section(f: TextIO, metrics: Dict[str, Any]) -> None:
+    """Tabela de tempos por fase e latência dos movimentos (ver `metrics.RunMetrics.summary`)."""
+    f.write("<h2>Desempenho</h2>\n<table>\n<tr><th>Fase</th><th>Tempo (s)</th><th>Elementos</th></tr>\n")
+    for phase, values in metrics["phases"].items():
+        if values["seconds"] or values["items"]:
+            f.write(f"<tr><td>{html.escape(phase)}</td><td>{values['seconds']:.3f}</td><td>{values['items']}</td></tr>\n")
+    f.write("</table>\n<ul>\n")
+    f.write(f"<li><strong>Duração:</strong> {metrics['duration_seconds']:.2f} s</li>\n")
+    throughput = metrics["throughput"]["files_per_second"]
+    if throughput is not None:
+        f.write(f"<li><strong>Ritmo:</strong> {throughput:.0f} ficheiros/s, "
+                f"{metrics['bytes_moved']['total'] / 1e6:.1f} MB movidos</li>\n")
+    latency = metrics["move_latency_seconds"]
+    if latency["count"]:
+        f.write(f"<li><strong>Latência por ficheiro:</strong> p50 {latency['p50'] * 1000:.2f} ms, "
+                f"p99 {latency['p99'] * 1000:.2f} ms</li>\n")
+    f.write("</ul>\n")
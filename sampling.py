@@ -0,0 +1,143 @@
+# Ficheiro: sampling.py
+
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+_DATE_RE = re.compile(r'(?<!\d)(?:19|20)\d{2}[-_.]?(?:0[1-9]|1[0-2])[-_.]?(?:0[1-9]|[12]\d|3[01])(?!\d)')
+_HEX_ID_RE = re.compile(r'(?<![0-9a-z])(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{8,}(?![0-9a-z])')
+_DIGITS_RE = re.compile(r'\d+')
+_WORD_RE = re.compile(r'[^\W\d_]{3,}')
+
+LEGEND = "<N> = número, <DATA> = data, <ID> = identificador hexadecimal"
+
+
+def name_shape(filename: str) -> Tuple[str, str]:
+    """Devolve (extensão, padrão) de um nome: datas, identificadores e contadores viram marcadores.
+
+    Ex.: "IMG_20240105_0042.JPG" -> (".jpg", "img_<DATA>_<N>").
+    """
+    stem, extension = os.path.splitext(filename.lower())
+    shape = _DATE_RE.sub("<DATA>", stem)
+    shape = _HEX_ID_RE.sub("<ID>", shape)
+    shape = _DIGITS_RE.sub("<N>", shape)
+    return extension, shape
+
+
+class _Cluster:
+    __slots__ = ("count", "examples")
+
+    def __init__(self):
+        self.count = 0
+        # (hash, nome): ficam os de menor hash, uma amostra estável que não depende da ordem da listagem.
+        self.examples: List[Tuple[int, str]] = []
+
+
+class FilenameSummary:
+    """Resumo compacto de uma coleção de nomes de ficheiros, agrupados por extensão e padrão.
+
+    A memória é limitada por `max_clusters` e `max_words`, independentemente do número de nomes:
+    padrões novos para lá do limite são contados num grupo "*" da respetiva extensão, e o
+    contador de palavras descarta periodicamente as que só apareceram uma vez.
+    """
+
+    def __init__(self, examples_per_cluster: int = 3, max_clusters: int = 5000, max_words: int = 50000):
+        self.examples_per_cluster = examples_per_cluster
+        self.max_clusters = max_clusters
+        self.max_words = max_words
+        self.total = 0
+        self.clusters: Dict[Tuple[str, str], _Cluster] = {}
+        self.words: Counter = Counter()
+
+    def add(self, filename: str) -> None:
+        self.total += 1
+        key = name_shape(filename)
+        cluster = self.clusters.get(key)
+        if cluster is None:
+            if len(self.clusters) >= self.max_clusters:
+                key = (key[0], "*")
+                cluster = self.clusters.get(key)
+            if cluster is None:
+                cluster = _Cluster()
+                self.clusters[key] = cluster
+        cluster.count += 1
+
+        examples = cluster.examples
+        tagged = (zlib.crc32(filename.encode("utf-8", "surrogateescape")), filename)
+        if len(examples) < self.examples_per_cluster:
+            if tagged not in examples:
+                examples.append(tagged)
+                examples.sort()
+        elif tagged < examples[-1] and tagged not in examples:
+            examples[-1] = tagged
+            examples.sort()
+
+        # O padrão está em minúsculas; só os marcadores (<DATA>, ...) têm maiúsculas.
+        self.words.update({word for word in _WORD_RE.findall(key[1]) if not word.isupper()})
+        if len(self.words) > self.max_words:
+            self.words = Counter({word: n for word, n in self.words.items() if n > 1})
+
+    def add_all(self, filenames: Iterable[str]) -> "FilenameSummary":
+        for filename in filenames:
+            self.add(filename)
+        return self
+
+    def _ranked(self) -> List[Tuple[Tuple[str, str], _Cluster]]:
+        return sorted(self.clusters.items(), key=lambda item: (-item[1].count, item[0]))
+
+    def _select(self, max_chars: int) -> Tuple[List[str], int]:
+        header = [f"Total de ficheiros: {self.total}. Grupos por extensão e padrão ({LEGEND}):"]
+        footer = []
+        top_words = [f"{word} ({n})" for word, n in self.words.most_common(30) if n > 1]
+        if top_words:
+            footer.append("Palavras mais frequentes: " + ", ".join(top_words))
+        budget = max_chars - sum(len(line) + 1 for line in header + footer) - 80
+
+        # Padrões repetidos primeiro, com até dois terços do espaço; o resto vai para
+        # linhas "(vários)" por extensão, para que nenhuma extensão fique sem contagem.
+        lines, covered = [], 0
+        pattern_budget = budget * 2 // 3
+        leftovers: Dict[str, _Cluster] = {}
+        for (extension, shape), cluster in self._ranked():
+            line = self._line(extension, shape, cluster)
+            if cluster.count > 1 and len(line) + 1 <= pattern_budget:
+                lines.append(line)
+                pattern_budget -= len(line) + 1
+                budget -= len(line) + 1
+                covered += cluster.count
+                continue
+            pattern_budget = 0
+            merged = leftovers.setdefault(extension, _Cluster())
+            merged.count += cluster.count
+            merged.examples = sorted(merged.examples + cluster.examples)[:self.examples_per_cluster]
+
+        skipped_groups, skipped_files = 0, 0
+        for extension, cluster in sorted(leftovers.items(), key=lambda item: (-item[1].count, item[0])):
+            line = self._line(extension, "(vários)", cluster)
+            if skipped_groups == 0 and len(line) + 1 <= budget:
+                lines.append(line)
+                budget -= len(line) + 1
+                covered += cluster.count
+            else:
+                skipped_groups += 1
+                skipped_files += cluster.count
+        if skipped_groups:
+            lines.append(f"- ... mais {skipped_groups} extensões com {skipped_files} ficheiros")
+        return header + lines + footer, covered
+
+    @staticmethod
+    def _line(extension: str, shape: str, cluster: _Cluster) -> str:
+        examples = "; ".join(name for _, name in cluster.examples)
+        return f"- {extension or '(sem extensão)'} | {shape} | {cluster.count} | ex: {examples}"
+
+    def render(self, max_chars: int = 4000) -> str:
+        """Texto para o prompt, sem ultrapassar `max_chars` e sem nunca cortar um nome a meio."""
+        return "\n".join(self._select(max_chars)[0])
+
+    def coverage(self, max_chars: int = 4000) -> float:
+        """Fração dos ficheiros contados numa linha de `render` (por padrão ou pela sua extensão)."""
+        if not self.total:
+            return 1.0
+        return self._select(max_chars)[1] / self.total
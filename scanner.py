@@ -0,0 +1,116 @@
+# Ficheiro: scanner.py
+
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Generator, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+
+class DirectoryScanner:
+    """Percorre uma pasta com `os.scandir`, devolvendo os ficheiros à medida que são encontrados.
+
+    O tipo de cada entrada vem do próprio `DirEntry`, pelo que não há um stat() extra por
+    ficheiro. Só é mantida em memória a pilha de subpastas por visitar, e nunca se segue
+    ligações simbólicas para pastas. `skip_dirs` pode ser alterado durante a varredura:
+    as pastas lá colocadas deixam de ser visitadas a partir desse momento.
+
+    `listing_state` (por exemplo, um `file_index.FileStateIndex` através da lógica) permite
+    saltar pastas que não mudaram: `settled_listing(pasta)` devolve (subpastas, nº de
+    ficheiros) sem listar, ou None; `listed(pasta, stat, subpastas, nº de ficheiros)` é
+    chamado depois de cada pasta efetivamente listada.
+    """
+
+    def __init__(self, root: Union[str, Path], recursive: bool = False, max_depth: Optional[int] = None,
+                 exclude: Sequence[str] = (), skip_dirs: Optional[Set[Path]] = None, listing_state: Any = None):
+        self.root = Path(root)
+        # max_depth conta os níveis abaixo da raiz; sem recursão fica-se pela própria raiz.
+        self.max_depth = (max_depth if max_depth is not None else -1) if recursive else 0
+        self.exclude = tuple(exclude)
+        self.skip_dirs = skip_dirs if skip_dirs is not None else set()
+        self.listing_state = listing_state
+        self.scanned_files = 0
+        self.scanned_dirs = 0
+        # Pastas (e os seus ficheiros) dadas como inalteradas pelo `listing_state`.
+        self.skipped_dirs = 0
+        self.skipped_files = 0
+        self.finished = False
+        self._pending: List[Tuple[Path, int]] = []
+
+    def _is_excluded(self, name: str, relative: str) -> bool:
+        return any(fnmatch(name, pattern) or fnmatch(relative, pattern) for pattern in self.exclude)
+
+    def _push_subdir(self, path: Path, depth: int) -> None:
+        if self.max_depth >= 0 and depth >= self.max_depth:
+            return
+        if path in self.skip_dirs:
+            return
+        if self.exclude and self._is_excluded(path.name, path.relative_to(self.root).as_posix()):
+            return
+        self._pending.append((path, depth + 1))
+
+    def __iter__(self) -> Iterator[os.DirEntry]:
+        self._pending = [(self.root, 0)]
+        while self._pending:
+            directory, depth = self._pending.pop()
+            # A pasta pode ter entrado em skip_dirs depois de empilhada (ex.: um destino criado entretanto).
+            if depth and directory in self.skip_dirs:
+                continue
+            if self.listing_state is not None:
+                settled = self.listing_state.settled_listing(directory)
+                if settled is not None:
+                    subdirs, file_count = settled
+                    for name in subdirs:
+                        self._push_subdir(directory / name, depth)
+                    self.skipped_dirs += 1
+                    self.skipped_files += file_count
+                    continue
+                try:
+                    directory_stat = os.stat(directory)
+                except OSError:
+                    continue
+            try:
+                iterator = os.scandir(directory)
+            except OSError:
+                continue
+            subdirs: List[str] = []
+            file_count = 0
+            with iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            self._push_subdir(Path(entry.path), depth)
+                        elif entry.is_file():
+                            if self.exclude and self._is_excluded(entry.name, Path(entry.path).relative_to(self.root).as_posix()):
+                                continue
+                            self.scanned_files += 1
+                            file_count += 1
+                            yield entry
+                    except OSError:
+                        continue
+            self.scanned_dirs += 1
+            if self.listing_state is not None:
+                self.listing_state.listed(directory, directory_stat, subdirs, file_count)
+        self.finished = True
+
+    def batches(self, batch_size: int) -> Generator[List[os.DirEntry], None, None]:
+        """Agrupa as entradas em listas de até `batch_size`, para limitar a memória usada."""
+        batch: List[os.DirEntry] = []
+        for entry in self:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def estimated_total(self) -> int:
+        """Estimativa do total de ficheiros, refinada à medida que a varredura avança.
+
+        Enquanto houver pastas por visitar, assume-se que cada uma terá a média de ficheiros
+        das pastas já lidas. Quando a varredura termina, o valor é exato.
+        """
+        if self.finished or not self._pending or not self.scanned_dirs:
+            return self.scanned_files
+        average = self.scanned_files / self.scanned_dirs
+        return self.scanned_files + int(average * len(self._pending))
@@ -0,0 +1,7 @@
+# Ficheiro: tests/conftest.py
+
+import sys
+from pathlib import Path
+
+# Os módulos do projeto estão na raiz do repositório, como nos benchmarks.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
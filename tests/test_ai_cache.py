@@ -0,0 +1,102 @@
+# Ficheiro: tests/test_ai_cache.py
+
+import json
+import os
+import time
+
+import pytest
+
+from ai_cache import SuggestionCache
+from logic import GeminiRuleSuggester
+
+RULES = [{"folder": "FATURAS", "keywords": ["fatura"]}]
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """Modelo falso: devolve sempre as mesmas regras e conta as chamadas."""
+
+    def __init__(self, rules=RULES):
+        self.rules = rules
+        self.calls = 0
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        self.calls += 1
+        return FakeResponse(json.dumps(self.rules))
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "origem"
+    folder.mkdir()
+    for name in ["fatura_01.pdf", "fatura_02.pdf", "IMG_0001.jpg"]:
+        (folder / name).touch()
+    return folder
+
+
+def make_suggester(tmp_path, **cache_options):
+    return GeminiRuleSuggester(model=FakeModel(), cache=SuggestionCache(tmp_path / "cache", **cache_options))
+
+
+def test_repeated_request_hits_cache(tmp_path, folder):
+    suggester = make_suggester(tmp_path)
+    assert suggester.suggest_rules(folder, "separe as faturas") == RULES
+    # Espaços e maiúsculas diferentes são o mesmo pedido.
+    assert suggester.suggest_rules(folder, "  Separe as FATURAS ") == RULES
+    assert suggester.model.calls == 1
+    assert (suggester.cache.hits, suggester.cache.misses) == (1, 1)
+
+
+def test_use_cache_false_asks_the_model(tmp_path, folder):
+    suggester = make_suggester(tmp_path)
+    suggester.suggest_rules(folder, "separe as faturas")
+    suggester.suggest_rules(folder, "separe as faturas", use_cache=False)
+    assert suggester.model.calls == 2
+    assert suggester.cache.hits == 0
+    # A resposta nova fica em cache e serve o pedido seguinte.
+    suggester.suggest_rules(folder, "separe as faturas")
+    assert suggester.model.calls == 2
+
+
+def test_different_folder_contents_miss(tmp_path, folder):
+    suggester = make_suggester(tmp_path)
+    suggester.suggest_rules(folder, "separe as faturas")
+    (folder / "recibo.pdf").touch()
+    suggester.suggest_rules(folder, "separe as faturas")
+    assert suggester.model.calls == 2
+
+
+def test_lru_eviction_at_capacity(tmp_path):
+    cache = SuggestionCache(tmp_path, max_entries=2)
+    cache.put("a", RULES)
+    cache.put("b", RULES)
+    # Datas de uso explícitas: "a" e "b" antigas, com "a" usada agora.
+    now = time.time()
+    os.utime(tmp_path / "a.json", (now - 100, now - 100))
+    os.utime(tmp_path / "b.json", (now - 50, now - 50))
+    assert cache.get("a") == RULES
+    cache.put("c", RULES)
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["a", "c"]
+    assert cache.get("b") is None
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    cache = SuggestionCache(tmp_path, max_age_seconds=10)
+    cache.put("a", RULES)
+    past = time.time() - 60
+    os.utime(tmp_path / "a.json", (past, past))
+    assert cache.get("a") is None
+    assert not (tmp_path / "a.json").exists()
+
+
+def test_clear_removes_all_entries(tmp_path):
+    cache = SuggestionCache(tmp_path)
+    cache.put("a", RULES)
+    cache.put("b", RULES)
+    assert cache.clear() == 2
+    assert cache.get("a") is None
+    assert SuggestionCache(tmp_path / "nao_existe").clear() == 0
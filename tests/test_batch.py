@@ -0,0 +1,109 @@
+# Ficheiro: tests/test_batch.py
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from threading import Event
+
+import pytest
+
+import cli
+import dedup
+import file_index
+from batch import BatchOptions, BatchOrganizer, expand_sources, read_source_list
+from dedup import ContentHashCache
+from file_index import FileStateIndex
+from logic import FileSorterLogic
+from report import write_batch_report
+
+RULES = [{"folder": "FATURAS", "keywords": ["fatura"]}, {"folder": "FOTOS", "keywords": ["foto"]}]
+
+
+def make_inboxes(root: Path) -> None:
+    for inbox, names in {"a": ["fatura_1.pdf", "foto_1.jpg"], "b": ["fatura_2.pdf", "outro.txt"]}.items():
+        (root / "inbox" / inbox).mkdir(parents=True)
+        for name in names:
+            (root / "inbox" / inbox / name).touch()
+    (root / "inbox" / "nao_pasta.txt").touch()
+
+
+def run_batch(organizer: BatchOrganizer, folders):
+    generator = organizer.run(folders, Event())
+    try:
+        while True:
+            next(generator)
+    except StopIteration as e:
+        return e.value
+
+
+def test_expand_sources_returns_absolute_folders(tmp_path, monkeypatch):
+    make_inboxes(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "lista.txt").write_text("# caixas\ninbox/*\n\ninbox/a\n", encoding="utf-8")
+    folders = expand_sources(read_source_list("lista.txt"))
+    assert folders == [tmp_path / "inbox" / "a", tmp_path / "inbox" / "b"]
+
+
+def test_batch_with_relative_glob_writes_summary(tmp_path, monkeypatch):
+    make_inboxes(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    logic.set_rules(RULES)
+    summary = run_batch(BatchOrganizer(logic, processes=2, options=BatchOptions()), expand_sources(["inbox/*"]))
+
+    # Sem regra, outro.txt vai para a pasta da extensão.
+    assert summary["totals"]["moved_count"] == 4
+    assert summary["totals"]["failed_folders"] == 0
+    assert summary["totals"]["folder_counts"] == {"FATURAS": 2, "FOTOS": 1, "TXT": 1}
+    assert (tmp_path / "inbox" / "b" / "FATURAS" / "fatura_2.pdf").exists()
+    index = write_batch_report(summary, tmp_path / "relatorios")
+    assert "file://" in index.read_text(encoding="utf-8")
+
+
+def test_cli_batch_relative_glob(tmp_path, monkeypatch, capsys):
+    # O índice de estado, o log e os diários da aplicação ficam dentro da pasta do teste.
+    for variable in ("XDG_CACHE_HOME", "XDG_DATA_HOME", "XDG_CONFIG_HOME", "XDG_STATE_HOME"):
+        monkeypatch.setenv(variable, str(tmp_path / "app" / variable))
+    make_inboxes(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "rules.json").write_text(json.dumps(RULES), encoding="utf-8")
+    code = cli.main(["--config", "rules.json", "batch", "inbox/*", "-j", "2", "-q",
+                     "--report-dir", "relatorios", "--summary-json", "resumo.json"])
+    assert code == 0
+    summary = json.loads((tmp_path / "resumo.json").read_text(encoding="utf-8"))
+    assert summary["totals"]["moved_count"] == 4
+    assert list((tmp_path / "relatorios").glob("_Relatorio_Lote_*/index.html"))
+
+
+def hold_write_lock(path: Path, seconds: float) -> threading.Thread:
+    """Outro processo do lote a meio de uma escrita: a base fica bloqueada durante `seconds`."""
+    other = sqlite3.connect(str(path), check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(seconds, lambda: (other.commit(), other.close()))
+    timer.start()
+    return timer
+
+
+@pytest.mark.parametrize("module, cls, write", [
+    (file_index, FileStateIndex, lambda db: db.replace_directory("/pasta", [])),
+    (dedup, ContentHashCache, lambda db: db.replace("/pasta", [])),
+])
+def test_shared_databases_wait_for_other_workers(tmp_path, monkeypatch, module, cls, write):
+    path = tmp_path / "partilhada.sqlite3"
+    cls(path).close()
+
+    timer = hold_write_lock(path, 0.3)
+    db = cls(path)
+    write(db)
+    db.close()
+    timer.join()
+
+    # Sem espera, a mesma escrita falharia com a base bloqueada.
+    monkeypatch.setattr(module, "SQLITE_BUSY_TIMEOUT", 0.0)
+    timer = hold_write_lock(path, 0.3)
+    db = cls(path)
+    with pytest.raises(sqlite3.OperationalError):
+        write(db)
+    db.close()
+    timer.join()
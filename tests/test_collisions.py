@@ -0,0 +1,41 @@
+# Ficheiro: tests/test_collisions.py
+
+from pathlib import Path
+
+from collisions import DestinationNameIndex
+
+
+def baseline_safe_path(destination_path: Path, filename: str) -> Path:
+    """O ciclo original com exists(): "nome (1)", "nome (2)", ... até encontrar um livre."""
+    source_file = Path(filename)
+    final_destination = destination_path / filename
+    counter = 1
+    while final_destination.exists():
+        final_destination = destination_path / f"{source_file.stem} ({counter}){source_file.suffix}"
+        counter += 1
+    return final_destination
+
+
+def test_each_destination_is_listed_once(tmp_path):
+    index = DestinationNameIndex()
+    folders = [tmp_path / "A", tmp_path / "B", tmp_path / "NOVA"]
+    folders[0].mkdir()
+    folders[1].mkdir()
+    for i in range(30):
+        index.reserve(folders[i % 3], f"ficheiro_{i % 5}.txt")
+    index.mark_taken(folders[0] / "outro.txt")
+    assert index.listed_directories == 3
+
+
+def test_reserve_matches_exists_loop(tmp_path):
+    destination = tmp_path / "DOCS"
+    destination.mkdir()
+    for name in ["relatorio.pdf", "relatorio (1).pdf", "relatorio (3).pdf", "notas", "arquivo.tar.gz"]:
+        (destination / name).touch()
+    index = DestinationNameIndex()
+    for name in ["relatorio.pdf", "relatorio.pdf", "relatorio.pdf", "notas", "notas", "arquivo.tar.gz", "novo.txt"]:
+        expected = baseline_safe_path(destination, name)
+        reserved = index.reserve(destination, name)
+        assert reserved == expected
+        reserved.touch()
+    assert index.listed_directories == 1
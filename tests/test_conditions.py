@@ -0,0 +1,154 @@
+# Ficheiro: tests/test_conditions.py
+
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from attributes import FileAttributes, PathEntry, sniff_type
+from matcher import RuleConditions, RuleMatcher, parse_size
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 60
+PDF = b"%PDF-1.7\n" + b"\x00" * 60
+
+
+class StrictEntry(PathEntry):
+    """Entrada que falha o teste se alguém lhe pedir o stat."""
+
+    def stat(self, follow_symlinks: bool = False):
+        raise AssertionError(f"stat() pedido para '{self.name}'")
+
+
+class StrictAttributes(FileAttributes):
+    """Atributos que falham o teste se algum cabeçalho for lido."""
+
+    def types(self, files):
+        raise AssertionError(f"cabeçalho lido para {[path for path, _ in files]}")
+
+
+def write(folder: Path, name: str, data: bytes = b"", days_old: float = 0) -> PathEntry:
+    path = folder / name
+    path.write_bytes(data)
+    if days_old:
+        moment = (datetime.now() - timedelta(days=days_old)).timestamp()
+        os.utime(path, (moment, moment))
+    return PathEntry(path)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (JPEG, "jpeg"),
+    (b"\x89PNG\r\n\x1a\n" + b"\x00" * 8, "png"),
+    (PDF, "pdf"),
+    (b"PK\x03\x04" + b"\x00" * 26, "zip"),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", "wav"),
+    (b"\x00\x00\x00\x18ftypheic\x00\x00", "heic"),
+    (b"\x00\x00\x00\x18ftypisom\x00\x00", "mp4"),
+    (b"BM\x36\x00\x0c\x00\x00\x00\x00\x00\x36\x00", "bmp"),
+    (b"BMW da empresa\n", "text"),
+    ("olá, relatório".encode("utf-8")[:-1], "text"),
+    (b"\x00\x01\x02\x03\xfe\xff", None),
+    (b"", None),
+])
+def test_sniff_type_by_magic_bytes(header, expected):
+    assert sniff_type(header) == expected
+
+
+def test_parse_size():
+    assert parse_size("500KB") == 500 * 1024
+    assert parse_size("1.5 gb") == int(1.5 * 1024 ** 3)
+    assert parse_size(10) == 10
+    for invalid in ("muito", "-1", "10XB", True):
+        with pytest.raises(ValueError):
+            parse_size(invalid)
+
+
+def test_relative_days_resolve_to_dates():
+    today = date(2024, 1, 10)
+    conditions = RuleConditions({"newer_than_days": 7, "older_than_days": 2}, today=today)
+    assert conditions.canonical == {"modified_after": "2024-01-03", "modified_before": "2024-01-08"}
+    # Com uma data explícita e uma relativa fica a mais apertada.
+    conditions = RuleConditions({"modified_after": "2024-01-05", "newer_than_days": 30}, today=today)
+    assert conditions.canonical == {"modified_after": "2024-01-05"}
+    assert conditions.relative
+
+
+def test_invalid_conditions_are_rejected():
+    for invalid in ({"idade": 3}, {"types": ["imagem"]}, {"newer_than_days": -1}, {"modified_after": "ontem"}):
+        with pytest.raises(ValueError):
+            RuleConditions(invalid)
+
+
+def test_matcher_with_relative_dates_goes_stale():
+    rules = [{"folder": "RECENTES", "keywords": [], "conditions": {"newer_than_days": 1}}]
+    assert RuleMatcher(rules, today=date.today() - timedelta(days=1)).is_stale()
+    assert not RuleMatcher(rules).is_stale()
+    assert not RuleMatcher([{"folder": "A", "keywords": ["a"]}], today=date(2000, 1, 1)).is_stale()
+
+
+def test_size_date_and_type_conditions(tmp_path):
+    rules = [
+        {"folder": "GRANDES", "keywords": ["video"], "conditions": {"min_size": "1KB"}},
+        {"folder": "ANTIGOS", "keywords": ["relatorio"], "conditions": {"older_than_days": 30}},
+        {"folder": "FOTOS", "keywords": ["img_"], "conditions": {"types": ["image"]}},
+        {"folder": "OUTROS", "keywords": ["video", "relatorio", "img_"]},
+    ]
+    entries = [
+        write(tmp_path, "video_grande.mp4", b"x" * 2048),
+        write(tmp_path, "video_pequeno.mp4", b"x" * 10),
+        write(tmp_path, "relatorio_velho.txt", b"texto", days_old=60),
+        write(tmp_path, "relatorio_novo.txt", b"texto"),
+        write(tmp_path, "IMG_0001.jpg", JPEG),
+        write(tmp_path, "IMG_0002.jpg", PDF),
+    ]
+    folders = RuleMatcher(rules).classify_entries(entries, FileAttributes())
+    assert folders == ["GRANDES", "OUTROS", "ANTIGOS", "OUTROS", "FOTOS", "OUTROS"]
+
+
+def test_rule_with_only_conditions_applies_to_any_name(tmp_path):
+    rules = [
+        {"folder": "FATURAS", "keywords": ["fatura"]},
+        {"folder": "PDFS_REAIS", "keywords": [], "conditions": {"types": ["pdf"]}},
+    ]
+    entries = [write(tmp_path, "fatura.pdf", PDF), write(tmp_path, "sem_nome", PDF), write(tmp_path, "foto.pdf", JPEG)]
+    # A regra por nome vem primeiro e ganha; sem ela, o tipo real decide; sem nenhuma, a extensão.
+    assert RuleMatcher(rules).classify_entries(entries, FileAttributes()) == ["FATURAS", "PDFS_REAIS", "PDF"]
+
+
+def test_name_alone_decides_without_stat_or_header(tmp_path):
+    rules = [
+        {"folder": "FATURAS", "keywords": ["fatura"]},
+        {"folder": "FOTOS", "keywords": ["img_"], "conditions": {"min_size": 1, "types": ["image"]}},
+        {"folder": "RESTO", "keywords": ["img_"]},
+    ]
+    matcher = RuleMatcher(rules)
+    entries = [StrictEntry(tmp_path / name) for name in ["fatura_1.pdf", "notas.txt", "FATURA.IMG_1.jpg"]]
+    assert matcher.classify_entries(entries, StrictAttributes()) == ["FATURAS", "TXT", "FATURAS"]
+    assert matcher.decided_by_name("fatura_1.pdf") and not matcher.decided_by_name("img_1.jpg")
+
+
+def test_header_is_read_only_after_stat_conditions_pass(tmp_path):
+    rules = [{"folder": "FOTOS", "keywords": ["img_"], "conditions": {"min_size": "1KB", "types": ["image"]}}]
+    entries = [write(tmp_path, "img_pequena.jpg", JPEG), write(tmp_path, "img_grande.jpg", JPEG + b"\x00" * 2048)]
+    attributes = FileAttributes()
+    assert RuleMatcher(rules).classify_entries(entries, attributes) == ["JPG", "FOTOS"]
+    assert (attributes.stats_read, attributes.headers_read) == (2, 1)
+
+
+def test_file_types_are_cached_until_the_file_changes(tmp_path):
+    entry = write(tmp_path, "foto", JPEG)
+    attributes = FileAttributes()
+    for _ in range(2):
+        assert attributes.types([(entry.path, os.stat(entry.path))]) == ["jpeg"]
+    assert attributes.headers_read == 1
+
+    Path(entry.path).write_bytes(PDF + b"mais")
+    assert attributes.types([(entry.path, os.stat(entry.path))]) == ["pdf"]
+    assert attributes.headers_read == 2
+
+
+def test_missing_file_skips_conditional_rules(tmp_path):
+    rules = [{"folder": "GRANDES", "keywords": ["video"], "conditions": {"min_size": 1}},
+             {"folder": "VIDEOS", "keywords": ["video"]}]
+    entries = [PathEntry(tmp_path / "video_apagado.mp4")]
+    assert RuleMatcher(rules).classify_entries(entries, FileAttributes()) == ["VIDEOS"]
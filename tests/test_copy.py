@@ -0,0 +1,144 @@
+# Ficheiro: tests/test_copy.py
+
+import errno
+import os
+import stat
+
+import pytest
+
+import mover
+from mover import COPY_METHODS, FileCopier, move_file
+
+DATA = bytes(range(256)) * 400
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "origem.bin"
+    path.write_bytes(DATA)
+    return path
+
+
+def refuse(error: int):
+    def call(*args, **kwargs):
+        raise OSError(error, os.strerror(error))
+    return call
+
+
+def force_cross_device(monkeypatch):
+    """Faz o os.link de `move_file` falhar com EXDEV, como entre dois sistemas de ficheiros."""
+    monkeypatch.setattr(os, "link", refuse(errno.EXDEV))
+
+
+@pytest.mark.parametrize("backend", COPY_METHODS)
+def test_each_backend_copies_exactly(tmp_path, source, backend):
+    copier = FileCopier(backend)
+    method = copier.copy(source, tmp_path / "copia.bin")
+    assert (tmp_path / "copia.bin").read_bytes() == DATA
+    # Um método que o sistema de ficheiros recusa passa aos seguintes, nunca aos anteriores.
+    assert method in COPY_METHODS[COPY_METHODS.index(backend):]
+    assert copier.used == {method: 1}
+
+
+def test_fallback_chain_reaches_buffered_and_remembers(tmp_path, source, monkeypatch):
+    calls = []
+
+    def tracked(name, error):
+        def call(*args, **kwargs):
+            calls.append(name)
+            raise OSError(error, os.strerror(error))
+        return call
+
+    if mover.fcntl is not None:
+        monkeypatch.setattr(mover.fcntl, "ioctl", tracked("reflink", errno.EOPNOTSUPP))
+    monkeypatch.setattr(os, "copy_file_range", tracked("copy_file_range", errno.EXDEV), raising=False)
+    monkeypatch.setattr(os, "sendfile", tracked("sendfile", errno.ENOSYS), raising=False)
+    copier = FileCopier()
+
+    assert copier.copy(source, tmp_path / "a.bin") == "buffered"
+    assert (tmp_path / "a.bin").read_bytes() == DATA
+    tried = list(calls)
+    assert tried[-2:] == ["copy_file_range", "sendfile"]
+    # Entre o mesmo par de dispositivos, os métodos recusados não voltam a ser tentados.
+    assert copier.copy(source, tmp_path / "b.bin") == "buffered"
+    assert calls == tried
+
+
+def test_failed_method_is_truncated_before_retry(tmp_path, source, monkeypatch):
+    def partial_copy(src_fd, dst_fd, count, offset_src=None, offset_dst=None):
+        os.write(dst_fd, b"lixo de uma tentativa a meio")
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(os, "copy_file_range", partial_copy, raising=False)
+    assert FileCopier("copy_file_range").copy(source, tmp_path / "copia.bin") in ("sendfile", "buffered")
+    assert (tmp_path / "copia.bin").read_bytes() == DATA
+
+
+def test_other_errors_are_not_retried(tmp_path, source, monkeypatch):
+    monkeypatch.setattr(os, "copy_file_range", refuse(errno.EIO), raising=False)
+    with pytest.raises(OSError) as error:
+        FileCopier("copy_file_range").copy(source, tmp_path / "copia.bin")
+    assert error.value.errno == errno.EIO
+    assert not (tmp_path / "copia.bin").exists()
+
+
+def test_short_copy_keeps_the_source(tmp_path, source, monkeypatch):
+    force_cross_device(monkeypatch)
+    monkeypatch.setattr(FileCopier, "_copy_buffered", lambda self, src, dst: dst.write(src.read(100)))
+    destination = tmp_path / "destino" / "origem.bin"
+    destination.parent.mkdir()
+    with pytest.raises(OSError) as error:
+        move_file(source, destination, FileCopier("buffered"))
+    assert error.value.errno == errno.EIO
+    assert source.read_bytes() == DATA
+    assert not destination.exists()
+
+
+def test_source_changed_during_copy_keeps_the_source(tmp_path, source, monkeypatch):
+    force_cross_device(monkeypatch)
+    real_copy = FileCopier._copy_buffered
+
+    def copy_then_touch(self, src, dst):
+        copied = real_copy(self, src, dst)
+        os.utime(source, ns=(0, 1_000_000_000))
+        return copied
+
+    monkeypatch.setattr(FileCopier, "_copy_buffered", copy_then_touch)
+    destination = tmp_path / "copia.bin"
+    with pytest.raises(OSError) as error:
+        move_file(source, destination, FileCopier("buffered"))
+    assert error.value.errno == errno.EAGAIN
+    assert source.read_bytes() == DATA
+    assert not destination.exists()
+
+
+def test_cross_device_move_preserves_metadata(tmp_path, source, monkeypatch):
+    force_cross_device(monkeypatch)
+    os.chmod(source, 0o640)
+    os.utime(source, ns=(1_500_000_000_123_456_789, 1_600_000_000_987_654_321))
+    before = os.stat(source)
+    destination = tmp_path / "copia.bin"
+
+    assert move_file(source, destination, FileCopier()) == "copy"
+    after = os.stat(destination)
+    assert not source.exists()
+    assert destination.read_bytes() == DATA
+    assert stat.S_IMODE(after.st_mode) == 0o640
+    assert after.st_mtime_ns == before.st_mtime_ns
+    assert (after.st_uid, after.st_gid) == (before.st_uid, before.st_gid)
+
+
+def test_existing_destination_is_never_overwritten(tmp_path, source):
+    destination = tmp_path / "copia.bin"
+    destination.write_bytes(b"importante")
+    with pytest.raises(FileExistsError):
+        FileCopier().copy(source, destination)
+    assert destination.read_bytes() == b"importante"
+
+
+@pytest.mark.parametrize("backend", ["copy_file_range", "buffered"])
+def test_parallel_chunks_copy_exactly(tmp_path, source, monkeypatch, backend):
+    monkeypatch.setattr(mover, "PARALLEL_CHUNK_SIZE", 4096)
+    copier = FileCopier(backend, chunk_workers=4, parallel_threshold=1024)
+    copier.copy(source, tmp_path / "copia.bin")
+    assert (tmp_path / "copia.bin").read_bytes() == DATA
@@ -0,0 +1,27 @@
+# Ficheiro: tests/test_dedup.py
+
+from threading import Event
+
+from dedup import Deduplicator
+from logic import FileSorterLogic
+
+
+def test_organize_deletes_duplicate_and_reports_hash_stats(tmp_path):
+    source = tmp_path / "origem"
+    source.mkdir()
+    (source / "fatura_a.pdf").write_text("igual")
+    (source / "fatura_b.pdf").write_text("igual")
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    logic.set_rules([{"folder": "FATURAS", "keywords": ["fatura"]}])
+
+    generator = logic.organize_files(source, Event(), dedup=Deduplicator("delete"))
+    events = []
+    try:
+        while True:
+            events.append(next(generator))
+    except StopIteration as e:
+        report = e.value
+
+    assert report["moved_count"] == 1 and report["duplicate_count"] == 1
+    assert [path.name for path in (source / "FATURAS").iterdir()] in (["fatura_a.pdf"], ["fatura_b.pdf"])
+    assert ("log", "Duplicados: 2 hashes calculados, 0.0 MB lidos.") in events
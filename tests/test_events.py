@@ -0,0 +1,127 @@
+# Ficheiro: tests/test_events.py
+
+import threading
+import time
+
+from events import EventChannel, LogBuffer
+
+
+def batches(items):
+    return [data for kind, data in items if kind == "batch"]
+
+
+def test_coalesced_events_become_one_batch():
+    channel = EventChannel(flush_interval=60)
+    channel.send("total_files", "3")
+    for i in range(3):
+        channel.send("log", f"linha {i}")
+        channel.send("progress", str(i + 1))
+    assert channel.empty()
+
+    channel.flush()
+    [batch] = batches(channel.drain(10))
+    assert batch == {"logs": ["linha 0", "linha 1", "linha 2"], "dropped_logs": 0, "progress": "3", "total_files": "3"}
+    assert (channel.events_received, channel.messages_sent) == (7, 1)
+
+
+def test_other_events_flush_pending_batch_first():
+    channel = EventChannel(flush_interval=60)
+    channel.send("log", "antes")
+    channel.send("error", "falhou")
+    assert channel.drain(10) == [
+        ("batch", {"logs": ["antes"], "dropped_logs": 0, "progress": None, "total_files": None}),
+        ("error", "falhou"),
+    ]
+
+
+def test_batch_keeps_latest_lines_and_counts_dropped():
+    channel = EventChannel(flush_interval=60, max_logs_per_batch=2)
+    for i in range(5):
+        channel.send("log", str(i))
+    channel.flush()
+    [batch] = batches(channel.drain(10))
+    assert batch["logs"] == ["3", "4"] and batch["dropped_logs"] == 3
+
+
+def test_send_flushes_once_interval_has_passed():
+    channel = EventChannel(flush_interval=0.05)
+    channel.send("progress", "1")
+    assert channel.empty()
+    time.sleep(0.06)
+    channel.send("progress", "2")
+    assert not channel.empty()
+    assert [batch["progress"] for batch in batches(channel.drain(10))] == ["2"]
+
+
+def test_drain_collects_stale_batch_while_worker_is_stuck():
+    """Os últimos eventos antes de um movimento demorado chegam à interface sem esperar pelo seguinte."""
+    channel = EventChannel(flush_interval=0.05)
+    release = threading.Event()
+
+    def organize():
+        yield ("total_files", "2")
+        yield ("progress", "1")
+        yield ("log", "Movido 'a.pdf' para 'PDF'.")
+        release.wait(5)
+        yield ("progress", "2")
+        yield ("done", "Organização concluída!")
+
+    worker = threading.Thread(target=channel.pump, args=(organize(),))
+    worker.start()
+    try:
+        # Ainda dentro do intervalo: o lote fica pendente.
+        assert batches(channel.drain(10)) == []
+        deadline = time.monotonic() + 2
+        received = []
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.02)
+            received = batches(channel.drain(10))
+        assert received and received[-1]["progress"] == "1"
+        assert received[-1]["logs"][-1] == "Movido 'a.pdf' para 'PDF'."
+    finally:
+        release.set()
+        worker.join(5)
+
+    rest = channel.drain(10)
+    assert [batch["progress"] for batch in batches(rest)] == ["2"]
+    assert rest[-1] == ("done", "Organização concluída!")
+
+
+def test_drain_respects_the_rate_limit():
+    channel = EventChannel(flush_interval=60)
+    channel.send("progress", "1")
+    assert channel.drain(10) == []
+
+
+def test_drain_leaves_pending_batch_behind_queued_messages():
+    channel = EventChannel(flush_interval=0.01)
+    channel.put(("log", "primeiro"))
+    channel.put(("log", "segundo"))
+    channel.send("progress", "1")
+    time.sleep(0.02)
+    # Com a fila por esvaziar, o lote pendente (mais recente) não passa à frente.
+    assert channel.drain(1) == [("log", "primeiro")]
+    items = channel.drain(10)
+    assert items[0] == ("log", "segundo") and batches(items)[0]["progress"] == "1"
+
+
+def test_backpressure_blocks_until_cancelled():
+    channel = EventChannel(maxsize=1)
+    cancel = threading.Event()
+    assert channel.put(("done", "1"), cancel)
+    threading.Timer(0.05, cancel.set).start()
+    assert not channel.put(("done", "2"), cancel)
+    assert channel.drain(10) == [("done", "1")]
+
+
+def test_log_buffer_is_bounded_and_windowed():
+    buffer = LogBuffer(maxlen=5)
+    assert buffer.extend([str(i) for i in range(3)]) == 0
+    assert buffer.extend([str(i) for i in range(3, 8)]) == 3
+    assert (len(buffer), buffer.dropped) == (5, 3)
+    assert buffer.window(0, 2) == (0, ["3", "4"])
+    # A janela é ajustada para ficar cheia quando pede linhas para lá do fim.
+    assert buffer.window(4, 2) == (3, ["6", "7"])
+    assert buffer.window(-3, 10) == (0, ["3", "4", "5", "6", "7"])
+    buffer.clear()
+    assert (len(buffer), buffer.dropped, buffer.window(0, 3)) == (0, 0, (0, []))
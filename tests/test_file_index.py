@@ -0,0 +1,104 @@
+# Ficheiro: tests/test_file_index.py
+
+import os
+import time
+from pathlib import Path
+from threading import Event
+
+from file_index import FileStateIndex, rules_version
+from logic import FileSorterLogic
+
+RULES = [{"folder": "FATURAS", "keywords": ["fatura"]}]
+
+
+def organize(logic: FileSorterLogic, source: Path, index: FileStateIndex):
+    generator = logic.organize_files(source, Event(), recursive=True, state_index=index)
+    try:
+        while True:
+            next(generator)
+    except StopIteration as e:
+        return e.value
+
+
+def backdate(*paths: Path) -> None:
+    """Põe as datas fora da margem do "racy clean", como se as pastas não mudassem há um minuto."""
+    past = time.time() - 60
+    for path in paths:
+        os.utime(path, (past, past))
+
+
+def make_tree(tmp_path: Path):
+    source = tmp_path / "origem"
+    # Sem regra, os .txt e os .pdf vão para a pasta da extensão: nestas pastas já estão no sítio.
+    for path in ["TXT/a.txt", "TXT/nota.txt", "PDF/relatorio.pdf"]:
+        (source / path).parent.mkdir(parents=True, exist_ok=True)
+        (source / path).write_text(path)
+    backdate(source / "TXT", source / "PDF")
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    logic.set_rules(RULES)
+    return source, logic, FileStateIndex(tmp_path / "estado.sqlite3")
+
+
+def test_settled_directory_is_not_listed_again(tmp_path):
+    source, logic, index = make_tree(tmp_path)
+    first = organize(logic, source, index)
+    assert (first["moved_count"], first["skipped_unchanged"]) == (0, 0)
+    assert index.settled_listing(source / "TXT") == ([], 2)
+
+    second = organize(logic, source, index)
+    assert (second["moved_count"], second["skipped_unchanged"]) == (0, 3)
+
+
+def test_new_file_relists_only_its_directory(tmp_path):
+    source, logic, index = make_tree(tmp_path)
+    organize(logic, source, index)
+    (source / "TXT" / "fatura_nova.txt").touch()
+
+    report = organize(logic, source, index)
+    assert report["moved_count"] == 1
+    assert report["skipped_unchanged"] == 3
+    assert (source / "FATURAS" / "fatura_nova.txt").exists()
+
+
+def test_changed_file_is_not_reused(tmp_path):
+    source, logic, index = make_tree(tmp_path)
+    organize(logic, source, index)
+    path = source / "TXT" / "a.txt"
+    records = index.records_in(str(source / "TXT"))
+    record = records[os.stat(path).st_ino]
+    assert index.is_unchanged(record, "a.txt", os.stat(path))
+    path.write_text("outro conteúdo, outro tamanho")
+    assert not index.is_unchanged(record, "a.txt", os.stat(path))
+    assert not index.is_unchanged(record, "b.txt", os.stat(path))
+
+
+def test_rule_change_reevaluates_only_affected_names(tmp_path):
+    source, logic, index = make_tree(tmp_path)
+    organize(logic, source, index)
+    old_version = index.version
+
+    logic.set_rules(RULES + [{"folder": "NOTAS", "keywords": ["nota"]}])
+    report = organize(logic, source, index)
+    assert index.version == rules_version(logic.rules) != old_version
+    assert report["moved_count"] == 1
+    # a.txt e relatorio.pdf não contêm nenhuma palavra-chave alterada.
+    assert report["skipped_unchanged"] == 2
+    assert (source / "NOTAS" / "nota.txt").exists()
+    assert index.outcome_unchanged(old_version, "a.txt")
+    assert not index.outcome_unchanged(old_version, "nota.txt")
+
+
+def test_recently_modified_directory_is_not_settled(tmp_path):
+    source, logic, index = make_tree(tmp_path)
+    # Alterada agora: o mtime cai dentro de RACY_MARGIN_NS do início da execução.
+    (source / "TXT" / "b.txt").touch()
+    organize(logic, source, index)
+    assert index.settled_listing(source / "TXT") is None
+    assert index.settled_listing(source / "PDF") == ([], 1)
+
+    backdate(source / "TXT")
+    organize(logic, source, index)
+    assert index.settled_listing(source / "TXT") == ([], 3)
+    # Mudar a pasta depois de assente volta a obrigar a listá-la.
+    (source / "TXT" / "c.txt").touch()
+    assert index.settled_listing(source / "TXT") is None
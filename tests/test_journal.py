@@ -0,0 +1,110 @@
+# Ficheiro: tests/test_journal.py
+
+import os
+from pathlib import Path
+from threading import Event
+
+import pytest
+
+from journal import MoveJournal, find_journals, read_journal
+from logic import FileSorterLogic
+
+RULES = [{"folder": "FATURAS", "keywords": ["fatura"]}]
+NAMES = ["fatura_1.pdf", "fatura_2.pdf", "fatura_3.pdf", "fatura_4.pdf"]
+
+
+class Crash(BaseException):
+    """Simula a morte do processo: não é apanhada pelos `except Exception` do movimento."""
+
+
+def drain(generator):
+    events = []
+    try:
+        while True:
+            events.append(next(generator))
+    except StopIteration as e:
+        return events, e.value
+
+
+def crash_on_unlink(monkeypatch, call: int) -> None:
+    """Faz o `call`-ésimo os.unlink rebentar antes de apagar: o link do movimento já foi feito."""
+    real_unlink, calls = os.unlink, []
+
+    def unlink(path, *args, **kwargs):
+        calls.append(path)
+        if len(calls) == call:
+            raise Crash()
+        return real_unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "unlink", unlink)
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "origem"
+    source.mkdir()
+    for name in NAMES:
+        (source / name).write_text(name)
+    return source
+
+
+def organize_until_crash(tmp_path: Path, source: Path, monkeypatch, call: int = 2):
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    logic.set_rules(RULES)
+    journal = MoveJournal.create(tmp_path / "diarios", source)
+    crash_on_unlink(monkeypatch, call)
+    with pytest.raises(Crash):
+        drain(logic.organize_files(source, Event(), journal=journal))
+    monkeypatch.undo()
+    return logic, journal.path
+
+
+def listing(folder: Path):
+    return sorted(path.relative_to(folder).as_posix() for path in folder.rglob("*") if path.is_file())
+
+
+def test_crash_between_link_and_unlink_leaves_two_names(tmp_path, source, monkeypatch):
+    _, journal_path = organize_until_crash(tmp_path, source, monkeypatch)
+    # A ordem da varredura é a do sistema de ficheiros: procura-se o nome que ficou nos dois sítios.
+    both = [name for name in NAMES if (source / name).exists() and (source / "FATURAS" / name).exists()]
+    assert len(both) == 1
+    assert os.path.samefile(source / both[0], source / "FATURAS" / both[0])
+    state = read_journal(journal_path)
+    assert state.status is None and len(state.in_doubt) == 3
+
+
+def test_resume_after_crash_does_not_duplicate(tmp_path, source, monkeypatch):
+    logic, journal_path = organize_until_crash(tmp_path, source, monkeypatch)
+    events, report = drain(logic.resume_journal(journal_path, Event()))
+
+    assert not [message for kind, message in events if kind == "error"]
+    assert listing(source) == [f"FATURAS/{name}" for name in NAMES]
+    assert read_journal(journal_path).status == "completed"
+
+
+def test_undo_after_crash_restores_original_names(tmp_path, source, monkeypatch):
+    logic, journal_path = organize_until_crash(tmp_path, source, monkeypatch)
+    events, report = drain(logic.undo_journal(journal_path, Event()))
+
+    assert not [message for kind, message in events if kind == "error"]
+    assert report["restored_count"] == report["total_entries"] == 2
+    assert listing(source) == NAMES
+    assert read_journal(journal_path).status == "undone"
+
+
+def test_undo_interrupted_mid_move_can_be_repeated(tmp_path, source, monkeypatch):
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    logic.set_rules(RULES)
+    drain(logic.organize_files(source, Event(), journal=MoveJournal.create(tmp_path / "diarios", source)))
+    journal_path = find_journals(tmp_path / "diarios", source)[0]
+
+    crash_on_unlink(monkeypatch, 2)
+    with pytest.raises(Crash):
+        drain(logic.undo_journal(journal_path, Event()))
+    monkeypatch.undo()
+    assert len(listing(source)) == 5
+
+    events, report = drain(logic.undo_journal(journal_path, Event()))
+    assert not [message for kind, message in events if kind == "error"]
+    assert listing(source) == NAMES
+    assert read_journal(journal_path).status == "undone"
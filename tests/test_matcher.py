@@ -0,0 +1,166 @@
+# Ficheiro: tests/test_matcher.py
+
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+import pytest
+
+from logic import FileSorterLogic
+from matcher import RuleMatcher, _keyword_chains, _precedence, changed_keywords
+
+# Poucas letras, para que as palavras-chave se sobreponham e sejam prefixos ou sufixos umas das outras.
+ALPHABET = "abcAB._- 1"
+
+
+def baseline_destination(rules: List[Dict[str, Any]], filename: str) -> str:
+    """O ciclo original de `_get_destination_folder`, regra a regra e palavra-chave a palavra-chave."""
+    file_path = Path(filename)
+    filename_lower = file_path.name.lower()
+    for rule in rules:
+        for keyword in rule.get("keywords", []):
+            if keyword.startswith('.') and filename_lower.endswith(keyword):
+                return rule["folder"]
+            elif not keyword.startswith('.') and keyword in filename_lower:
+                return rule["folder"]
+    extension = file_path.suffix.lower().replace('.', '')
+    return extension.upper() if extension else "SEM_EXTENSAO"
+
+
+def random_word(rng: random.Random, min_length: int = 1, max_length: int = 4) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(min_length, max_length)))
+
+
+def random_rules(rng: random.Random) -> List[Dict[str, Any]]:
+    pool = [random_word(rng) for _ in range(rng.randint(1, 12))]
+    # Prefixos, sufixos e extensões de palavras já usadas, para forçar sobreposições.
+    pool += [word[:rng.randint(1, len(word))] for word in pool] + [word[-1:] for word in pool]
+    pool += ["." + random_word(rng, 1, 3) for _ in range(rng.randint(0, 4))]
+    rules = []
+    for i in range(rng.randint(0, 8)):
+        # Algumas regras ficam vazias; as palavras repetem-se entre regras (a primeira ganha).
+        keywords = rng.sample(pool, rng.randint(0, min(4, len(pool))))
+        rules.append({"folder": f"PASTA_{i}", "keywords": keywords})
+    return rules
+
+
+def random_names(rng: random.Random, rules: List[Dict[str, Any]], count: int) -> List[str]:
+    keywords = [keyword for rule in rules for keyword in rule["keywords"]] or ["x"]
+    names = []
+    for _ in range(count):
+        name = random_word(rng, 0, 3) + rng.choice(keywords) + random_word(rng, 0, 3)
+        if rng.random() < 0.5:
+            name = name.swapcase() if rng.random() < 0.5 else name.upper()
+        if rng.random() < 0.3:
+            name += "." + rng.choice(["pdf", "JPG", "tar.gz", "", "Txt"])
+        # "." e ".." não são nomes de ficheiros (Path(".").name é "").
+        names.append(name if name.strip(".") else "a" + name)
+    return names
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_classify_batch_matches_baseline_loop(seed):
+    rng = random.Random(seed)
+    rules = random_rules(rng)
+    names = random_names(rng, rules, 50)
+    expected = [baseline_destination(rules, name) for name in names]
+    assert RuleMatcher(rules).classify_batch(names) == expected
+
+
+def test_first_rule_wins_with_overlapping_keywords():
+    rules = [
+        {"folder": "VAZIA", "keywords": []},
+        {"folder": "CURTA", "keywords": ["rel"]},
+        {"folder": "LONGA", "keywords": ["relatorio", ".pdf"]},
+        {"folder": "SUFIXO", "keywords": [".tar.gz", ".gz"]},
+        {"folder": "MAIUSCULAS", "keywords": ["FATURA"]},
+    ]
+    names = ["Relatorio_Q3.PDF", "notas.pdf", "copia.tar.gz", "x.gz", "FATURA.txt", "sem_ponto"]
+    assert RuleMatcher(rules).classify_batch(names) == [baseline_destination(rules, name) for name in names]
+    assert RuleMatcher(rules).classify_batch(names) == ["CURTA", "LONGA", "SUFIXO", "SUFIXO", "TXT", "SEM_EXTENSAO"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_logic_destination_folder_matches_baseline_loop(tmp_path, seed):
+    rng = random.Random(1000 + seed)
+    rules = random_rules(rng)
+    logic = FileSorterLogic(tmp_path / "config.json")
+    logic.set_rules(rules)
+    for name in random_names(rng, rules, 20):
+        assert logic._get_destination_folder(tmp_path / name) == baseline_destination(rules, name)
+
+
+def baseline_changed_keywords(old_rules: List[Dict[str, Any]], new_rules: List[Dict[str, Any]]) -> Set[str]:
+    """A comparação original de `changed_keywords`, par a par entre todas as palavras-chave."""
+    old, new = _keyword_chains(old_rules), _keyword_chains(new_rules)
+
+    def outcomes(chain):
+        return [outcome for _, outcome, _ in chain]
+
+    changed = {keyword for keyword in old.keys() | new.keys()
+               if keyword not in old or keyword not in new or outcomes(old[keyword]) != outcomes(new[keyword])}
+    common = [keyword for keyword in old if keyword not in changed]
+    for i, first in enumerate(common):
+        for second in common[i + 1:]:
+            if outcomes(old[first]) == outcomes(old[second]):
+                continue
+            if _precedence(old[first], old[second]) != _precedence(new[first], new[second]):
+                changed.update((first, second))
+    return changed
+
+
+def edited_rules(rng: random.Random, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """As regras depois de uma edição: reordenadas, com palavras-chave movidas e condições novas."""
+    rules = [dict(rule, keywords=list(rule["keywords"])) for rule in rules]
+    for _ in range(rng.randint(0, 3)):
+        edit = rng.random()
+        if edit < 0.4 and len(rules) > 1:
+            i, j = rng.sample(range(len(rules)), 2)
+            rules[i], rules[j] = rules[j], rules[i]
+        elif edit < 0.6 and rules:
+            source, target = rng.choice(rules), rng.choice(rules)
+            if source["keywords"]:
+                target["keywords"].append(source["keywords"].pop(rng.randrange(len(source["keywords"]))))
+        elif edit < 0.8 and rules:
+            rng.choice(rules)["folder"] = rng.choice([rule["folder"] for rule in rules])
+        elif rules:
+            rng.choice(rules)["conditions"] = rng.choice([{"min_size": "1KB"}, {"types": ["image"]}])
+    return rules
+
+
+def with_conditions(rng: random.Random, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for rule in rules:
+        if rng.random() < 0.2:
+            rule["conditions"] = rng.choice([{"min_size": "1KB"}, {"types": ["image"]}, {"max_size": 10}])
+    return rules
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_changed_keywords_matches_pairwise_comparison(seed):
+    rng = random.Random(5000 + seed)
+    old_rules = with_conditions(rng, random_rules(rng)) if seed % 2 else random_rules(rng)
+    new_rules = edited_rules(rng, old_rules)
+    assert changed_keywords(old_rules, new_rules) == baseline_changed_keywords(old_rules, new_rules)
+
+
+def test_names_without_changed_keywords_keep_destination():
+    rng = random.Random(7)
+    for _ in range(50):
+        old_rules = random_rules(rng)
+        new_rules = edited_rules(rng, old_rules)
+        changed = changed_keywords(old_rules, new_rules)
+        names = [name for name in random_names(rng, old_rules + new_rules, 50)
+                 if not any(keyword.lower() in name.lower() for keyword in changed)]
+        assert RuleMatcher(old_rules).classify_batch(names) == RuleMatcher(new_rules).classify_batch(names)
+
+
+def test_changed_keywords_scales_to_large_rule_sets():
+    rules = [{"folder": f"PASTA_{i % 50}", "keywords": [f"palavra{i:05d}"]} for i in range(5000)]
+    moved = rules[1:2500] + rules[:1] + rules[2500:]
+    started = time.perf_counter()
+    changed = changed_keywords(rules, moved)
+    assert time.perf_counter() - started < 2.0
+    # A primeira palavra passou para depois de 2499 outras; só as de outro destino trocaram com ela.
+    assert "palavra00000" in changed and "palavra04999" not in changed
+    assert len(changed) == 1 + sum(1 for i in range(1, 2500) if i % 50 != 0)
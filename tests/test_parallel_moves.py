@@ -0,0 +1,168 @@
+# Ficheiro: tests/test_parallel_moves.py
+
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from threading import Event
+
+import pytest
+
+import mover
+from collisions import DestinationNameIndex
+from mover import ParallelMoveExecutor
+
+
+class WorkerDied(BaseException):
+    """Falha que `run_move` não apanha: tem de chegar a quem consome os resultados."""
+
+
+def make_moves(tmp_path: Path, folders, count: int):
+    moves = []
+    for folder in folders:
+        (tmp_path / "destino" / folder).mkdir(parents=True, exist_ok=True)
+    (tmp_path / "origem").mkdir(exist_ok=True)
+    for i in range(count):
+        folder = folders[i % len(folders)]
+        source = tmp_path / "origem" / f"{folder}_{i}.bin"
+        source.write_bytes(b"x")
+        moves.append((source, tmp_path / "destino" / folder / source.name))
+    return moves
+
+
+def fake_devices(monkeypatch, devices):
+    """Cada pasta de destino passa a estar no dispositivo indicado (pelo nome da pasta)."""
+    monkeypatch.setattr(ParallelMoveExecutor, "_device_of", lambda self, folder: devices[folder.name])
+
+
+def mover_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("mover-")]
+
+
+def test_concurrency_is_limited_per_device(tmp_path, monkeypatch):
+    fake_devices(monkeypatch, {"LENTO": 1, "RAPIDO": 2, "OUTRO": 3})
+    lock = threading.Lock()
+    running, peak = defaultdict(int), defaultdict(int)
+    real_run_move = mover.run_move
+
+    def tracked(source, destination, *args):
+        device = destination.parent.name
+        with lock:
+            running[device] += 1
+            peak[device] = max(peak[device], running[device])
+        time.sleep(0.02)
+        try:
+            return real_run_move(source, destination, *args)
+        finally:
+            with lock:
+                running[device] -= 1
+
+    monkeypatch.setattr(mover, "run_move", tracked)
+    moves = make_moves(tmp_path, ["LENTO", "RAPIDO", "OUTRO"], 36)
+    executor = ParallelMoveExecutor(default_concurrency=2, per_device_limits={1: 1, 2: 4})
+    results = list(executor.run(moves, Event()))
+
+    assert len(results) == 36 and not [result for result in results if result.error or result.cancelled]
+    assert all(destination.exists() for _, destination in moves)
+    assert peak["LENTO"] == 1
+    assert 1 < peak["RAPIDO"] <= 4
+    assert 1 < peak["OUTRO"] <= 2
+    assert not mover_threads()
+
+
+def test_plan_is_consumed_lazily(tmp_path):
+    moves = make_moves(tmp_path, ["A"], 20)
+    taken = []
+
+    def plan():
+        for move in moves:
+            taken.append(move)
+            yield move
+
+    results = ParallelMoveExecutor(default_concurrency=2).run(plan(), Event())
+    next(results)
+    # No máximo o dobro das threads fica em voo; o resto do plano ainda não foi lido.
+    assert len(taken) <= 2 * 2 + 1
+    assert len(list(results)) == 19
+
+
+def test_cancellation_drains_submitted_moves(tmp_path, monkeypatch):
+    moves = make_moves(tmp_path, ["A"], 20)
+    cancel_event = Event()
+    real_run_move = mover.run_move
+    taken = []
+
+    def slow_then_cancel(source, destination, *args):
+        result = real_run_move(source, destination, *args)
+        cancel_event.set()
+        time.sleep(0.05)
+        return result
+
+    def plan():
+        for move in moves:
+            taken.append(move)
+            yield move
+
+    monkeypatch.setattr(mover, "run_move", slow_then_cancel)
+    results = list(ParallelMoveExecutor(default_concurrency=2).run(plan(), cancel_event))
+
+    # Cada movimento lido do plano tem um resultado; os que estavam em fila voltam cancelados.
+    assert sorted(result.source for result in results) == sorted(source for source, _ in taken)
+    cancelled = [result for result in results if result.cancelled]
+    moved = [result for result in results if not result.cancelled]
+    assert cancelled and moved and len(taken) < len(moves)
+    assert all(result.source.exists() and not result.destination.exists() for result in cancelled)
+    assert all(result.destination.exists() and not result.source.exists() for result in moved)
+    assert all(source.exists() for source, _ in moves[len(taken):])
+    assert not mover_threads()
+
+
+def test_failed_move_is_reported_and_others_continue(tmp_path):
+    moves = make_moves(tmp_path, ["A"], 6)
+    moves[2][0].unlink()
+    results = {result.source: result for result in ParallelMoveExecutor(default_concurrency=3).run(moves, Event())}
+
+    assert isinstance(results[moves[2][0]].error, FileNotFoundError)
+    assert [source for source, result in results.items() if result.error] == [moves[2][0]]
+    assert all(destination.exists() for i, (_, destination) in enumerate(moves) if i != 2)
+
+
+def test_collision_from_another_process_picks_a_new_name(tmp_path):
+    moves = make_moves(tmp_path, ["A"], 3)
+    moves[1][1].write_bytes(b"de outro processo")
+    results = list(ParallelMoveExecutor().run(moves, Event(), name_index=DestinationNameIndex()))
+
+    assert not [result for result in results if result.error]
+    assert moves[1][1].read_bytes() == b"de outro processo"
+    renamed = [result.destination for result in results if result.source == moves[1][0]]
+    assert renamed[0] != moves[1][1] and renamed[0].read_bytes() == b"x"
+
+
+def test_worker_failure_propagates_and_stops_the_pools(tmp_path, monkeypatch):
+    moves = make_moves(tmp_path, ["A"], 10)
+    real_run_move = mover.run_move
+
+    def dies_on_fourth(source, destination, *args):
+        if source == moves[3][0]:
+            raise WorkerDied()
+        return real_run_move(source, destination, *args)
+
+    monkeypatch.setattr(mover, "run_move", dies_on_fourth)
+    with pytest.raises(WorkerDied):
+        list(ParallelMoveExecutor(default_concurrency=2).run(moves, Event()))
+    assert not mover_threads()
+    assert moves[3][0].exists()
+
+
+def test_missing_destination_folder_propagates(tmp_path):
+    moves = make_moves(tmp_path, ["A"], 2)
+    moves.append((moves[0][0], tmp_path / "destino" / "NAO_EXISTE" / "x.bin"))
+    with pytest.raises(FileNotFoundError):
+        list(ParallelMoveExecutor().run(moves, Event()))
+    # Os movimentos já submetidos terminam antes de a exceção sair.
+    assert not mover_threads()
+
+
+def test_invalid_concurrency_is_rejected():
+    with pytest.raises(ValueError):
+        ParallelMoveExecutor(default_concurrency=0)
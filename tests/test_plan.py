@@ -0,0 +1,150 @@
+# Ficheiro: tests/test_plan.py
+
+import json
+import os
+from threading import Event
+
+import pytest
+
+import cli
+from journal import MoveJournal, read_journal
+from logic import FileSorterLogic
+from planner import PLAN_FORMAT, PLAN_VERSION, MovePlan
+
+HEADER = {"format": PLAN_FORMAT, "version": PLAN_VERSION, "source_folder": "/origem"}
+
+
+def drain(generator):
+    events = []
+    try:
+        while True:
+            events.append(next(generator))
+    except StopIteration as e:
+        return events, e.value
+
+
+def test_execute_plan_rejects_moves_outside_source(tmp_path):
+    source = tmp_path / "origem"
+    source.mkdir()
+    for name in ["fatura.pdf", "foto.jpg", "nota.txt"]:
+        (source / name).write_text(name)
+    outside = tmp_path / "fora"
+    outside.mkdir()
+    (outside / "segredo.txt").write_text("segredo")
+    os.symlink(outside, source / "atalho")
+
+    plan = MovePlan(source_folder=str(source), moves=[
+        ("fatura.pdf", "FATURAS", "fatura.pdf"),
+        ("foto.jpg", "../fora", "foto.jpg"),
+        ("../fora/segredo.txt", "ROUBADOS", "segredo.txt"),
+        ("nota.txt", "NOTAS", "../../nota.txt"),
+        ("nota.txt", "atalho", "nota.txt"),
+        ("nota.txt", str(outside), "nota.txt"),
+    ])
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    events, report = drain(logic.execute_plan(plan, Event()))
+
+    errors = [message for kind, message in events if kind == "error"]
+    assert len(errors) == 5
+    assert report["moved_count"] == 1
+    assert (source / "FATURAS" / "fatura.pdf").exists()
+    assert sorted(os.listdir(outside)) == ["segredo.txt"]
+    assert (source / "foto.jpg").exists() and (source / "nota.txt").exists()
+    assert not (source / "ROUBADOS").exists()
+    assert [message for kind, message in events if kind == "progress"][-1] == "6"
+
+
+def test_rejected_moves_keep_journal_ids_aligned(tmp_path):
+    source = tmp_path / "origem"
+    source.mkdir()
+    (source / "a.txt").touch()
+    (source / "b.txt").touch()
+    plan = MovePlan(source_folder=str(source), moves=[
+        ("a.txt", "..", "a.txt"),
+        ("b.txt", "TEXTOS", "b.txt"),
+    ])
+    journal = MoveJournal.create(tmp_path / "diarios", source)
+    drain(FileSorterLogic(config_path=tmp_path / "config.json").execute_plan(plan, Event(), journal=journal))
+
+    state = read_journal(journal.path)
+    assert [move_id for move_id, _, _ in state.completed] == [1]
+
+
+def test_html_report_failure_returns_empty_string(tmp_path):
+    blocker = tmp_path / "ficheiro"
+    blocker.touch()
+    plan = MovePlan(source_folder=str(tmp_path), moves=[("a.txt", "TEXTOS", "a.txt")])
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    assert logic.generate_html_report(plan.to_report_data(), output_dir=blocker / "relatorio") == ""
+    assert logic.generate_html_report(plan.to_report_data(), output_dir=tmp_path).endswith("index.html")
+
+
+def write_plan(path, header, *moves):
+    lines = [header if isinstance(header, str) else json.dumps(header)]
+    lines += [move if isinstance(move, str) else json.dumps(move) for move in moves]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_plan_round_trip(tmp_path):
+    plan = MovePlan(source_folder="/origem", moves=[("a.pdf", "PDF", "a.pdf")], created_folders=["PDF"],
+                    total_files_scanned=3)
+    plan.save(tmp_path / "plano.jsonl")
+    assert MovePlan.load(tmp_path / "plano.jsonl") == plan
+    # Sem total no cabeçalho conta-se o número de movimentos.
+    assert MovePlan.load(write_plan(tmp_path / "b.jsonl", HEADER, ["a", "B", "a"], "", ["b", "B", "b"])).total_files_scanned == 2
+
+
+@pytest.mark.parametrize("header, moves", [
+    ("", []),
+    ("isto não é JSON", []),
+    ("[1, 2]", []),
+    (dict(HEADER, version=PLAN_VERSION + 1), []),
+    ({k: v for k, v in HEADER.items() if k != "source_folder"}, []),
+    (dict(HEADER, source_folder=["/origem"]), []),
+    (dict(HEADER, created_folders="PDF"), []),
+    (dict(HEADER, total_files_scanned="10"), []),
+    (HEADER, [["a.pdf", "PDF"]]),
+    (HEADER, [["a.pdf", "PDF", "a.pdf", "extra"]]),
+    (HEADER, [{"origem": "a.pdf"}]),
+    (HEADER, [["a.pdf", 1, "a.pdf"]]),
+    (HEADER, ["[\"a.pdf\", \"PDF\""]),
+])
+def test_malformed_plan_raises_value_error(tmp_path, header, moves):
+    with pytest.raises(ValueError):
+        MovePlan.load(write_plan(tmp_path / "plano.jsonl", header, *moves))
+
+
+def test_malformed_plan_reports_line(tmp_path):
+    path = write_plan(tmp_path / "plano.jsonl", HEADER, ["a", "B", "a"], ["b", "B"])
+    with pytest.raises(ValueError, match="linha 3"):
+        MovePlan.load(path)
+
+
+def test_cli_apply_plan_rejects_malformed_plan(tmp_path, monkeypatch, capsys):
+    for variable in ("XDG_CACHE_HOME", "XDG_DATA_HOME", "XDG_CONFIG_HOME", "XDG_STATE_HOME"):
+        monkeypatch.setenv(variable, str(tmp_path / "app" / variable))
+    source = tmp_path / "origem"
+    source.mkdir()
+    (source / "a.pdf").touch()
+    path = write_plan(tmp_path / "plano.jsonl", dict(HEADER, source_folder=str(source)), ["a.pdf", "PDF"])
+
+    assert cli.main(["--config", str(tmp_path / "config.json"), "apply-plan", str(path)]) == 2
+    assert "Não foi possível ler o plano" in capsys.readouterr().err
+    assert os.listdir(source) == ["a.pdf"]
+
+
+def test_resume_with_unreadable_plan_reports_error(tmp_path):
+    source = tmp_path / "origem"
+    source.mkdir()
+    (source / "a.pdf").touch()
+    plan_path = tmp_path / "plano.jsonl"
+    MovePlan(source_folder=str(source), moves=[("a.pdf", "PDF", "a.pdf")]).save(plan_path)
+    journal = MoveJournal.create(tmp_path / "diarios", source, plan_path=plan_path)
+    write_plan(plan_path, dict(HEADER, source_folder=str(source)), ["a.pdf"])
+
+    events, report = drain(FileSorterLogic(config_path=tmp_path / "config.json").resume_journal(journal.path, Event()))
+    assert report == {}
+    assert [message for kind, message in events if kind == "error"] == [
+        f"Não foi possível ler o plano: '{plan_path}', linha 2: era esperado um array de três nomes."]
+    assert (source / "a.pdf").exists()
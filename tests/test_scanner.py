@@ -0,0 +1,32 @@
+# Ficheiro: tests/test_scanner.py
+
+from pathlib import Path
+
+from scanner import DirectoryScanner
+
+
+def make_tree(root: Path) -> None:
+    for folder in ["a", "a/interior", "b", "DESTINO", "DESTINO/sub"]:
+        (root / folder).mkdir(parents=True)
+    for path in ["raiz.txt", "a/1.txt", "a/interior/2.txt", "b/3.txt", "DESTINO/4.txt", "DESTINO/sub/5.txt"]:
+        (root / path).touch()
+
+
+def test_recursive_scan_respects_exclude_and_depth(tmp_path):
+    make_tree(tmp_path)
+    names = {entry.name for entry in DirectoryScanner(tmp_path, recursive=True, exclude=["b"])}
+    assert names == {"raiz.txt", "1.txt", "2.txt", "4.txt", "5.txt"}
+    names = {entry.name for entry in DirectoryScanner(tmp_path, recursive=True, max_depth=1)}
+    assert names == {"raiz.txt", "1.txt", "3.txt", "4.txt"}
+
+
+def test_skip_dirs_added_after_parent_was_listed(tmp_path):
+    make_tree(tmp_path)
+    scanner = DirectoryScanner(tmp_path, recursive=True)
+    seen = []
+    for entry in scanner:
+        seen.append(entry.name)
+        # A raiz já foi listada e "DESTINO" já está na pilha: passa a ser um destino a evitar.
+        scanner.skip_dirs.add(tmp_path / "DESTINO")
+    assert "4.txt" not in seen and "5.txt" not in seen
+    assert set(seen) == {"raiz.txt", "1.txt", "2.txt", "3.txt"}
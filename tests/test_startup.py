@@ -0,0 +1,47 @@
+# Ficheiro: tests/test_startup.py
+"""Versão de teste de `benchmarks/bench_startup.py`: o arranque não carrega a IA nem o Tk."""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Nunca carregados no arranque: o cliente da IA só entra no GeminiRuleSuggester.
+AI_AND_GUI_MODULES = ("google.generativeai", "dotenv", "tkinter", "tkinterdnd2")
+# Módulo importado -> módulos que não pode carregar. O motor (logic) é o caminho só-regras da
+# interface e dos processos do lote; a CLI só o importa em main(), e o lote e a vigilância nos seus comandos.
+FORBIDDEN_MODULES = {
+    "logic": AI_AND_GUI_MODULES + ("batch", "watcher", "multiprocessing"),
+    "cli": AI_AND_GUI_MODULES + ("logic", "ai_cache", "batch", "watcher", "multiprocessing"),
+}
+# Muito acima do orçamento do benchmark (150 ms): aqui só se apanham regressões grosseiras.
+BUDGET_SECONDS = 1.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"loaded": [m for m in {forbidden!r} if m in sys.modules], "seconds": elapsed}}))
+"""
+
+
+@pytest.mark.parametrize("module", sorted(FORBIDDEN_MODULES))
+def test_import_is_light(module):
+    probe = _PROBE.format(module=module, forbidden=FORBIDDEN_MODULES[module])
+    result = subprocess.run([sys.executable, "-c", probe], cwd=REPO_ROOT, check=True,
+                            capture_output=True, text=True, timeout=60)
+    loaded = json.loads(result.stdout)
+    assert loaded["loaded"] == []
+    assert loaded["seconds"] < BUDGET_SECONDS
+
+
+def test_cli_help_runs_quickly():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "cli.py", "--help"], cwd=REPO_ROOT, check=True,
+                   capture_output=True, timeout=60)
+    assert time.perf_counter() - start < BUDGET_SECONDS * 3
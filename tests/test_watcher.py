@@ -0,0 +1,167 @@
+# Ficheiro: tests/test_watcher.py
+
+import json
+import threading
+import time
+
+import pytest
+
+import watcher
+from logic import FileSorterLogic
+from watcher import FolderWatcher, PollingObserver, is_partial_name
+
+RULES = [{"folder": "FATURAS", "keywords": ["fatura"]}]
+FAST = {"backend": "polling", "poll_interval": 0.03, "quiet_period": 0.05, "open_quiet_period": 0.3}
+
+
+def wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+class Running:
+    """Corre o gerador da vigilância numa thread e guarda os eventos emitidos."""
+
+    def __init__(self, folder_watcher: FolderWatcher):
+        self.watcher = folder_watcher
+        self.events = []
+        self.report = None
+        self.cancel = threading.Event()
+        self.thread = threading.Thread(target=self._run)
+
+    def _run(self):
+        generator = self.watcher.run(self.cancel)
+        try:
+            while True:
+                self.events.append(next(generator))
+        except StopIteration as e:
+            self.report = e.value
+
+    def logs(self):
+        return [message for kind, message in self.events if kind == "log"]
+
+    def __enter__(self):
+        self.thread.start()
+        assert wait_until(lambda: self.events), "a vigilância não arrancou"
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel.set()
+        self.thread.join(5)
+
+
+@pytest.fixture
+def logic(tmp_path):
+    logic = FileSorterLogic(config_path=tmp_path / "config.json")
+    logic.set_rules(RULES)
+    logic.save_rules()
+    return logic
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    return inbox
+
+
+def test_polling_observer_reports_changed_then_closed_once(inbox):
+    observer = PollingObserver(inbox, interval=0)
+    (inbox / "a.pdf").write_bytes(b"1")
+    assert observer.read(0) == [("a.pdf", "changed")]
+    assert observer.read(0) == [("a.pdf", "closed")]
+    assert observer.read(0) == []
+    (inbox / "a.pdf").write_bytes(b"12")
+    assert observer.read(0) == [("a.pdf", "changed")]
+    (inbox / "a.pdf").unlink()
+    assert observer.read(0) == [("a.pdf", "removed")]
+
+
+def test_polling_backend_sorts_new_files(logic, inbox):
+    with Running(FolderWatcher(logic, inbox, **FAST)) as running:
+        assert "(polling)" in running.logs()[0]
+        (inbox / "fatura_1.pdf").write_text("fatura")
+        (inbox / "notas.txt").write_text("notas")
+        assert wait_until(lambda: (inbox / "FATURAS" / "fatura_1.pdf").exists() and (inbox / "TXT" / "notas.txt").exists())
+    assert not (inbox / "fatura_1.pdf").exists()
+    assert running.report["sorted"] == running.report["arrived"] == 2
+    assert running.events[-1] == ("done", "Vigilância terminada: 2 ficheiros ordenados.")
+
+
+def test_quiet_period_debounces_events(logic, inbox):
+    folder_watcher = FolderWatcher(logic, inbox, quiet_period=0.1, open_quiet_period=2.0)
+    # Um ficheiro a ser escrito só fica pronto 2 s depois do último evento...
+    folder_watcher._note("a.pdf", "changed", 0.0)
+    folder_watcher._note("a.pdf", "changed", 1.0)
+    assert folder_watcher._pop_ready(2.9) == []
+    # ...ou pouco depois de fechado; a chegada é a do primeiro evento.
+    folder_watcher._note("a.pdf", "closed", 1.5)
+    assert folder_watcher._pop_ready(1.55) == []
+    assert folder_watcher._pop_ready(1.6) == [("a.pdf", 0.0)]
+    assert folder_watcher._pop_ready(10.0) == []
+    assert folder_watcher.stats.arrived == 1
+
+    folder_watcher._note("b.pdf", "closed", 0.0)
+    folder_watcher._note("b.pdf", "removed", 0.05)
+    assert folder_watcher._pop_ready(1.0) == []
+
+
+def test_file_being_written_is_not_moved_until_it_settles(logic, inbox):
+    path = inbox / "fatura_grande.pdf"
+    # O escritor é mais rápido do que a leitura periódica: cada leitura vê um tamanho novo.
+    with Running(FolderWatcher(logic, inbox, **dict(FAST, poll_interval=0.1, open_quiet_period=5.0))):
+        with path.open("wb") as f:
+            for _ in range(30):
+                f.write(b"x" * 1024)
+                f.flush()
+                time.sleep(0.02)
+                assert path.exists()
+        assert wait_until(lambda: (inbox / "FATURAS" / "fatura_grande.pdf").exists(), timeout=2.0)
+    assert (inbox / "FATURAS" / "fatura_grande.pdf").stat().st_size == 30 * 1024
+
+
+def test_temporary_and_excluded_files_are_ignored(logic, inbox):
+    names = ["fatura.pdf.crdownload", "fatura.pdf.part", ".fatura.pdf.swp", "~$fatura.docx", "fatura.iso"]
+    assert all(is_partial_name(name) for name in names[:4])
+    with Running(FolderWatcher(logic, inbox, exclude=["*.iso"], **FAST)) as running:
+        for name in names:
+            (inbox / name).write_text("a meio")
+        assert wait_until(lambda: running.watcher.stats.ignored == len(names))
+        # O browser acaba a descarga e dá o nome final ao ficheiro.
+        (inbox / "fatura.pdf.crdownload").rename(inbox / "fatura.pdf")
+        assert wait_until(lambda: (inbox / "FATURAS" / "fatura.pdf").exists())
+    assert sorted(path.name for path in inbox.iterdir() if path.is_file()) == sorted(names[1:])
+    assert running.report["sorted"] == 1
+
+
+def test_rules_file_is_reloaded_when_it_changes(logic, inbox, monkeypatch):
+    monkeypatch.setattr(watcher, "CONFIG_CHECK_INTERVAL", 0.05)
+    with Running(FolderWatcher(logic, inbox, **FAST)) as running:
+        # Um ficheiro a meio de ser gravado é ignorado e as regras anteriores mantêm-se.
+        logic.config_path.write_text('[{"folder": "RECI', encoding="utf-8")
+        time.sleep(0.2)
+        assert logic.rules == RULES
+
+        new_rules = RULES + [{"folder": "RECIBOS", "keywords": ["recibo"]}]
+        logic.config_path.write_text(json.dumps(new_rules), encoding="utf-8")
+        assert wait_until(lambda: "Regras recarregadas (2 regras)." in running.logs())
+        (inbox / "recibo_1.pdf").write_text("recibo")
+        assert wait_until(lambda: (inbox / "RECIBOS" / "recibo_1.pdf").exists())
+    assert logic.rules == new_rules
+    assert running.report["rule_reloads"] == 1
+
+
+def test_rules_file_inside_watched_folder_is_never_moved(inbox):
+    logic = FileSorterLogic(config_path=inbox / "config.json")
+    logic.set_rules(RULES)
+    logic.save_rules()
+    with Running(FolderWatcher(logic, inbox, **FAST)) as running:
+        (inbox / "fatura_1.pdf").write_text("fatura")
+        assert wait_until(lambda: (inbox / "FATURAS" / "fatura_1.pdf").exists())
+        time.sleep(0.1)
+    assert (inbox / "config.json").exists()
+    assert running.report["sorted"] == 1
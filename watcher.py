@@ -0,0 +1,435 @@
+# Ficheiro: watcher.py
+
+import ctypes
+import ctypes.util
+import heapq
+import json
+import logging
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from collections import deque
+from fnmatch import fnmatch
+from pathlib import Path
+from threading import Event
+from typing import Any, Deque, Dict, Generator, List, Optional, Sequence, Tuple, Union
+
+from attributes import PathEntry
+from collisions import DestinationNameIndex
+from mover import move_without_collision
+
+# Espera depois do último evento de um ficheiro fechado (ou movido para a pasta) antes de o ordenar.
+QUIET_PERIOD = 0.1
+# Espera depois do último evento de um ficheiro que ainda não foi visto a fechar (pode estar a ser escrito).
+OPEN_QUIET_PERIOD = 2.0
+POLL_INTERVAL = 0.25
+# Intervalo entre verificações do ficheiro de regras.
+CONFIG_CHECK_INTERVAL = 1.0
+# Os nomes conhecidos das pastas de destino são relidos ao fim deste tempo, porque outros
+# programas também lá podem criar ou apagar ficheiros.
+NAME_INDEX_MAX_AGE = 60.0
+# Espera máxima de cada leitura, para que o cancelamento e as estatísticas não se atrasem.
+MAX_WAIT = 0.5
+# Latências guardadas para os percentis.
+LATENCY_WINDOW = 1000
+
+# Ficheiros temporários de browsers e programas de descarga, e ficheiros escondidos
+# (as escritas atómicas costumam usar um nome começado por '.'), nunca são ordenados.
+PARTIAL_SUFFIXES = (".part", ".partial", ".crdownload", ".download", ".opdownload", ".tmp", ".!qb")
+IGNORED_PREFIXES = (".", "~$")
+
+# Constantes de <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_UNMOUNT = 0x00002000
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 256 * 1024
+
+# Notas dos observadores: (nome, tipo), com tipo "changed" (criado ou a ser escrito),
+# "closed" (escrita terminada ou movido para a pasta) ou "removed".
+Note = Tuple[str, str]
+
+
+def is_partial_name(name: str) -> bool:
+    return name.startswith(IGNORED_PREFIXES) or name.lower().endswith(PARTIAL_SUFFIXES)
+
+
+def _load_libc() -> Any:
+    if not sys.platform.startswith("linux"):
+        raise OSError("inotify só existe no Linux.")
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("A biblioteca C não tem inotify.")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class InotifyObserver:
+    """Observa uma pasta com inotify (via ctypes), sem dependências externas.
+
+    Na primeira leitura, e depois de a fila do kernel transbordar, devolve todos os
+    ficheiros da pasta como "changed", para que nada fique por ordenar.
+    """
+
+    name = "inotify"
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        libc = _load_libc()
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        if libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, os.strerror(error), str(folder))
+        self._rescan = True
+
+    def read(self, timeout: float) -> List[Note]:
+        if self._rescan:
+            self._rescan = False
+            return [(name, "changed") for name in _list_files(self.folder)]
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+        notes = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                logging.error(f"A fila do inotify transbordou em '{self.folder}'; a pasta vai ser relida.")
+                self._rescan = True
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_UNMOUNT | IN_IGNORED):
+                raise FileNotFoundError(f"A pasta vigiada '{self.folder}' deixou de existir.")
+            elif mask & IN_ISDIR or not name:
+                continue
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                notes.append((name, "closed"))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                notes.append((name, "removed"))
+            else:
+                notes.append((name, "changed"))
+        return notes
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingObserver:
+    """Alternativa portátil ao inotify: lista a pasta a cada `interval` segundos.
+
+    Um ficheiro novo ou alterado é "changed"; quando o tamanho e o mtime se mantêm entre
+    duas leituras seguidas passa a "closed" (uma só vez).
+    """
+
+    name = "polling"
+
+    def __init__(self, folder: Path, interval: float = POLL_INTERVAL):
+        self.folder = folder
+        self.interval = interval
+        # nome -> ((tamanho, mtime_ns), já comunicado como estável)
+        self._seen: Dict[str, Tuple[Tuple[int, int], bool]] = {}
+        self._next_poll = 0.0
+
+    def read(self, timeout: float) -> List[Note]:
+        wait = self._next_poll - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, max(timeout, 0)))
+            if wait > timeout:
+                return []
+        self._next_poll = time.monotonic() + self.interval
+        notes = []
+        current: Dict[str, Tuple[Tuple[int, int], bool]] = {}
+        try:
+            iterator = os.scandir(self.folder)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"A pasta vigiada '{self.folder}' deixou de existir.")
+        with iterator:
+            for entry in iterator:
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    entry_stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                signature = (entry_stat.st_size, entry_stat.st_mtime_ns)
+                previous = self._seen.get(entry.name)
+                if previous is None or previous[0] != signature:
+                    current[entry.name] = (signature, False)
+                    notes.append((entry.name, "changed"))
+                else:
+                    current[entry.name] = (signature, True)
+                    if not previous[1]:
+                        notes.append((entry.name, "closed"))
+        notes.extend((name, "removed") for name in self._seen.keys() - current.keys())
+        self._seen = current
+        return notes
+
+    def close(self) -> None:
+        self._seen = {}
+
+
+def _list_files(folder: Path) -> List[str]:
+    with os.scandir(folder) as iterator:
+        return [entry.name for entry in iterator if entry.is_file(follow_symlinks=False)]
+
+
+def open_observer(folder: Path, backend: str = "auto", poll_interval: float = POLL_INTERVAL) -> Union[InotifyObserver, PollingObserver]:
+    """Escolhe o observador: "inotify", "polling" ou "auto" (inotify quando disponível)."""
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyObserver(folder)
+        except OSError as e:
+            if backend == "inotify":
+                raise
+            logging.info(f"inotify indisponível ({e}); a usar leitura periódica da pasta.")
+    return PollingObserver(folder, poll_interval)
+
+
+class WatchStats:
+    """Contadores da vigilância: fila, ficheiros ordenados e latência desde a chegada."""
+
+    def __init__(self):
+        self.arrived = 0
+        self.sorted = 0
+        self.failed = 0
+        self.ignored = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.rule_reloads = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        # Instantes (monotonic) dos ficheiros ordenados no último minuto.
+        self._recent: Deque[float] = deque()
+
+    def record_sorted(self, arrived_at: float, now: float) -> None:
+        self.sorted += 1
+        self.latencies.append(now - arrived_at)
+        self._recent.append(now)
+
+    def set_queue_depth(self, depth: int) -> None:
+        self.queue_depth = depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        while self._recent and self._recent[0] < now - 60:
+            self._recent.popleft()
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1)
+
+        return {
+            "arrived": self.arrived, "sorted": self.sorted, "failed": self.failed, "ignored": self.ignored,
+            "queue_depth": self.queue_depth, "max_queue_depth": self.max_queue_depth,
+            "sorted_last_minute": len(self._recent), "rule_reloads": self.rule_reloads,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99),
+                           "max": round(latencies[-1] * 1000, 1) if latencies else None},
+        }
+
+    def text(self) -> str:
+        s = self.snapshot()
+        latency = s["latency_ms"]
+        text = (f"Na fila: {s['queue_depth']} (máx. {s['max_queue_depth']}) | ordenados: {s['sorted']} "
+                f"({s['sorted_last_minute']}/min) | erros: {s['failed']}")
+        if latency["p50"] is not None:
+            text += f" | latência p50 {latency['p50']:.0f} ms, p95 {latency['p95']:.0f} ms, máx. {latency['max']:.0f} ms"
+        return text
+
+
+class FolderWatcher:
+    """Ordena os ficheiros de uma pasta à medida que chegam, com as regras da lógica.
+
+    Cada ficheiro é ordenado sozinho (não há varredura da pasta) assim que fica quieto:
+    `quiet_period` segundos depois de ser fechado ou movido para a pasta, ou
+    `open_quiet_period` segundos depois do último evento se nunca foi visto a fechar.
+    O ficheiro de regras da lógica é relido quando muda; um ficheiro inválido (por exemplo,
+    a meio de ser gravado) é ignorado e as regras anteriores mantêm-se.
+    """
+
+    def __init__(self, logic: Any, folder: Union[str, Path], backend: str = "auto", exclude: Sequence[str] = (),
+                 quiet_period: float = QUIET_PERIOD, open_quiet_period: float = OPEN_QUIET_PERIOD,
+                 poll_interval: float = POLL_INTERVAL):
+        self.logic = logic
+        self.folder = Path(folder)
+        self.backend = backend
+        self.exclude = tuple(exclude)
+        self.quiet_period = quiet_period
+        self.open_quiet_period = open_quiet_period
+        self.poll_interval = poll_interval
+        self.stats = WatchStats()
+        # nome -> [chegada, prazo]; o heap guarda (prazo, nome) e as entradas antigas são ignoradas.
+        self._pending: Dict[str, List[float]] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._config_signature: Optional[Tuple[int, int]] = None
+        # O próprio ficheiro de regras, se estiver na pasta vigiada, nunca é movido.
+        config_path = Path(logic.config_path)
+        self._config_name = config_path.name if config_path.parent.resolve() == self.folder.resolve() else None
+
+    def _is_ignored(self, name: str) -> bool:
+        if is_partial_name(name) or name == self._config_name:
+            return True
+        return any(fnmatch(name, pattern) for pattern in self.exclude)
+
+    def _note(self, name: str, kind: str, now: float) -> None:
+        if kind == "removed":
+            self._pending.pop(name, None)
+            return
+        if self._is_ignored(name):
+            if kind == "closed":
+                self.stats.ignored += 1
+            return
+        deadline = now + (self.quiet_period if kind == "closed" else self.open_quiet_period)
+        pending = self._pending.get(name)
+        if pending is None:
+            self.stats.arrived += 1
+            self._pending[name] = [now, deadline]
+        else:
+            pending[1] = deadline
+        heapq.heappush(self._deadlines, (deadline, name))
+
+    def _pop_ready(self, now: float) -> List[Tuple[str, float]]:
+        ready = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, name = heapq.heappop(self._deadlines)
+            pending = self._pending.get(name)
+            if pending is not None and pending[1] == deadline:
+                del self._pending[name]
+                ready.append((name, pending[0]))
+        return ready
+
+    def _next_wait(self, now: float) -> float:
+        if not self._deadlines:
+            return MAX_WAIT
+        return min(MAX_WAIT, max(0.0, self._deadlines[0][0] - now))
+
+    def _config_changed(self) -> bool:
+        try:
+            config_stat = self.logic.config_path.stat()
+        except OSError:
+            return False
+        signature = (config_stat.st_mtime_ns, config_stat.st_size)
+        changed = self._config_signature is not None and signature != self._config_signature
+        self._config_signature = signature
+        return changed
+
+    def _reload_rules(self) -> Optional[str]:
+        """Relê o ficheiro de regras; devolve uma mensagem para o log se as regras mudaram."""
+        try:
+            with self.logic.config_path.open('r', encoding='utf-8') as f:
+                rules = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Regras em '{self.logic.config_path}' ignoradas (ficheiro inválido): {e}")
+            return None
+        if not isinstance(rules, list):
+            logging.error(f"Regras em '{self.logic.config_path}' ignoradas: era esperada uma lista.")
+            return None
+        if rules == self.logic.rules:
+            return None
+        self.logic.set_rules(rules)
+        self.stats.rule_reloads += 1
+        return f"Regras recarregadas ({len(rules)} regras)."
+
+    def _sort(self, ready: List[Tuple[str, float]], name_index: DestinationNameIndex) -> Generator[Tuple[str, str], None, None]:
+        files = []
+        for name, arrived_at in ready:
+            path = self.folder / name
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                files.append((PathEntry(path, st), arrived_at))
+        folders = self.logic.current_matcher().classify_entries([entry for entry, _ in files], self.logic.attributes)
+        ensured = set()
+        for (entry, arrived_at), folder in zip(files, folders):
+            path = Path(entry.path)
+            destination_path = self.folder / folder
+            try:
+                if folder not in ensured:
+                    destination_path.mkdir(exist_ok=True)
+                    ensured.add(folder)
+                target = name_index.reserve(destination_path, path.name)
+                final_destination, _ = move_without_collision(path, target, name_index, self.logic.copier)
+            except FileNotFoundError:
+                # O ficheiro desapareceu entre o evento e o movimento.
+                continue
+            except OSError as e:
+                self.stats.failed += 1
+                logging.error(f"Erro ao mover '{path}' para '{destination_path}': {e}")
+                yield ("error", f"Erro ao mover '{path.name}': {e}")
+                continue
+            self.stats.record_sorted(arrived_at, time.monotonic())
+            yield ("log", f"Movido: '{path.name}' -> '{folder}/{final_destination.name}'")
+
+    def run(self, cancel_event: Event, stats_interval: Optional[float] = None) -> Generator[Tuple[str, str], None, Dict[str, Any]]:
+        """Vigia a pasta até `cancel_event`; devolve as estatísticas finais.
+
+        Com `stats_interval`, emite ("stats", resumo) a esse ritmo, mesmo sem atividade.
+        """
+        observer = open_observer(self.folder, self.backend, self.poll_interval)
+        yield ("log", f"A vigiar '{self.folder}' ({observer.name}).")
+        name_index = DestinationNameIndex()
+        name_index_created = last_config_check = last_stats = time.monotonic()
+        self._config_changed()
+        try:
+            while not cancel_event.is_set():
+                try:
+                    notes = observer.read(self._next_wait(time.monotonic()))
+                except FileNotFoundError as e:
+                    yield ("error", str(e))
+                    break
+                now = time.monotonic()
+                for name, kind in notes:
+                    self._note(name, kind, now)
+                self.stats.set_queue_depth(len(self._pending))
+
+                if now - last_config_check >= CONFIG_CHECK_INTERVAL:
+                    last_config_check = now
+                    if self._config_changed():
+                        message = self._reload_rules()
+                        if message:
+                            yield ("log", message)
+
+                ready = self._pop_ready(now)
+                if ready:
+                    if now - name_index_created >= NAME_INDEX_MAX_AGE:
+                        name_index, name_index_created = DestinationNameIndex(), now
+                    yield from self._sort(ready, name_index)
+                self.stats.set_queue_depth(len(self._pending))
+
+                if stats_interval and now - last_stats >= stats_interval:
+                    last_stats = now
+                    yield ("stats", self.stats.text())
+        finally:
+            observer.close()
+        yield ("done", f"Vigilância terminada: {self.stats.sorted} ficheiros ordenados.")
+        return self.stats.snapshot()